@@ -0,0 +1,535 @@
+#!/usr/bin/env python3
+"""
+GSD Benchmarks v1.0
+Offline latency benchmarks for the GSD hot paths.
+
+Builds a fake kimi_cli tree with the upstream code the patches anchor on,
+patches it with kimi_cli_patcher, generates synthetic GSD projects of
+several sizes and times:
+
+- prompt.py        CustomPromptSession._get_gsd_context  (every toolbar render,
+                   and the first one, which only schedules the watcher start)
+                   and the whole patched _render_bottom_toolbar
+- kimisoul.py      KimiSoul._load_gsd_context, .status   (every status read)
+- shell/__init__   _get_gsd_welcome                      (shell start)
+- jim-wrapper.py   get_gsd_welcome                       (every jim launch)
+- gsd_runtime      get_context with a cleared cache      (cold parse)
+- gsd_git          one GitWatcher pass                   (every GSD_GIT_INTERVAL)
+- the patcher      apply_all_patches on a fresh tree
+- jim              `JIM_DRY_RUN=1 jim` as installed by gsd_install, against
+                   a bare `python3 -c pass` (process startup to exec)
+
+Results are written as JSON and compared against benchmarks/thresholds.json;
+--check exits non-zero when a benchmark's p95 exceeds its threshold.
+
+Usage:
+    python3 benchmarks/gsd_bench.py [--sizes small,medium,huge] [--quick]
+                                    [--output FILE] [--check] [--thresholds FILE]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable
+
+BENCH_VERSION = "1.0.0"
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PATCHES_DIR = REPO_ROOT / "patches"
+DEFAULT_THRESHOLDS = Path(__file__).resolve().parent / "thresholds.json"
+
+# name -> (STATE.md log lines, ROADMAP.md phases, todos)
+FIXTURE_SIZES = {
+    "small": (20, 5, 10),
+    "medium": (5_000, 50, 1_000),
+    "huge": (200_000, 500, 100_000),
+}
+
+# Iterations for hot (cached) paths and cold (parsing) paths
+HOT_ITERATIONS = 2_000
+COLD_ITERATIONS = 50
+APPLY_ITERATIONS = 10
+STARTUP_ITERATIONS = 30
+
+
+# =============================================================================
+# FAKE KIMI CLI
+# =============================================================================
+
+# Upstream code the patches anchor on, plus just enough to import and run it
+FAKE_KIMI_SOURCES = {
+    "__init__.py": "",
+    "ui/__init__.py": "",
+    "ui/shell/prompt.py": '''from enum import Enum
+FormattedText = list
+
+
+class PromptMode(Enum):
+    AGENT = "agent"
+    SHELL = "shell"
+
+
+class CustomPromptSession:
+    def __init__(self, status_provider, model_name=None, thinking=False):
+        self._mode = PromptMode.AGENT
+        self._model_name = model_name
+        self._thinking = thinking
+        self._status_provider = status_provider
+
+    def _render_bottom_toolbar(self) -> FormattedText:
+        fragments = []
+        columns = 120
+        mode = str(self._mode).lower()
+        if self._mode == PromptMode.AGENT:
+            mode_details: list[str] = []
+            if self._model_name:
+                mode_details.append(self._model_name)
+            if self._thinking:
+                mode_details.append("thinking")
+            if mode_details:
+                mode += f" ({', '.join(mode_details)})"
+        status = self._status_provider()
+        fragments.append(("", mode))
+        return fragments, columns
+''',
+    "ui/shell/__init__.py": '''class _Console:
+    def print(self, *args, **kwargs):
+        pass
+
+
+console = _Console()
+WelcomeInfoItem = object
+
+
+def _print_welcome_info(name: str, items: list[WelcomeInfoItem] | None):
+    console.print()
+    console.print(f"[bold]{name}[/bold]", justify="center")
+''',
+    "soul/__init__.py": '''from dataclasses import dataclass
+
+
+def get_wire_or_none():
+    return None
+
+
+def wire_send(msg):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class StatusSnapshot:
+    """Status snapshot for the soul."""
+
+    context_usage: float
+    """The usage of the context, in percentage."""
+
+    yolo_enabled: bool
+    """Whether YOLO mode is enabled."""
+''',
+    "soul/kimisoul.py": '''from kimi_cli.soul import StatusSnapshot
+
+
+class KimiSoul:
+    def __init__(self, runtime, approval):
+        self.runtime = runtime
+        self._approval = approval
+        self._context_usage = 0.0
+
+    @property
+    def status(self) -> StatusSnapshot:
+        return StatusSnapshot(
+            context_usage=self._context_usage,
+            yolo_enabled=self._approval.is_yolo(),
+        )
+''',
+    "wire/__init__.py": "",
+    "wire/types.py": '''from typing import Literal
+
+try:
+    from pydantic import BaseModel
+except ImportError:  # benchmarks run without kimi-cli's dependencies
+    class BaseModel:
+        def __init__(self, **data):
+            self.__dict__.update(data)
+
+
+class TurnBegin(BaseModel):
+    type: Literal["turn_begin"] = "turn_begin"
+''',
+}
+
+
+def make_fake_kimi(site_packages: Path) -> Path:
+    """Write an unpatched fake kimi_cli package; returns its root."""
+    root = site_packages / "kimi_cli"
+    for rel, source in FAKE_KIMI_SOURCES.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source)
+    return root
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+def make_project(directory: Path, size: str) -> Path:
+    """Generate a synthetic GSD project; returns its root."""
+    log_lines, phases, todos = FIXTURE_SIZES[size]
+    planning = directory / ".planning"
+    planning.mkdir(parents=True, exist_ok=True)
+    (directory / ".git").mkdir(exist_ok=True)
+
+    (planning / "PROJECT.md").write_text(
+        f"# Benchmark Project ({size})\n\n"
+        + "".join(f"- Requirement {i}: the system shall do thing {i}\n" for i in range(phases * 4)))
+
+    with open(planning / "STATE.md", "w") as f:
+        f.write("# State\n\n## Current Phase: 3\n\nStatus: executing\n\n## Completed Tasks\n\n")
+        for i in range(log_lines):
+            f.write(f"- [x] Task {i}: implemented and verified step {i} of the plan\n")
+
+    with open(planning / "ROADMAP.md", "w") as f:
+        f.write("# Roadmap\n\n## Current Milestone: Benchmark Milestone\n\n")
+        for i in range(phases):
+            f.write(f"### Phase {i}\n\nGoal: deliver increment {i}.\n\n")
+
+    (directory / ".kimi-todos.json").write_text(json.dumps(
+        [{"title": f"Todo {i}", "done": i % 3 == 0} for i in range(todos)], indent=2))
+
+    # A repository on branch main with the fixture files tracked and clean
+    (directory / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+    write_git_index(directory, [".kimi-todos.json", ".planning/PROJECT.md",
+                                ".planning/ROADMAP.md", ".planning/STATE.md"])
+    return directory
+
+
+def write_git_index(directory: Path, paths: list[str]) -> None:
+    """A version 2 .git/index recording the current stat data of paths."""
+    import struct
+
+    data = bytearray(struct.pack(">4sII", b"DIRC", 2, len(paths)))
+    for path in sorted(paths):
+        st = os.stat(directory / path)
+        name = path.encode()
+        entry = struct.pack(">10I", int(st.st_ctime), st.st_ctime_ns % 10**9,
+                            int(st.st_mtime), st.st_mtime_ns % 10**9, st.st_dev & 0xffffffff,
+                            st.st_ino & 0xffffffff, 0o100644, st.st_uid, st.st_gid, st.st_size)
+        entry += bytes(20) + struct.pack(">H", len(name)) + name
+        data += entry + bytes(8 - len(entry) % 8)
+    (directory / ".git" / "index").write_bytes(bytes(data + bytes(20)))
+
+
+# =============================================================================
+# TIMING
+# =============================================================================
+
+def measure(func: Callable[[], Any], iterations: int,
+            setup: Callable[[], Any] | None = None) -> dict[str, Any]:
+    """Time func() `iterations` times; setup() runs untimed before each call."""
+    samples = []
+    for _ in range(iterations):
+        if setup is not None:
+            setup()
+        start = time.perf_counter_ns()
+        func()
+        samples.append(time.perf_counter_ns() - start)
+    return summarize(samples)
+
+
+def summarize(samples: list[int]) -> dict[str, Any]:
+    """Latency statistics of nanosecond samples, in microseconds."""
+    samples = sorted(samples)
+    return {
+        "iterations": len(samples),
+        "min_us": samples[0] / 1000,
+        "median_us": statistics.median(samples) / 1000,
+        "mean_us": statistics.fmean(samples) / 1000,
+        "p95_us": samples[min(len(samples) - 1, int(len(samples) * 0.95))] / 1000,
+        "max_us": samples[-1] / 1000,
+    }
+
+
+def load_module(name: str, path: Path) -> Any:
+    """Import a module from a file path (jim-wrapper.py is not importable by name)."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# =============================================================================
+# BENCHMARKS
+# =============================================================================
+
+def bench_apply(patcher: Any, workdir: Path, iterations: int) -> dict[str, Any]:
+    """apply_all_patches on a freshly generated fake tree each iteration."""
+    counter = iter(range(iterations))
+    state: dict[str, Path] = {}
+
+    def setup() -> None:
+        state["root"] = make_fake_kimi(workdir / f"apply-{next(counter)}")
+
+    def run() -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            if not patcher.apply_all_patches(state["root"]):
+                raise RuntimeError("apply_all_patches failed on the fake tree")
+
+    return measure(run, iterations, setup)
+
+
+def bench_jim_startup(patcher: Any, workdir: Path, iterations: int) -> dict[str, dict[str, Any]]:
+    """Wall time of `JIM_DRY_RUN=1 jim` against a bare interpreter start.
+
+    jim is installed by gsd_install into a scratch HOME whose uv tool
+    directory holds a patched fake kimi-cli, so the launch takes the same
+    path as a real one: cached install lookup, manifest check, welcome and
+    agent resolution, ending where jim would exec kimi. Launches alternate
+    with `python3 -c pass`; the overhead is their per-pair difference.
+    """
+    import subprocess
+
+    home = workdir / "jim-home"
+    env = {**os.environ, "HOME": str(home), "XDG_DATA_HOME": str(home / ".local" / "share"),
+           "JIM_DRY_RUN": "1", "GSD_STATUSD": "0"}
+    for name in ("UV_TOOL_DIR", "PYTHONDONTWRITEBYTECODE", "GSD_STATS"):
+        env.pop(name, None)
+    # Skills under ~/.kimi, where the installed gsd-agent.yaml points
+    (home / ".kimi" / "skills").mkdir(parents=True, exist_ok=True)
+    subprocess.run([sys.executable, str(PATCHES_DIR / "gsd_install.py"), "--link", "copy"],
+                   env=env, check=True, stdout=subprocess.DEVNULL)
+    version = f"python{sys.version_info.major}.{sys.version_info.minor}"
+    kimi_root = make_fake_kimi(home / ".local" / "share" / "uv" / "tools" / "kimi-cli"
+                               / "lib" / version / "site-packages")
+    with contextlib.redirect_stdout(io.StringIO()):
+        patcher.apply_all_patches(kimi_root)
+    project = make_project(workdir / "jim-project", "small")
+
+    jim = [sys.executable, str(home / ".local" / "bin" / "jim")]
+    bare = [sys.executable, "-c", "pass"]
+
+    def run(cmd: list[str]) -> int:
+        start = time.perf_counter_ns()
+        subprocess.run(cmd, env=env, cwd=project, check=True, stdout=subprocess.DEVNULL)
+        return time.perf_counter_ns() - start
+
+    # The first launches cache the install location, the agent bundle and bytecode
+    for _ in range(2):
+        run(jim)
+    jim_samples, bare_samples = [], []
+    for _ in range(iterations):
+        bare_samples.append(run(bare))
+        jim_samples.append(run(jim))
+    return {
+        "python.startup": summarize(bare_samples),
+        "jim.startup": summarize(jim_samples),
+        "jim.startup[overhead]": summarize([j - b for j, b in zip(jim_samples, bare_samples)]),
+    }
+
+
+def bench_hooks(project: Path, hot: int, cold: int) -> dict[str, dict[str, Any]]:
+    """Time the injected hooks and the jim welcome inside one project."""
+    import gsd_git
+    import gsd_runtime
+    import gsd_watcher
+    from kimi_cli.soul.kimisoul import KimiSoul
+    from kimi_cli.ui.shell import _get_gsd_welcome
+    from kimi_cli.ui.shell.prompt import CustomPromptSession
+
+    jim = load_module("jim_wrapper", PATCHES_DIR / "jim-wrapper.py")
+
+    os.chdir(project)
+    work_dir = str(project)
+    todos_file = gsd_runtime.project_todos_file(work_dir)
+
+    session = CustomPromptSession(status_provider=lambda: None)
+    soul = KimiSoul(
+        SimpleNamespace(builtin_args=SimpleNamespace(KIMI_WORK_DIR=project)),
+        SimpleNamespace(is_yolo=lambda: False))
+
+    # Warm up: the hooks start their watchers on helper threads; wait for
+    # those and for the first snapshot
+    session._get_gsd_context()
+    soul._load_gsd_context()
+    deadline = time.monotonic() + 10
+    while session._gsd_watcher is None or getattr(soul, "_gsd_watcher", None) is None:
+        if time.monotonic() > deadline:
+            raise RuntimeError("GSD watchers did not start")
+        time.sleep(0.001)
+    gsd_watcher.get_watcher(work_dir, gsd_runtime.session_todos_file()).wait_ready(10)
+    gsd_watcher.get_watcher(work_dir, todos_file).wait_ready(10)
+    git_watcher = gsd_git.get_watcher(work_dir)
+    git_watcher.wait_ready(10)
+
+    ctx = session._get_gsd_context()
+    fields = soul._load_gsd_context()
+    toolbar, _ = session._render_bottom_toolbar()
+    if not (ctx and ctx.enabled and ctx.phase == "3" and fields.get("gsd_todos_total")
+            and any("📋P3" in text for _, text in toolbar)):
+        raise RuntimeError(f"hooks returned no GSD context for {project}")
+    if not any("🌿main" in text for _, text in toolbar):
+        raise RuntimeError(f"toolbar has no git segment for {project}: {toolbar}")
+
+    def cold_context() -> None:
+        gsd_runtime.get_context(work_dir, todos_file)
+
+    # A new prompt's first render only schedules the watcher start
+    fresh: list[Any] = []
+
+    def new_session() -> None:
+        fresh[:] = [CustomPromptSession(status_provider=lambda: None)]
+
+    def first_render() -> None:
+        fresh[0]._get_gsd_context()
+
+    results = {
+        "prompt._get_gsd_context": measure(session._get_gsd_context, hot),
+        "prompt._get_gsd_context[first]": measure(first_render, cold, new_session),
+        "prompt._render_bottom_toolbar": measure(session._render_bottom_toolbar, hot),
+        "kimisoul._load_gsd_context": measure(soul._load_gsd_context, hot),
+        "kimisoul.status": measure(lambda: soul.status, hot),
+        "shell._get_gsd_welcome": measure(_get_gsd_welcome, hot),
+        "jim.get_gsd_welcome": measure(jim.get_gsd_welcome, hot),
+        "runtime.get_context[cold]": measure(cold_context, cold, gsd_runtime.clear_cache),
+        "git.refresh": measure(git_watcher.refresh, cold),
+    }
+    gsd_watcher.stop_all()
+    gsd_git.stop_all()
+    return results
+
+
+def run_benchmarks(sizes: list[str], quick: bool = False) -> dict[str, Any]:
+    """Run every benchmark and return the JSON-ready report."""
+    scale = 10 if quick else 1
+    hot, cold, apply_runs = HOT_ITERATIONS // scale, max(5, COLD_ITERATIONS // scale), max(3, APPLY_ITERATIONS // scale)
+    startup_runs = max(5, STARTUP_ITERATIONS // scale)
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory(prefix="gsd-bench-") as tmp:
+        workdir = Path(tmp)
+        patcher = load_module("kimi_cli_patcher", PATCHES_DIR / "kimi_cli_patcher.py")
+
+        benchmarks: dict[str, dict[str, Any]] = {}
+        benchmarks["patcher.apply_all_patches"] = bench_apply(patcher, workdir, apply_runs)
+        benchmarks.update(bench_jim_startup(patcher, workdir, startup_runs))
+
+        # One patched tree for the hooks, importable like the real install
+        site_packages = workdir / "site-packages"
+        kimi_root = make_fake_kimi(site_packages)
+        with contextlib.redirect_stdout(io.StringIO()):
+            patcher.apply_all_patches(kimi_root)
+        sys.path.insert(0, str(site_packages))
+        os.environ.pop("KIMI_SESSION_ID", None)
+        # Measure the in-process watcher, not a gsd-statusd that happens to run
+        os.environ["GSD_STATUSD"] = "0"
+        os.environ["GSD_TODOS_CACHE"] = str(workdir / "todos-cache")
+
+        try:
+            for size in sizes:
+                project = make_project(workdir / f"project-{size}", size)
+                # Readers never write the summary; the store does when it
+                # updates a list, so seed it the same way
+                import gsd_todos
+                gsd_todos.TodoStore(project / ".kimi-todos.json").refresh_summary()
+                for name, result in bench_hooks(project, hot, cold).items():
+                    benchmarks[f"{name}[{size}]"] = result
+        finally:
+            os.chdir(cwd)
+            sys.path.remove(str(site_packages))
+
+    return {
+        "version": BENCH_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": quick,
+        "sizes": {size: dict(zip(("state_log_lines", "roadmap_phases", "todos"), FIXTURE_SIZES[size]))
+                  for size in sizes},
+        "benchmarks": benchmarks,
+    }
+
+
+# =============================================================================
+# THRESHOLDS
+# =============================================================================
+
+def check_thresholds(report: dict[str, Any], thresholds: dict[str, Any]) -> list[str]:
+    """Annotate each benchmark with its threshold; returns the regressions."""
+    regressions = []
+    limits = thresholds.get("p95_us", {})
+    for name, result in report["benchmarks"].items():
+        limit = limits.get(name)
+        if limit is None:
+            result["status"] = "untracked"
+            continue
+        result["threshold_p95_us"] = limit
+        result["status"] = "ok" if result["p95_us"] <= limit else "regressed"
+        if result["status"] == "regressed":
+            regressions.append(f"{name}: p95 {result['p95_us']:.1f} us > {limit} us")
+    return regressions
+
+
+def print_table(report: dict[str, Any]) -> None:
+    print(f"\n{'Benchmark':48} {'median':>12} {'p95':>12} {'threshold':>12}  status", file=sys.stderr)
+    print("-" * 100, file=sys.stderr)
+    for name, r in report["benchmarks"].items():
+        limit = r.get("threshold_p95_us")
+        print(f"{name:48} {r['median_us']:10.1f}us {r['p95_us']:10.1f}us "
+              f"{(f'{limit}us' if limit is not None else '-'):>12}  {r.get('status', '-')}", file=sys.stderr)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="GSD hot path benchmarks")
+    parser.add_argument("--sizes", default=",".join(FIXTURE_SIZES),
+                        help=f"Comma-separated fixture sizes (default: {','.join(FIXTURE_SIZES)})")
+    parser.add_argument("--quick", action="store_true", help="10x fewer iterations")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--thresholds", default=str(DEFAULT_THRESHOLDS), help="Threshold file")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if any threshold is exceeded")
+    args = parser.parse_args()
+
+    sizes = [s for s in args.sizes.split(",") if s]
+    unknown = [s for s in sizes if s not in FIXTURE_SIZES]
+    if unknown:
+        parser.error(f"unknown size(s): {', '.join(unknown)}")
+
+    report = run_benchmarks(sizes, args.quick)
+
+    try:
+        thresholds = json.loads(Path(args.thresholds).read_text())
+    except (OSError, ValueError):
+        thresholds = {}
+    regressions = check_thresholds(report, thresholds)
+    report["regressions"] = regressions
+
+    print_table(report)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+    if regressions:
+        print("\n⚠️  Regressions:\n  " + "\n  ".join(regressions), file=sys.stderr)
+        return 1 if args.check else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
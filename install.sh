@@ -45,23 +45,29 @@ VERSION_CLEAN=${VERSION#v}
 echo "   Latest version: $VERSION"
 echo ""
 
-# Check for Node.js
-if ! command -v node &> /dev/null; then
-  echo "⚠️  Node.js not found"
-  echo "   Please install Node.js 16+ first:"
-  echo "   https://nodejs.org/"
-  exit 1
-fi
+# The incremental Python installer needs only python3; Node.js is the fallback
+if command -v python3 &> /dev/null; then
+  echo "✅ $(python3 --version) detected"
+  echo ""
+else
+  # Check for Node.js
+  if ! command -v node &> /dev/null; then
+    echo "⚠️  Node.js not found"
+    echo "   Please install Node.js 16+ first:"
+    echo "   https://nodejs.org/"
+    exit 1
+  fi
 
-NODE_VERSION=$(node --version | cut -d'v' -f2 | cut -d'.' -f1)
-if [ "$NODE_VERSION" -lt 16 ]; then
-  echo "⚠️  Node.js version is too old ($NODE_VERSION)"
-  echo "   Please upgrade to Node.js 16+"
-  exit 1
-fi
+  NODE_VERSION=$(node --version | cut -d'v' -f2 | cut -d'.' -f1)
+  if [ "$NODE_VERSION" -lt 16 ]; then
+    echo "⚠️  Node.js version is too old ($NODE_VERSION)"
+    echo "   Please upgrade to Node.js 16+"
+    exit 1
+  fi
 
-echo "✅ Node.js $(node --version) detected"
-echo ""
+  echo "✅ Node.js $(node --version) detected"
+  echo ""
+fi
 
 # Check for Kimi CLI
 if ! command -v kimi &> /dev/null && ! command -v jim &> /dev/null; then
@@ -119,7 +125,12 @@ if [ "$DRY_RUN" = true ]; then
 else
   echo "🚀 Running installer..."
   cd "${TMP_DIR}/gsd-kimi-cli"
-  node scripts/install.js
+  if command -v python3 &> /dev/null; then
+    # Manifest-driven: repeat installs only touch files that changed
+    python3 patches/gsd_install.py
+  else
+    node scripts/install.js
+  fi
 fi
 
 # Cleanup
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+GSD Bundle v1.0
+Pre-resolved GSD agent bundle for `jim`.
+
+~/.kimi/gsd-agent.yaml names a system prompt and 11 subagents, and each
+subagent's sub.yaml extends an agent.yaml with its own system.md. kimi
+resolves, merges and templates that whole graph on every launch. jim builds a
+bundle from it once and points kimi at that instead:
+
+- one flat YAML per agent: ``extend`` chains merged, every path absolute
+- system prompts with their static ``system_prompt_args`` and
+  ``${SUBAGENTS_MD}`` already substituted (kimi's runtime ``${KIMI_*}``
+  arguments are left for kimi)
+- a manifest with the (mtime_ns, size) of every source file
+
+kimi's agent spec only takes subagents and system prompts by path, so they
+remain separate files, but no agent has an extend chain or template
+arguments left to resolve.
+
+A launch only stats the recorded inputs (``bundle_agent()``). When one of
+them changed, the bundle is rebuilt in-process if PyYAML is importable, else
+in the background with kimi's own interpreter. That launch then uses
+gsd-agent.yaml directly. A build that fails (a missing system prompt, a YAML
+error) is recorded in the manifest too, with the inputs it got to, so later
+launches pass gsd-agent.yaml without retrying until one of those changes.
+Bundles live in content-addressed directories, so touching an input without
+changing it only rewrites the manifest.
+
+Environment:
+    GSD_BUNDLE   0 to always pass gsd-agent.yaml itself
+
+Usage:
+    python3 gsd_bundle.py [build|status] [AGENT_FILE]
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from typing import Any
+
+BUNDLE_VERSION = "1.0.0"
+
+GSD_AGENT = os.path.join(os.path.expanduser('~'), '.kimi', 'gsd-agent.yaml')
+BUNDLE_DIR = os.path.join(os.path.expanduser('~'), '.kimi', 'gsd-bundle')
+MANIFEST = os.path.join(BUNDLE_DIR, 'manifest')
+MANIFEST_HEADER = f"gsd-bundle {BUNDLE_VERSION}"
+# Manifest agent of a failed build; a missing input is recorded with size -1
+FAILED = "-"
+# Guards against extend/subagent cycles
+MAX_DEPTH = 8
+
+
+# =============================================================================
+# FAST PATH
+# =============================================================================
+
+def bundle_agent(source: str = GSD_AGENT) -> str | None:
+    """The bundled agent file for source if it is up to date, else None.
+
+    Returns "" when the last build failed and none of its inputs changed
+    since. Costs one small read and a stat per input file.
+    """
+    try:
+        with open(MANIFEST, encoding='utf-8') as f:
+            lines = f.read().split('\n')
+    except OSError:
+        return None
+    if len(lines) < 3 or lines[0] != MANIFEST_HEADER or lines[2] != f"source {source}":
+        return None
+    agent = lines[1][len("agent "):]
+    for line in lines[3:]:
+        if not line:
+            continue
+        mtime_ns, size, path = line.split(' ', 2)
+        try:
+            st = os.stat(path)
+        except OSError:
+            if size == '-1':
+                continue
+            return None
+        if st.st_mtime_ns != int(mtime_ns) or st.st_size != int(size):
+            return None
+    if agent == FAILED:
+        return ""
+    return agent if os.path.exists(agent) else None
+
+
+def ensure_bundle(source: str = GSD_AGENT) -> str | None:
+    """The bundled agent for source, rebuilding it if needed.
+
+    Returns None when the bundle is stale and cannot be built in this
+    process; a background rebuild is started for the next launch.
+    """
+    agent = bundle_agent(source)
+    if agent is not None:
+        return agent or None
+    try:
+        import yaml  # noqa: F401
+    except ImportError:
+        rebuild_in_background(source)
+        return None
+    try:
+        return build(source)
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+    except Exception as e:  # yaml.YAMLError
+        if type(e).__module__.startswith('yaml'):
+            return None
+        raise
+
+
+def rebuild_in_background(source: str) -> None:
+    """Build the bundle with kimi's interpreter, which ships PyYAML."""
+    try:
+        import subprocess
+
+        import kimi_cli_patcher
+
+        root = kimi_cli_patcher.get_kimi_cli_root()
+        python = kimi_cli_patcher.tool_python(root, kimi_cli_patcher.target_python_version(root))
+        if python is None:
+            return
+        subprocess.Popen([str(python), os.path.abspath(__file__), 'build', source],
+                         stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                         stderr=subprocess.DEVNULL, start_new_session=True)
+    except Exception:
+        pass
+
+
+# =============================================================================
+# BUILD
+# =============================================================================
+
+def prerender(text: str, values: dict[str, str]) -> str:
+    """Substitute the given ${NAME}/$NAME arguments and leave everything else.
+
+    Other placeholders and ``$$`` escapes are kept verbatim for kimi's own
+    string.Template pass; ``$`` in substituted values is escaped for it.
+    """
+    import string
+
+    def replace(match: Any) -> str:
+        name = match.group('named') or match.group('braced')
+        if name is not None and name in values:
+            return values[name].replace('$', '$$')
+        return match.group(0)
+
+    return string.Template.pattern.sub(replace, text)
+
+
+def render_subagents_md(subagents: dict[str, Any]) -> str:
+    """Markdown list of subagents and their descriptions."""
+    return "\n".join(f"- `{name}`: {(entry or {}).get('description', '').strip()}"
+                     for name, entry in subagents.items())
+
+
+class _Builder:
+    def __init__(self) -> None:
+        self.inputs: dict[str, os.stat_result] = {}
+        self.missing: set[str] = set()
+        # Bundle file name -> prompt text, or agent spec naming other bundle files
+        self.files: dict[str, str | dict[str, Any]] = {}
+        self._names: dict[str, str] = {}
+
+    def read(self, path: str) -> bytes:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self.missing.add(path)
+            raise
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.inputs[path] = st
+        return data
+
+    def load_spec(self, path: str, depth: int = 0) -> dict[str, Any]:
+        """The agent spec at path with its extend chain merged, paths absolute."""
+        import yaml
+
+        if depth > MAX_DEPTH:
+            raise ValueError(f"agent specs nested too deeply at {path}")
+        path = os.path.abspath(os.path.expanduser(path))
+        agent = (yaml.safe_load(self.read(path)) or {}).get('agent') or {}
+        base_dir = os.path.dirname(path)
+
+        def resolve(value: str) -> str:
+            return os.path.normpath(os.path.join(base_dir, os.path.expanduser(value)))
+
+        extend = agent.get('extend')
+        if extend and extend != 'default':
+            spec = self.load_spec(resolve(extend), depth + 1)
+        else:
+            # kimi's builtin agent cannot be inlined; keep the reference
+            spec = {'extend': extend} if extend else {}
+        spec['system_prompt_args'] = {**spec.get('system_prompt_args', {}),
+                                      **(agent.get('system_prompt_args') or {})}
+        for key in ('name', 'tools', 'exclude_tools'):
+            if agent.get(key) is not None:
+                spec[key] = agent[key]
+        if agent.get('system_prompt_path') is not None:
+            spec['system_prompt_path'] = resolve(agent['system_prompt_path'])
+        if agent.get('subagents') is not None:
+            spec['subagents'] = {
+                name: {**entry, 'path': resolve(entry['path'])}
+                for name, entry in agent['subagents'].items()}
+        return spec
+
+    def _file_name(self, name: str, source: str) -> str:
+        base, n = name, 1
+        while self._names.get(name, source) != source:
+            n += 1
+            name = f"{base}-{n}"
+        self._names[name] = source
+        return name
+
+    def emit(self, spec: dict[str, Any], name: str, source: str, depth: int = 0) -> str:
+        """Queue the flat files for one agent; returns its bundle file name."""
+        name = self._file_name(name, source)
+        agent: dict[str, Any] = {}
+        for key in ('extend', 'name'):
+            if spec.get(key):
+                agent[key] = spec[key]
+        subagents = spec.get('subagents')
+        args = {key: str(value) for key, value in spec.get('system_prompt_args', {}).items()}
+        if spec.get('system_prompt_path'):
+            text = self.read(spec['system_prompt_path']).decode('utf-8')
+            if subagents is not None:
+                args.setdefault('SUBAGENTS_MD', render_subagents_md(subagents))
+            prompt = f"{name}.md"
+            self.files[prompt] = prerender(text, args)
+            agent['system_prompt_path'] = prompt
+        elif args:
+            agent['system_prompt_args'] = args
+        for key in ('tools', 'exclude_tools'):
+            if key in spec:
+                agent[key] = spec[key]
+        if subagents is not None:
+            agent['subagents'] = {}
+            for sub_name, entry in subagents.items():
+                sub_spec = self.load_spec(entry['path'], depth + 1)
+                bundled = {'path': self.emit(sub_spec, sub_name, entry['path'], depth + 1)}
+                if entry.get('description'):
+                    bundled['description'] = entry['description']
+                agent['subagents'][sub_name] = bundled
+        self.files[f"{name}.yaml"] = agent
+        return f"{name}.yaml"
+
+    def write(self, directory: str, out_dir: str) -> None:
+        """Write every queued file into directory, referring to them in out_dir."""
+        import yaml
+
+        for name, content in self.files.items():
+            if isinstance(content, dict):
+                agent = dict(content)
+                if 'system_prompt_path' in agent:
+                    agent['system_prompt_path'] = os.path.join(out_dir, agent['system_prompt_path'])
+                if 'subagents' in agent:
+                    agent['subagents'] = {
+                        sub_name: {**entry, 'path': os.path.join(out_dir, entry['path'])}
+                        for sub_name, entry in agent['subagents'].items()}
+                content = yaml.safe_dump({'version': 1, 'agent': agent}, sort_keys=False,
+                                         allow_unicode=True, width=1 << 16)
+            with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+                f.write(content)
+
+
+def _input_key(inputs: dict[str, os.stat_result]) -> str:
+    """Content hash of every input, in a stable order."""
+    import hashlib
+
+    digest = hashlib.sha256(BUNDLE_VERSION.encode())
+    for path in sorted(inputs):
+        with open(path, 'rb') as f:
+            digest.update(path.encode() + b'\0' + f.read() + b'\0')
+    return digest.hexdigest()[:16]
+
+
+def build(source: str = GSD_AGENT) -> str:
+    """Build (or reuse) the bundle for source and record it in the manifest."""
+    import shutil
+
+    source = os.path.abspath(os.path.expanduser(source))
+    builder = _Builder()
+    try:
+        builder.emit(builder.load_spec(source), 'agent', source)
+    except Exception:
+        try:
+            write_manifest(FAILED, source, builder)
+        except OSError:
+            pass
+        raise
+    key = _input_key(builder.inputs)
+    out_dir = os.path.join(BUNDLE_DIR, key)
+
+    if not os.path.exists(os.path.join(out_dir, 'agent.yaml')):
+        # Written aside and renamed into place, so kimi never sees half a bundle
+        tmp_dir = os.path.join(BUNDLE_DIR, f".build-{os.getpid()}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        try:
+            builder.write(tmp_dir, out_dir)
+            try:
+                os.rename(tmp_dir, out_dir)
+            except OSError:
+                # Another jim finished the same bundle first
+                if not os.path.exists(os.path.join(out_dir, 'agent.yaml')):
+                    raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    previous = bundle_key()
+    agent = os.path.join(out_dir, 'agent.yaml')
+    write_manifest(agent, source, builder)
+
+    # Keep the previous bundle for kimi sessions that are starting right now
+    for name in os.listdir(BUNDLE_DIR):
+        if name not in (key, previous, 'manifest') and not name.startswith('.'):
+            shutil.rmtree(os.path.join(BUNDLE_DIR, name), ignore_errors=True)
+    return agent
+
+
+def write_manifest(agent: str, source: str, builder: _Builder) -> None:
+    """Record agent (or FAILED) with the signature of every input read."""
+    lines = [MANIFEST_HEADER, f"agent {agent}", f"source {source}"]
+    lines += [f"{st.st_mtime_ns} {st.st_size} {path}" for path, st in sorted(builder.inputs.items())]
+    lines += [f"0 -1 {path}" for path in sorted(builder.missing)]
+    os.makedirs(BUNDLE_DIR, exist_ok=True)
+    tmp = f"{MANIFEST}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, MANIFEST)
+
+
+def bundle_key() -> str | None:
+    """Directory name of the bundle in the manifest, if any."""
+    try:
+        with open(MANIFEST, encoding='utf-8') as f:
+            f.readline()
+            agent = f.readline().rstrip('\n')[len("agent "):]
+    except OSError:
+        return None
+    return os.path.basename(os.path.dirname(agent)) or None
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: list[str] | None = None) -> int:
+    args = sys.argv[1:] if argv is None else argv
+    command = args[0] if args else 'status'
+    source = os.path.abspath(os.path.expanduser(args[1])) if len(args) > 1 else GSD_AGENT
+    if command == 'build':
+        agent = build(source)
+        print(f"✅ GSD agent bundle: {agent}")
+        return 0
+    if command == 'status':
+        agent = bundle_agent(source)
+        if agent == "":
+            print(f"⚠️  The last bundle build for {source} failed; run: python3 gsd_bundle.py build")
+            return 1
+        if agent is None:
+            print(f"⚠️  No up-to-date bundle for {source}; run: python3 gsd_bundle.py build")
+            return 1
+        print(f"✅ GSD agent bundle up to date: {agent}")
+        return 0
+    print(__doc__.split("Usage:")[1].rstrip())
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+GSD Events v1.0
+Coalesced GSDStatusEvent publishing for a patched Kimi CLI.
+
+A StatusPublisher listens to a gsd_watcher.ContextWatcher and turns context
+changes into wire payloads: a full snapshot when a client's wire is bound
+and afterwards only the fields that changed. Bursts of changes,
+such as an executor rewriting STATE.md many times a second, are coalesced
+so at most one event is sent per throttle window.
+
+Environment:
+    GSD_STATUS_THROTTLE   seconds per throttle window (default 0.5, 0 sends every change)
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from typing import Any, Callable
+
+import gsd_runtime
+from gsd_runtime import GSDContext
+
+EVENTS_VERSION = "1.0.0"
+
+DEFAULT_THROTTLE = 0.5
+
+# GSDContext attribute -> GSDStatusEvent field
+EVENT_FIELDS = {
+    'enabled': 'enabled',
+    'phase': 'phase',
+    'todos_total': 'todos_total',
+    'todos_done': 'todos_done',
+    'milestone': 'milestone',
+    'project': 'project',
+}
+
+Sender = Callable[[dict[str, Any]], bool]
+
+
+def full_payload(context: GSDContext, seq: int) -> dict[str, Any]:
+    """Payload carrying every field of the context."""
+    payload: dict[str, Any] = {'full': True, 'seq': seq, 'changed': list(EVENT_FIELDS.values())}
+    for attr, field in EVENT_FIELDS.items():
+        payload[field] = getattr(context, attr)
+    return payload
+
+
+def delta_payload(old: GSDContext, new: GSDContext, seq: int) -> dict[str, Any] | None:
+    """Payload carrying only the fields that differ, or None if none do."""
+    changed = {field: getattr(new, attr) for attr, field in EVENT_FIELDS.items()
+               if getattr(old, attr) != getattr(new, attr)}
+    if not changed:
+        return None
+    return {'full': False, 'seq': seq, 'changed': list(changed), **changed}
+
+
+class StatusPublisher:
+    """Sends throttled GSD status deltas for one watcher through `send`."""
+
+    def __init__(self, watcher: Any, send: Sender, throttle: float | None = None) -> None:
+        self.watcher = watcher
+        self.send = send
+        self.throttle = throttle if throttle is not None else gsd_runtime.env_number(
+            'GSD_STATUS_THROTTLE', DEFAULT_THROTTLE, allow_zero=True)
+        self._sent: GSDContext | None = None
+        self._last_send = 0.0
+        self._seq = 0
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+        watcher.subscribe(self._on_change)
+
+    def close(self) -> None:
+        self.watcher.unsubscribe(self._on_change)
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def snapshot(self) -> dict[str, Any]:
+        """Send (and return) a full snapshot; later deltas are relative to it."""
+        with self._lock:
+            context = self.watcher.snapshot
+            payload = full_payload(context, self._seq + 1)
+            if self.send(payload):
+                self._seq += 1
+                self._sent = context
+                self._last_send = time.monotonic()
+            return payload
+
+    def flush(self) -> None:
+        """Send pending changes now, regardless of the throttle window."""
+        with self._lock:
+            self._timer = None
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self._sent is None:
+            # Nobody asked for a baseline yet; deltas would be meaningless
+            return
+        payload = delta_payload(self._sent, self.watcher.snapshot, self._seq + 1)
+        if payload is None:
+            return
+        if self.send(payload):
+            self._seq += 1
+            self._sent = self.watcher.snapshot
+            self._last_send = time.monotonic()
+
+    def _on_change(self, _context: GSDContext) -> None:
+        with self._lock:
+            if self._timer is not None:
+                return
+            wait = self._last_send + self.throttle - time.monotonic()
+            if wait <= 0:
+                self._flush_locked()
+                return
+            self._timer = threading.Timer(wait, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+
+class WireChannel:
+    """Thread-safe bridge from publisher threads onto the soul's wire.
+
+    kimi_cli only has a wire while a turn is running, bound through a context
+    variable on the soul's event loop. `bind()` is called from soul code to
+    capture that loop and context; `send()` then schedules `wire_send` on it.
+    Without a live binding `send()` returns False and the publisher keeps the
+    changes pending until the next successful send.
+    """
+
+    def __init__(self, event_factory: Callable[..., Any]) -> None:
+        self.event_factory = event_factory
+        self._wire: Any = None
+        self._binding: tuple[Any, contextvars.Context] | None = None
+        self._get_wire: Callable[[], Any] | None = None
+
+    def bind(self) -> bool:
+        """Capture the running loop and wire context; True if the wire is new."""
+        try:
+            # Called on every status read: resolve the accessor only once
+            get_wire = self._get_wire
+            if get_wire is None:
+                from kimi_cli.soul import get_wire_or_none
+                get_wire = self._get_wire = get_wire_or_none
+
+            wire = get_wire()
+            if wire is None or wire is self._wire:
+                return False
+            import asyncio
+
+            self._binding = (asyncio.get_running_loop(), contextvars.copy_context())
+            self._wire = wire
+            return True
+        except Exception:
+            return False
+
+    def send(self, payload: dict[str, Any]) -> bool:
+        binding = self._binding
+        if binding is None:
+            return False
+        loop, context = binding
+        if loop.is_closed():
+            self._binding = None
+            return False
+        event = self.event_factory(**payload)
+        try:
+            loop.call_soon_threadsafe(_wire_send, event, context=context)
+        except RuntimeError:
+            self._binding = None
+            return False
+        return True
+
+
+def _wire_send(event: Any) -> None:
+    try:
+        from kimi_cli.soul import wire_send
+
+        wire_send(event)
+    except Exception:
+        pass
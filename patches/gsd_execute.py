@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+GSD Execute v1.0
+Dependency-driven phase execution for `jim execute-phase`.
+
+The pending plans of a phase (read from the gsd_index database) form a DAG:
+a plan waits for the plans named in its ``depends_on`` frontmatter, or, when
+it declares none, for every plan of the nearest lower wave. Each plan runs
+in its own headless kimi process with the gsd-executor agent. At most
+``--jobs`` workers run at once, and a plan starts as soon as its own inputs
+have finished, without waiting at wave barriers. A plan is complete when its
+worker exits cleanly and its SUMMARY.md exists. Plans depending on a failed
+plan are skipped.
+
+Plans with ``autonomous: false`` contain checkpoints that need a human, so
+they are not run headless; they and their dependents are left for the
+interactive /skill:gsd-execute-phase.
+
+Worker output goes to one log per plan in ~/.kimi/gsd-runs/<phase>-<time>/;
+the terminal gets a progress line per start and finish (and every output
+line, prefixed with the plan id, with --verbose).
+
+Environment:
+    GSD_EXECUTE_JOBS     default worker limit (default: min(4, CPUs))
+    GSD_EXECUTOR_AGENT   agent file for workers
+                         (default: the installed gsd-executor/agent.yaml)
+
+Usage:
+    jim execute-phase PHASE [--jobs N] [--gaps-only] [--dry-run] [--verbose]
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import signal
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+import gsd_index
+import gsd_runtime
+
+EXECUTE_VERSION = "1.0.0"
+
+RUNS_DIR = os.path.join(os.path.expanduser('~'), '.kimi', 'gsd-runs')
+EXECUTOR_AGENT = os.path.join('gsd-agents', 'gsd-executor', 'agent.yaml')
+# Same candidates, in the same order, as scripts/install.js
+SKILL_DIRS = (
+    os.path.join(os.path.expanduser('~'), '.config', 'agents', 'skills'),
+    os.path.join(os.path.expanduser('~'), '.agents', 'skills'),
+    os.path.join(os.path.expanduser('~'), '.kimi', 'skills'),
+)
+# kimi arguments for a non-interactive run; the prompt follows --command
+WORKER_ARGS = ['--print']
+# How long workers get to exit after SIGTERM on Ctrl-C
+TERMINATE_TIMEOUT = 10.0
+
+EXECUTOR_PROMPT = """\
+Execute this GSD plan atomically.
+
+## Plan Location
+{plan_path}
+
+## Your Task
+1. Read the PLAN.md file above and .planning/STATE.md for context
+2. Execute ALL tasks in order
+3. Create {summary_path}
+4. Commit each task individually with format: "type({plan_id}): description"
+
+## Deviation Rules (apply automatically)
+- Rule 1: Auto-fix bugs (wrong behavior, errors, security issues)
+- Rule 2: Auto-add missing critical functionality (validation, auth, error handling)
+- Rule 3: Auto-fix blocking issues (missing deps, broken imports, config errors)
+- Rule 4: STOP for architectural changes (new DB tables, framework switches)
+  and explain why in your final message without creating the SUMMARY.md
+
+## Commit Rules
+- Stage files individually (never git add .)
+- Commit after each task completes
+- Types: feat, fix, test, refactor, perf, docs, style, chore
+
+Other plans of this phase run in parallel in the same repository; only touch
+the files this plan is about.
+"""
+
+BuildCommand = Callable[[list[str]], list[str]]
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+MANUAL = 'manual'
+
+
+# =============================================================================
+# PLAN GRAPH
+# =============================================================================
+
+@dataclass
+class PlanNode:
+    plan_id: str
+    path: str
+    wave: int
+    autonomous: bool
+    depends_on: set[str] = field(default_factory=set)
+    dependents: set[str] = field(default_factory=set)
+    state: str = PENDING
+    reason: str = ''
+
+
+def _plan_number(plan_id: str) -> int | None:
+    """The trailing plan number of an id such as "04-02" or "2"."""
+    tail = plan_id.rpartition('-')[2]
+    return int(tail) if tail.isdigit() else None
+
+
+def resolve_dependency(ref: str, phase_ids: set[str], all_ids: set[str]) -> str | None:
+    """Map a depends_on entry to a plan id, or None when it names no plan.
+
+    Entries may be full ids ("04-01"), file names ("04-01-PLAN.md") or a plan
+    number within the phase ("01", 1).
+    """
+    ref = os.path.basename(str(ref).strip())
+    for suffix in (gsd_index.PLAN_SUFFIX, gsd_index.SUMMARY_SUFFIX, '.md'):
+        if ref.endswith(suffix):
+            ref = ref[:-len(suffix)]
+            break
+    if ref in phase_ids or ref in all_ids:
+        return ref
+    number = _plan_number(ref) if '-' not in ref else None
+    if number is not None:
+        for plan_id in sorted(phase_ids):
+            if _plan_number(plan_id) == number:
+                return plan_id
+    return None
+
+
+def build_graph(plans: list[dict], all_plans: dict[str, bool]) -> tuple[dict[str, PlanNode], list[str]]:
+    """The DAG of a phase's pending plans and any problems found.
+
+    all_plans maps every indexed plan id to whether it is complete.
+    Completed plans are left out; dependencies on them are already met.
+    """
+    nodes = {plan['plan_id']: PlanNode(plan['plan_id'], plan['path'], plan['wave'],
+                                       plan['autonomous'])
+             for plan in plans if not plan['done']}
+    phase_ids = {plan['plan_id'] for plan in plans}
+    problems = []
+
+    for plan in plans:
+        node = nodes.get(plan['plan_id'])
+        if node is None:
+            continue
+        if plan['depends_on']:
+            for ref in plan['depends_on']:
+                target = resolve_dependency(ref, phase_ids, set(all_plans))
+                if target in nodes:
+                    if target != node.plan_id:
+                        node.depends_on.add(target)
+                elif not all_plans.get(target, False):
+                    node.state, node.reason = SKIPPED, f"depends on {ref}, which is not complete"
+                    problems.append(f"{node.plan_id}: {node.reason}")
+        else:
+            # No declared inputs: wait for the nearest lower wave
+            lower = [other.wave for other in nodes.values() if other.wave < node.wave]
+            if lower:
+                wave = max(lower)
+                node.depends_on.update(other.plan_id for other in nodes.values()
+                                       if other.wave == wave)
+
+    for node in nodes.values():
+        for dep in node.depends_on:
+            nodes[dep].dependents.add(node.plan_id)
+
+    # Kahn's algorithm: whatever cannot be ordered is part of a cycle
+    indegree = {plan_id: len(node.depends_on) for plan_id, node in nodes.items()}
+    ready = [plan_id for plan_id, n in indegree.items() if n == 0]
+    while ready:
+        for dependent in nodes[ready.pop()].dependents:
+            indegree[dependent] -= 1
+            if indegree[dependent] == 0:
+                ready.append(dependent)
+    cyclic = sorted(plan_id for plan_id, n in indegree.items() if n)
+    if cyclic:
+        problems.append(f"dependency cycle between {', '.join(cyclic)}")
+    return nodes, problems
+
+
+# =============================================================================
+# SCHEDULER
+# =============================================================================
+
+def find_executor_agent() -> str | None:
+    configured = os.environ.get('GSD_EXECUTOR_AGENT')
+    if configured:
+        return os.path.expanduser(configured)
+    for directory in SKILL_DIRS:
+        path = os.path.join(directory, EXECUTOR_AGENT)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def default_jobs() -> int:
+    try:
+        return max(1, int(os.environ['GSD_EXECUTE_JOBS']))
+    except (KeyError, ValueError):
+        return min(4, os.cpu_count() or 1)
+
+
+def _elapsed(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}m{seconds:02d}s" if minutes else f"{seconds}s"
+
+
+class PhaseRun:
+    """Runs the plan DAG of one phase with at most `jobs` kimi workers."""
+
+    def __init__(self, root: str, phase_dir: str, nodes: dict[str, PlanNode],
+                 build_command: BuildCommand, agent_file: str, jobs: int,
+                 verbose: bool = False) -> None:
+        self.root = root
+        self.planning_dir = os.path.join(root, gsd_runtime.PLANNING_DIR)
+        self.phase_dir = phase_dir
+        self.nodes = nodes
+        self.build_command = build_command
+        self.agent_file = agent_file
+        self.jobs = jobs
+        self.verbose = verbose
+        self.log_dir = os.path.join(
+            RUNS_DIR, f"{os.path.basename(phase_dir)}-{time.strftime('%Y%m%d-%H%M%S')}")
+        self._events: queue.Queue[tuple[str, int]] = queue.Queue()
+        self._workers: dict[str, subprocess.Popen[bytes]] = {}
+        self._started: dict[str, float] = {}
+        self._print_lock = threading.Lock()
+
+    def _say(self, line: str) -> None:
+        with self._print_lock:
+            print(line, flush=True)
+
+    def command(self, node: PlanNode) -> list[str]:
+        summary = node.path[:-len(gsd_index.PLAN_SUFFIX)] + gsd_index.SUMMARY_SUFFIX
+        prompt = EXECUTOR_PROMPT.format(
+            plan_path=os.path.join(gsd_runtime.PLANNING_DIR, node.path),
+            summary_path=os.path.join(gsd_runtime.PLANNING_DIR, summary),
+            plan_id=node.plan_id)
+        return self.build_command(['--agent-file', self.agent_file, *WORKER_ARGS,
+                                   '--command', prompt])
+
+    def _ready(self) -> list[PlanNode]:
+        return sorted((node for node in self.nodes.values()
+                       if node.state == PENDING
+                       and all(self.nodes[dep].state == DONE for dep in node.depends_on)),
+                      key=lambda node: (node.wave, node.plan_id))
+
+    def _start(self, node: PlanNode) -> None:
+        log_path = os.path.join(self.log_dir, f"{node.plan_id}.log")
+        log = open(log_path, 'wb')
+        try:
+            # Own session: Ctrl-C reaches jim, which then stops every worker
+            worker = subprocess.Popen(self.command(node), cwd=self.root, stdin=subprocess.DEVNULL,
+                                      stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                      start_new_session=True)
+        except OSError as e:
+            log.close()
+            node.state, node.reason = FAILED, f"could not start kimi: {e}"
+            self._say(f"✗ {node.plan_id}  {node.reason}")
+            self._events.put((node.plan_id, -1))
+            return
+        node.state = RUNNING
+        self._workers[node.plan_id] = worker
+        self._started[node.plan_id] = time.monotonic()
+        self._say(f"▶ {node.plan_id}  started (wave {node.wave}, "
+                  f"{len(self._workers)}/{self.jobs} workers)  log: {log_path}")
+        threading.Thread(target=self._pump, args=(node.plan_id, worker, log),
+                         name=f"gsd-execute:{node.plan_id}", daemon=True).start()
+
+    def _pump(self, plan_id: str, worker: subprocess.Popen[bytes], log) -> None:
+        """Copy a worker's output to its log (and the terminal) until it exits."""
+        with log, worker.stdout:
+            for line in worker.stdout:
+                log.write(line)
+                if self.verbose:
+                    self._say(f"[{plan_id}] {line.decode(errors='replace').rstrip()}")
+        self._events.put((plan_id, worker.wait()))
+
+    def _finish(self, plan_id: str, returncode: int) -> None:
+        node = self.nodes[plan_id]
+        if self._workers.pop(plan_id, None) is None:
+            return  # failed to start; already reported
+        took = _elapsed(time.monotonic() - self._started[plan_id])
+        summary = os.path.join(self.planning_dir, node.path[:-len(gsd_index.PLAN_SUFFIX)]
+                               + gsd_index.SUMMARY_SUFFIX)
+        if returncode == 0 and os.path.exists(summary):
+            node.state = DONE
+            self._say(f"✓ {plan_id}  done in {took}")
+            return
+        node.state = FAILED
+        node.reason = (f"kimi exited with {returncode}" if returncode
+                       else "no SUMMARY.md was written")
+        self._say(f"✗ {plan_id}  failed after {took}: {node.reason}")
+
+    def _skip_blocked(self) -> None:
+        """Mark plans that can no longer run because an input did not finish."""
+        changed = True
+        while changed:
+            changed = False
+            for node in self.nodes.values():
+                if node.state != PENDING:
+                    continue
+                blocked = [dep for dep in node.depends_on
+                           if self.nodes[dep].state in (FAILED, SKIPPED, MANUAL)]
+                if blocked:
+                    node.state, node.reason = SKIPPED, f"{', '.join(sorted(blocked))} did not complete"
+                    self._say(f"- {node.plan_id}  skipped: {node.reason}")
+                    changed = True
+
+    def run(self) -> int:
+        os.makedirs(self.log_dir, exist_ok=True)
+        for node in self.nodes.values():
+            if node.state == PENDING and not node.autonomous:
+                node.state, node.reason = MANUAL, "has checkpoints (autonomous: false)"
+                self._say(f"- {node.plan_id}  left for /skill:gsd-execute-phase: {node.reason}")
+        try:
+            while True:
+                self._skip_blocked()
+                for node in self._ready()[:self.jobs - len(self._workers)]:
+                    self._start(node)
+                if not self._workers and self._events.empty():
+                    break
+                self._finish(*self._events.get())
+        except KeyboardInterrupt:
+            self._say("\n⏹️  Interrupted, stopping workers...")
+            self.terminate()
+            return 130
+        return 0 if all(node.state == DONE for node in self.nodes.values()) else 1
+
+    def terminate(self) -> None:
+        for plan_id, worker in self._workers.items():
+            self.nodes[plan_id].state, self.nodes[plan_id].reason = FAILED, "interrupted"
+            try:
+                os.killpg(worker.pid, signal.SIGTERM)
+            except OSError:
+                pass
+        deadline = time.monotonic() + TERMINATE_TIMEOUT
+        for worker in self._workers.values():
+            try:
+                worker.wait(max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                try:
+                    os.killpg(worker.pid, signal.SIGKILL)
+                except OSError:
+                    pass
+
+    def report(self) -> str:
+        counts: dict[str, int] = {}
+        for node in self.nodes.values():
+            counts[node.state] = counts.get(node.state, 0) + 1
+        parts = [f"{n} {state}" for state, n in sorted(counts.items())]
+        return f"📋 {os.path.basename(self.phase_dir)}: {', '.join(parts) or 'nothing to run'}"
+
+
+def format_schedule(nodes: dict[str, PlanNode]) -> str:
+    lines = []
+    for node in sorted(nodes.values(), key=lambda node: (node.wave, node.plan_id)):
+        after = f" after {', '.join(sorted(node.depends_on))}" if node.depends_on else ""
+        note = f"  ({node.reason})" if node.reason else ""
+        manual = "" if node.autonomous else "  [checkpoints]"
+        lines.append(f"   wave {node.wave}  {node.plan_id}{after}{manual}{note}")
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def _default_build_command(args: list[str]) -> list[str]:
+    return ['kimi', *args]
+
+
+def main(argv: list[str] | None = None, build_command: BuildCommand | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='jim execute-phase',
+                                     description='Run the pending plans of a phase with kimi workers.')
+    parser.add_argument('phase', help='phase number ("4", "02.1") or directory name')
+    parser.add_argument('-j', '--jobs', type=int, default=default_jobs(),
+                        help='maximum concurrent kimi workers (default: %(default)s)')
+    parser.add_argument('--gaps-only', action='store_true', help='only plans with gap_closure: true')
+    parser.add_argument('--dry-run', action='store_true', help='print the schedule and exit')
+    parser.add_argument('-v', '--verbose', action='store_true', help='stream worker output')
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    index = gsd_index.open_index()
+    if index is None:
+        print("No .planning directory found. Run /skill:gsd-new-project first.")
+        return 1
+    with index:
+        phase_dir = index.find_phase(args.phase)
+        if phase_dir is None:
+            print(f"ERROR: Phase {args.phase} not found in .planning/{gsd_index.PHASES_DIR}/")
+            return 1
+        plans = index.plans(args.phase, gaps_only=args.gaps_only)
+        all_plans = {plan['plan_id']: plan['done'] for plan in index.plans()}
+    root = os.path.dirname(os.path.dirname(index.path))
+
+    nodes, problems = build_graph(plans, all_plans)
+    if not nodes:
+        print(f"✅ {phase_dir}: no pending plans")
+        return 0
+    print(f"🚀 {phase_dir}: {len(nodes)} pending plan(s), up to {max(1, args.jobs)} worker(s)")
+    print(format_schedule(nodes), end='')
+    for problem in problems:
+        print(f"⚠️  {problem}")
+    if any(problem.startswith('dependency cycle') for problem in problems):
+        return 2
+    if args.dry_run or os.environ.get('JIM_DRY_RUN'):
+        return 0
+
+    agent_file = find_executor_agent()
+    if agent_file is None:
+        print("❌ gsd-executor agent not found; run the GSD installer or set GSD_EXECUTOR_AGENT")
+        return 1
+    run = PhaseRun(root, phase_dir, nodes, build_command or _default_build_command,
+                   agent_file, max(1, args.jobs), args.verbose)
+    started = time.monotonic()
+    returncode = run.run()
+    print(f"{run.report()} in {_elapsed(time.monotonic() - started)}")
+    return returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,461 @@
+"""
+GSD Git v1.0
+Subprocess-free git branch and dirty state for the GSD status bar.
+
+Reads the repository files directly instead of running ``git``:
+
+- ``HEAD`` for the branch (or the detached commit), resolved through the
+  loose ref or ``packed-refs``; worktrees and ``gitdir:`` files are followed
+- the index (``.git/index``, versions 2-4) for the tracked paths and the
+  stat data git recorded for them
+
+A GitWatcher thread re-reads those files only when their stat signature
+changes, and compares the worktree against the index with ``lstat`` calls,
+at most GSD_GIT_MAX_FILES per pass. Larger repositories are covered over
+several passes, continuing where the last one stopped. The result is
+published as an immutable GitStatus on ``watcher.snapshot``, so the
+toolbar reads it with one attribute load.
+
+"Dirty" is git's stat check: a tracked file whose size, mtime, type or
+executable bit differs from the index, a deleted tracked file, or an
+unmerged entry. Untracked files and staged-only changes are not detected.
+A file that was touched without being changed counts as dirty until the
+next ``git status`` refreshes the index, as in other stat-only prompts.
+
+Environment:
+    GSD_GIT             0 to disable the git segment
+    GSD_GIT_INTERVAL    seconds between worktree passes (default 2.0)
+    GSD_GIT_MAX_FILES   lstat calls per pass (default 5000)
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import struct
+import threading
+from dataclasses import dataclass
+from typing import Callable
+
+import gsd_runtime
+import gsd_stats
+from gsd_runtime import FileKey
+
+GIT_VERSION = "1.0.0"
+
+DEFAULT_INTERVAL = 2.0
+DEFAULT_MAX_FILES = 5000
+
+INDEX_SIGNATURE = b'DIRC'
+INDEX_HEADER = struct.Struct('>4sII')
+# ctime s/ns, mtime s/ns, dev, ino, mode, uid, gid, size
+ENTRY_STAT = struct.Struct('>10I')
+ENTRY_FLAGS = struct.Struct('>H')
+
+FLAG_ASSUME_VALID = 0x8000
+FLAG_EXTENDED = 0x4000
+FLAG_STAGE_MASK = 0x3000
+FLAG_NAME_MASK = 0x0fff
+EXT_SKIP_WORKTREE = 0x4000
+
+S_IFMT = 0o170000
+S_IFGITLINK = 0o160000
+S_IFDIR = 0o040000
+S_IFLNK = 0o120000
+
+OBJECT_FORMAT_PATTERN = re.compile(rb'^\s*objectformat\s*=\s*sha256\s*$',
+                                   re.IGNORECASE | re.MULTILINE)
+
+Listener = Callable[['GitStatus'], None]
+
+
+@dataclass(frozen=True, slots=True)
+class GitStatus:
+    """Immutable branch/dirty snapshot of one worktree."""
+    root: str | None = None
+    branch: str | None = None      # None when HEAD is detached
+    commit: str | None = None      # None on an unborn branch
+    dirty: bool | None = None      # None until a full pass has finished
+
+    @property
+    def label(self) -> str | None:
+        """Branch name, or @<short commit> when detached."""
+        if self.root is None:
+            return None
+        if self.branch is not None:
+            return self.branch
+        return f"@{self.commit[:7]}" if self.commit else None
+
+
+EMPTY_STATUS = GitStatus()
+
+
+# =============================================================================
+# REPOSITORY FILES
+# =============================================================================
+
+def find_repository(work_dir: str) -> tuple[str, str, str] | None:
+    """(worktree root, git dir, common dir) of the repository holding work_dir."""
+    current = os.path.abspath(work_dir)
+    while True:
+        dot_git = os.path.join(current, '.git')
+        if os.path.isdir(dot_git):
+            git_dir = dot_git
+            break
+        if os.path.isfile(dot_git):
+            # Linked worktree or submodule: "gitdir: <path>"
+            try:
+                with open(dot_git, encoding='utf-8') as f:
+                    line = f.readline().strip()
+            except OSError:
+                return None
+            if not line.startswith('gitdir:'):
+                return None
+            git_dir = os.path.normpath(os.path.join(current, line[len('gitdir:'):].strip()))
+            break
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+    common_dir = git_dir
+    try:
+        with open(os.path.join(git_dir, 'commondir'), encoding='utf-8') as f:
+            common_dir = os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    except OSError:
+        pass
+    return current, git_dir, common_dir
+
+
+def read_head(git_dir: str) -> tuple[str | None, str | None]:
+    """(ref, commit) from HEAD: ('refs/heads/x', None) or (None, sha)."""
+    try:
+        with open(os.path.join(git_dir, 'HEAD'), encoding='utf-8') as f:
+            head = f.read().strip()
+    except OSError:
+        return None, None
+    if head.startswith('ref:'):
+        return head[len('ref:'):].strip(), None
+    return None, head or None
+
+
+def parse_packed_refs(data: bytes) -> dict[str, str]:
+    """ref name -> object id from the contents of a packed-refs file."""
+    refs = {}
+    for line in data.splitlines():
+        # Skip the header comment and peeled tag lines ("^<oid>")
+        if not line or line[:1] in (b'#', b'^'):
+            continue
+        oid, _, name = line.partition(b' ')
+        refs[name.decode('utf-8', 'replace')] = oid.decode('ascii', 'replace')
+    return refs
+
+
+def uses_sha256(common_dir: str) -> bool:
+    """True for repositories with extensions.objectFormat = sha256."""
+    try:
+        with open(os.path.join(common_dir, 'config'), 'rb') as f:
+            return OBJECT_FORMAT_PATTERN.search(f.read()) is not None
+    except OSError:
+        return False
+
+
+# =============================================================================
+# INDEX
+# =============================================================================
+
+# (path, mtime_s, mtime_ns, size, mode) of one tracked, checked-out file;
+# mode None marks an unmerged path
+IndexEntry = tuple[bytes, int, int, int, 'int | None']
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    """git's offset varint (index v4 path prefix lengths)."""
+    byte = data[pos]
+    pos += 1
+    value = byte & 0x7f
+    while byte & 0x80:
+        byte = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (byte & 0x7f)
+    return value, pos
+
+
+def parse_index(data: bytes, hash_size: int = 20) -> list[IndexEntry] | None:
+    """Entries worth an lstat from an index file, or None if unsupported.
+
+    Skips gitlinks, sparse directory entries and assume-valid or
+    skip-worktree paths. A split index ("link" extension) is unsupported
+    because its entries only make sense together with the shared index.
+    """
+    if len(data) < INDEX_HEADER.size:
+        return None
+    signature, version, count = INDEX_HEADER.unpack_from(data)
+    if signature != INDEX_SIGNATURE or version not in (2, 3, 4):
+        return None
+    entries: list[IndexEntry] = []
+    pos = INDEX_HEADER.size
+    previous = b''
+    for _ in range(count):
+        start = pos
+        (_, _, mtime_s, mtime_ns, _, _, mode, _, _, size) = ENTRY_STAT.unpack_from(data, pos)
+        pos += ENTRY_STAT.size + hash_size
+        (flags,) = ENTRY_FLAGS.unpack_from(data, pos)
+        pos += ENTRY_FLAGS.size
+        extended = 0
+        if flags & FLAG_EXTENDED and version >= 3:
+            (extended,) = ENTRY_FLAGS.unpack_from(data, pos)
+            pos += ENTRY_FLAGS.size
+        if version == 4:
+            strip, pos = _read_varint(data, pos)
+            end = data.index(b'\0', pos)
+            path = previous[:len(previous) - strip] + data[pos:end]
+            pos = end + 1
+        else:
+            length = flags & FLAG_NAME_MASK
+            end = pos + length if length < FLAG_NAME_MASK else data.index(b'\0', pos)
+            path = data[pos:end]
+            # NUL-padded to a multiple of 8 bytes, at least one NUL
+            pos = start + ((end - start) // 8 + 1) * 8
+        previous = path
+
+        if flags & FLAG_STAGE_MASK:
+            entries.append((path, 0, 0, 0, None))
+        elif flags & FLAG_ASSUME_VALID or extended & EXT_SKIP_WORKTREE:
+            continue
+        elif mode & S_IFMT in (S_IFGITLINK, S_IFDIR):
+            continue
+        else:
+            entries.append((path, mtime_s, mtime_ns, size, mode))
+
+    # Extensions: 4-byte signature and 4-byte length, up to the trailing hash
+    while pos + 8 <= len(data) - hash_size:
+        signature, length = struct.unpack_from('>4sI', data, pos)
+        if signature == b'link':
+            return None
+        pos += 8 + length
+    return entries
+
+
+def entry_changed(root: bytes, entry: IndexEntry) -> bool:
+    """git's stat check of one index entry against the worktree."""
+    path, mtime_s, mtime_ns, size, mode = entry
+    if mode is None:
+        return True
+    try:
+        st = os.lstat(os.path.join(root, path))
+    except OSError:
+        return True
+    if (st.st_size & 0xffffffff) != size or (int(st.st_mtime) & 0xffffffff) != mtime_s:
+        return True
+    # core.checkStat=minimal and some filesystems record whole seconds only
+    if mtime_ns and st.st_mtime_ns % 1_000_000_000 != mtime_ns:
+        return True
+    if (st.st_mode & S_IFMT) != (mode & S_IFMT):
+        return True
+    # Regular files are recorded as 100644 or 100755; symlinks carry no bits
+    return (mode & S_IFMT) != S_IFLNK and bool((st.st_mode ^ mode) & 0o100)
+
+
+# =============================================================================
+# WATCHER
+# =============================================================================
+
+class GitWatcher:
+    """Keeps an up-to-date GitStatus for one work dir on a background thread."""
+
+    def __init__(self, work_dir: str, interval: float | None = None,
+                 max_files: int | None = None) -> None:
+        self.work_dir = work_dir
+        self.snapshot: GitStatus = EMPTY_STATUS
+        self.interval = interval or gsd_runtime.env_number('GSD_GIT_INTERVAL', DEFAULT_INTERVAL)
+        self.max_files = max_files or gsd_runtime.env_number('GSD_GIT_MAX_FILES', DEFAULT_MAX_FILES, int)
+        self._listeners: list[Listener] = []
+        self._stats = gsd_stats.collector()
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._thread: threading.Thread | None = None
+        # Parsed repository files, each reused while its stat signature holds
+        self._repo: tuple[str, str, str] | None = None
+        self._keys: dict[str, FileKey | None] = {}
+        self._ref: str | None = None
+        self._commit: str | None = None
+        self._loose: str | None = None
+        self._packed: dict[str, str] = {}
+        self._entries: list[IndexEntry] | None = None
+        # Budgeted scan: next entry to check and clean entries seen in a row
+        self._cursor = 0
+        self._clean_run = 0
+
+    # -- public --------------------------------------------------------------
+
+    def start(self) -> GitWatcher:
+        """Start the background thread (idempotent)."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name=f"gsd-git:{self.work_dir}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def wait_ready(self, timeout: float | None = None) -> bool:
+        """Block until the first snapshot has been published."""
+        return self._ready.wait(timeout)
+
+    def subscribe(self, listener: Listener) -> None:
+        """Call listener(status) from the watcher thread on every change."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Listener) -> None:
+        try:
+            self._listeners.remove(listener)
+        except ValueError:
+            pass
+
+    def refresh(self) -> GitStatus:
+        """Re-read what changed, run one budgeted pass and publish the result."""
+        if self._stats is not None:
+            self._stats.incr('git.refresh')
+        repo = find_repository(self.work_dir)
+        if repo != self._repo:
+            self._repo = repo
+            self._keys.clear()
+            self._entries = None
+            self._reset_scan()
+        if repo is None:
+            return self._publish(EMPTY_STATUS)
+        root, git_dir, common_dir = repo
+        branch, commit = self._head(git_dir, common_dir)
+        dirty = self._scan(root, git_dir, common_dir)
+        return self._publish(GitStatus(root, branch, commit, dirty))
+
+    # -- repository ----------------------------------------------------------
+
+    def _changed(self, path: str) -> bool:
+        """True (and remembered) when path's stat signature moved."""
+        key = gsd_runtime.file_key(path)
+        if path in self._keys and self._keys[path] == key:
+            return False
+        self._keys[path] = key
+        return True
+
+    def _head(self, git_dir: str, common_dir: str) -> tuple[str | None, str | None]:
+        head = os.path.join(git_dir, 'HEAD')
+        if self._changed(head):
+            self._ref, self._commit = read_head(git_dir)
+        ref = self._ref
+        if ref is None:
+            return None, self._commit
+        branch = ref[len('refs/heads/'):] if ref.startswith('refs/heads/') else ref
+        loose = os.path.join(common_dir, ref)
+        if self._changed(loose):
+            try:
+                with open(loose, encoding='utf-8') as f:
+                    self._loose = f.read().strip() or None
+            except OSError:
+                self._loose = None
+        if self._loose is not None:
+            return branch, self._loose
+        packed = os.path.join(common_dir, 'packed-refs')
+        if self._changed(packed):
+            try:
+                with open(packed, 'rb') as f:
+                    self._packed = parse_packed_refs(f.read())
+            except OSError:
+                self._packed = {}
+        return branch, self._packed.get(ref)
+
+    def _index(self, git_dir: str, common_dir: str) -> list[IndexEntry] | None:
+        index = os.path.join(git_dir, 'index')
+        if self._changed(index):
+            if self._stats is not None:
+                self._stats.incr('git.index_parse')
+            try:
+                with open(index, 'rb') as f:
+                    data = f.read()
+                self._entries = parse_index(data, 32 if uses_sha256(common_dir) else 20)
+            except (OSError, ValueError, IndexError, struct.error):
+                self._entries = None
+            self._reset_scan()
+        return self._entries
+
+    def _reset_scan(self) -> None:
+        self._cursor = 0
+        self._clean_run = 0
+
+    def _scan(self, root: str, git_dir: str, common_dir: str) -> bool | None:
+        """One pass of at most max_files lstat calls.
+
+        Dirty as soon as one entry differs (that entry is checked first next
+        time); clean only after every entry was seen clean in a row.
+        """
+        entries = self._index(git_dir, common_dir)
+        if entries is None:
+            return None
+        if not entries:
+            return False
+        root_bytes = os.fsencode(root)
+        dirty = self.snapshot.dirty if self.snapshot.root == root else None
+        total = len(entries)
+        for _ in range(min(self.max_files, total)):
+            if entry_changed(root_bytes, entries[self._cursor]):
+                self._clean_run = 0
+                return True
+            self._clean_run += 1
+            self._cursor = (self._cursor + 1) % total
+            if self._clean_run >= total:
+                self._clean_run = 0
+                return False
+        return dirty
+
+    # -- thread --------------------------------------------------------------
+
+    def _publish(self, status: GitStatus) -> GitStatus:
+        """Make status the snapshot and notify listeners if it changed."""
+        if status != self.snapshot:
+            if self._stats is not None:
+                self._stats.incr('git.publish')
+            self.snapshot = status
+            for listener in list(self._listeners):
+                try:
+                    listener(status)
+                except Exception:
+                    pass
+        self._ready.set()
+        return self.snapshot
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                self._ready.set()
+            if self._stop.wait(self.interval):
+                return
+
+
+_watchers: dict[str, GitWatcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def get_watcher(work_dir: str | os.PathLike[str] | None = None) -> GitWatcher | None:
+    """Return the started watcher for a work dir, or None with GSD_GIT=0."""
+    if os.environ.get('GSD_GIT', '') == '0':
+        return None
+    key = os.fspath(work_dir) if work_dir is not None else os.getcwd()
+    watcher = _watchers.get(key)
+    if watcher is None:
+        with _watchers_lock:
+            watcher = _watchers.get(key)
+            if watcher is None:
+                watcher = _watchers[key] = GitWatcher(key).start()
+    return watcher
+
+
+def stop_all() -> None:
+    """Stop every watcher started in this process."""
+    with _watchers_lock:
+        for watcher in _watchers.values():
+            watcher.stop()
+        _watchers.clear()
@@ -0,0 +1,610 @@
+#!/usr/bin/env python3
+"""
+GSD Index v1.0
+Incrementally maintained SQLite index of a project's .planning tree.
+
+Skills that need plan metadata (wave, gap_closure, completion, must-haves)
+would otherwise grep every PLAN.md on each run. `jim index` parses the tree
+once into .planning/.gsd-index.sqlite and afterwards re-reads only files whose
+(mtime_ns, size) changed; a file that was touched but whose content hash is
+unchanged is not re-parsed either. Queries then run against SQLite.
+
+Indexed:
+- phases: every directory in .planning/phases/ (``NN-name``, ``NN.N-name``)
+- plans: ``*-PLAN.md`` frontmatter (wave, depends_on, autonomous,
+  gap_closure, ...), task and checkbox counts, and whether the matching
+  ``*-SUMMARY.md`` exists
+- must_haves: truths, artifacts and key_links from plan frontmatter
+- files: every Markdown file under .planning with its checkbox counts,
+  so ROADMAP.md progress comes from the same table
+
+The database is a cache: it can be deleted at any time, and it is rebuilt
+from scratch when INDEX_SCHEMA changes. Add ``.gsd-index.sqlite`` to the
+project's .gitignore.
+
+Usage:
+    jim index [--json]                       # update, then summarize phases
+    jim index pending PHASE [--gaps-only] [--json]
+    jim index plans [PHASE] [--json]
+    jim index sql "SELECT ..."               # JSON lines
+    jim index rebuild
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import gsd_runtime
+
+INDEX_VERSION = "1.0.0"
+# Bump whenever the tables or the parsed fields change
+INDEX_SCHEMA = 1
+
+INDEX_FILE = ".gsd-index.sqlite"
+PHASES_DIR = "phases"
+PLAN_SUFFIX = "-PLAN.md"
+SUMMARY_SUFFIX = "-SUMMARY.md"
+MUST_HAVE_KINDS = ("truths", "artifacts", "key_links")
+
+PHASE_DIR_PATTERN = re.compile(r'^(\d+(?:\.\d+)?)(?:-(.*))?$')
+TASK_PATTERN = re.compile(rb'^#{2,4}[ \t]+Task\b', re.MULTILINE)
+HEADING_PATTERN = re.compile(rb'^#[ \t]+(.+)$', re.MULTILINE)
+
+SCHEMA = """
+CREATE TABLE files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    checkbox_total INTEGER NOT NULL,
+    checkbox_done INTEGER NOT NULL
+);
+CREATE TABLE phases (
+    dir TEXT PRIMARY KEY,
+    number TEXT NOT NULL,
+    ordinal REAL NOT NULL,
+    name TEXT
+);
+CREATE TABLE plans (
+    path TEXT PRIMARY KEY,
+    phase_dir TEXT NOT NULL,
+    plan_id TEXT NOT NULL,
+    summary_path TEXT NOT NULL,
+    title TEXT,
+    type TEXT,
+    wave INTEGER NOT NULL,
+    depends_on TEXT NOT NULL,
+    files_modified TEXT NOT NULL,
+    autonomous INTEGER NOT NULL,
+    gap_closure INTEGER NOT NULL,
+    task_count INTEGER NOT NULL,
+    checkbox_total INTEGER NOT NULL,
+    checkbox_done INTEGER NOT NULL,
+    frontmatter TEXT NOT NULL
+);
+CREATE INDEX plans_phase ON plans (phase_dir, wave);
+CREATE TABLE must_haves (
+    plan_path TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    item TEXT NOT NULL
+);
+CREATE INDEX must_haves_plan ON must_haves (plan_path);
+CREATE VIEW plan_status AS
+    SELECT plans.*, phases.number AS phase, phases.ordinal AS phase_ordinal,
+           EXISTS (SELECT 1 FROM files WHERE files.path = plans.summary_path) AS done
+    FROM plans JOIN phases ON phases.dir = plans.phase_dir;
+"""
+
+
+# =============================================================================
+# FRONTMATTER
+# =============================================================================
+
+def _strip_comment(line: str) -> str:
+    """Drop a trailing `# comment` that is not inside quotes."""
+    quote = None
+    for i, char in enumerate(line):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '#' and (i == 0 or line[i - 1] in ' \t'):
+            return line[:i].rstrip()
+    return line.rstrip()
+
+
+def _split_flow(text: str) -> list[str]:
+    """Split the inside of a `[a, "b, c"]` flow list on top-level commas."""
+    items, current, quote, depth = [], [], None, 0
+    for char in text:
+        if quote:
+            quote = None if char == quote else quote
+        elif char in '"\'':
+            quote = char
+        elif char in '[{':
+            depth += 1
+        elif char in ']}':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            items.append(''.join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    if ''.join(current).strip():
+        items.append(''.join(current).strip())
+    return items
+
+
+def _scalar(value: str) -> Any:
+    """Convert one YAML scalar (or flow list) to a Python value."""
+    if value.startswith('[') and value.endswith(']'):
+        return [_scalar(item) for item in _split_flow(value[1:-1])]
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+        inner = value[1:-1]
+        return inner.replace('\\\\', '\\') if value[0] == '"' else inner.replace("''", "'")
+    lowered = value.lower()
+    if lowered in ('true', 'yes'):
+        return True
+    if lowered in ('false', 'no'):
+        return False
+    if lowered in ('null', '~', ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip(' '))
+
+
+def _next_line(lines: list[str], i: int) -> int:
+    while i < len(lines) and not lines[i].strip():
+        i += 1
+    return i
+
+
+def _parse_mapping(lines: list[str], i: int, indent: int) -> tuple[dict[str, Any], int]:
+    result: dict[str, Any] = {}
+    i = _next_line(lines, i)
+    while i < len(lines):
+        line = lines[i]
+        if _indent(line) < indent or line.lstrip().startswith('- ') or line.strip() == '-':
+            break
+        key, sep, value = line.strip().partition(':')
+        i += 1
+        if not sep:
+            i = _next_line(lines, i)
+            continue
+        key, value = key.strip().strip('"\''), value.strip()
+        if value:
+            result[key] = _scalar(value)
+            i = _next_line(lines, i)
+            continue
+        j = _next_line(lines, i)
+        if j < len(lines) and lines[j].lstrip().startswith('-') and _indent(lines[j]) >= indent:
+            result[key], i = _parse_list(lines, j, _indent(lines[j]))
+        elif j < len(lines) and _indent(lines[j]) > indent:
+            result[key], i = _parse_mapping(lines, j, _indent(lines[j]))
+        else:
+            result[key], i = None, j
+    return result, i
+
+
+def _parse_list(lines: list[str], i: int, indent: int) -> tuple[list[Any], int]:
+    items: list[Any] = []
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.lstrip()
+        if _indent(line) != indent or not (stripped.startswith('- ') or stripped == '-'):
+            break
+        item = stripped[1:].strip()
+        key, sep, _ = item.partition(':')
+        if sep and key and key[0] not in '"\'[{' and ' ' not in key.strip():
+            # A mapping item: its first key sits on the dash line
+            lines[i] = ' ' * (indent + 2) + item
+            mapping, i = _parse_mapping(lines, i, indent + 2)
+            items.append(mapping)
+        else:
+            items.append(_scalar(item))
+            i = _next_line(lines, i + 1)
+    return items, i
+
+
+def parse_frontmatter(text: str) -> dict[str, Any]:
+    """Parse the YAML frontmatter block at the top of a planning document.
+
+    Covers the subset GSD plans use (scalars, flow and block lists, nested
+    mappings, lists of mappings) without requiring PyYAML.
+    """
+    if not text.startswith('---'):
+        return {}
+    lines = text.split('\n')
+    try:
+        end = next(i for i in range(1, len(lines)) if lines[i].rstrip() == '---')
+    except StopIteration:
+        return {}
+    body = [_strip_comment(line.replace('\t', '    ')) for line in lines[1:end]]
+    return _parse_mapping(body, 0, 0)[0]
+
+
+# =============================================================================
+# PARSING
+# =============================================================================
+
+def _wave(value: Any) -> int:
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def _as_list(value: Any) -> list[Any]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def parse_plan(rel_path: str, data: bytes) -> tuple[dict[str, Any], list[tuple[str, int, str]]]:
+    """The plans row and must_haves rows for one PLAN.md."""
+    text = data.decode('utf-8', errors='replace')
+    front = parse_frontmatter(text)
+    phase_dir, name = os.path.split(rel_path)
+    plan_id = name[:-len(PLAN_SUFFIX)]
+    heading = HEADING_PATTERN.search(data)
+    total, done = gsd_runtime.count_checkboxes(data)
+    plan = {
+        'path': rel_path,
+        'phase_dir': phase_dir,
+        'plan_id': plan_id,
+        'summary_path': os.path.join(phase_dir, plan_id + SUMMARY_SUFFIX),
+        'title': heading.group(1).decode('utf-8', errors='replace').strip() if heading else None,
+        'type': front.get('type'),
+        'wave': _wave(front.get('wave')),
+        'depends_on': json.dumps([str(d) for d in _as_list(front.get('depends_on'))]),
+        'files_modified': json.dumps(_as_list(front.get('files_modified'))),
+        'autonomous': int(front.get('autonomous') is not False),
+        'gap_closure': int(front.get('gap_closure') is True),
+        'task_count': len(TASK_PATTERN.findall(data)),
+        'checkbox_total': total,
+        'checkbox_done': done,
+        'frontmatter': json.dumps(front, default=str),
+    }
+    must_haves = front.get('must_haves') or {}
+    rows = []
+    if isinstance(must_haves, dict):
+        for kind in MUST_HAVE_KINDS:
+            for position, item in enumerate(_as_list(must_haves.get(kind))):
+                rows.append((kind, position,
+                             item if isinstance(item, str) else json.dumps(item, default=str)))
+    return plan, rows
+
+
+def parse_phase_dir(name: str) -> tuple[str, float, str | None] | None:
+    """(number, ordinal, name) for a phase directory name, None otherwise."""
+    match = PHASE_DIR_PATTERN.match(name)
+    if not match:
+        return None
+    return match.group(1), float(match.group(1)), match.group(2)
+
+
+# =============================================================================
+# INDEX
+# =============================================================================
+
+@dataclass
+class UpdateResult:
+    scanned: int = 0
+    parsed: int = 0
+    rehashed: int = 0
+    removed: int = 0
+    elapsed_ms: float = 0.0
+
+
+class PlanningIndex:
+    """SQLite index of one .planning directory."""
+
+    def __init__(self, planning_dir: str, path: str | None = None) -> None:
+        self.planning_dir = planning_dir
+        self.path = path or os.path.join(planning_dir, INDEX_FILE)
+        self.db = sqlite3.connect(self.path)
+        self.db.row_factory = sqlite3.Row
+        if self.db.execute('PRAGMA user_version').fetchone()[0] != INDEX_SCHEMA:
+            self._create()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> PlanningIndex:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _create(self) -> None:
+        with self.db:
+            for (kind, name) in self.db.execute(
+                    "SELECT type, name FROM sqlite_master "
+                    "WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'").fetchall():
+                self.db.execute(f'DROP {kind.upper()} IF EXISTS "{name}"')
+            self.db.executescript(SCHEMA)
+            self.db.execute(f'PRAGMA user_version = {INDEX_SCHEMA}')
+
+    def rebuild(self) -> UpdateResult:
+        self._create()
+        return self.update()
+
+    # -- update --------------------------------------------------------------
+
+    def _scan(self) -> dict[str, os.stat_result]:
+        """Relative path -> stat for the Markdown files that are indexed."""
+        found: dict[str, os.stat_result] = {}
+        stack = [('', self.planning_dir)]
+        while stack:
+            rel_dir, directory = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                rel = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not entry.name.startswith('.'):
+                            stack.append((rel, entry.path))
+                    elif entry.name.endswith('.md'):
+                        found[rel] = entry.stat()
+                except OSError:
+                    continue
+        return found
+
+    def _phase_dirs(self) -> list[tuple[str, str, float, str | None]]:
+        phases_root = os.path.join(self.planning_dir, PHASES_DIR)
+        try:
+            names = [e.name for e in os.scandir(phases_root) if e.is_dir()]
+        except OSError:
+            return []
+        phases = []
+        for name in names:
+            parsed = parse_phase_dir(name)
+            if parsed is not None:
+                phases.append((os.path.join(PHASES_DIR, name), *parsed))
+        return phases
+
+    def update(self) -> UpdateResult:
+        """Bring the index in line with the tree; returns what was done."""
+        started = time.perf_counter()
+        result = UpdateResult()
+        current = self._scan()
+        known = {row['path']: row for row in self.db.execute(
+            'SELECT path, mtime_ns, size, sha256 FROM files')}
+        result.scanned = len(current)
+
+        with self.db:
+            for rel in known.keys() - current.keys():
+                self._forget(rel)
+                result.removed += 1
+
+            for rel, st in current.items():
+                row = known.get(rel)
+                if row is not None and (row['mtime_ns'], row['size']) == (st.st_mtime_ns, st.st_size):
+                    continue
+                try:
+                    with open(os.path.join(self.planning_dir, rel), 'rb') as f:
+                        data = f.read()
+                except OSError:
+                    continue
+                digest = hashlib.sha256(data).hexdigest()
+                if row is not None and row['sha256'] == digest:
+                    # Touched, not changed: keep the parsed rows
+                    self.db.execute('UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?',
+                                    (st.st_mtime_ns, st.st_size, rel))
+                    result.rehashed += 1
+                    continue
+                self._store(rel, st, digest, data)
+                result.parsed += 1
+
+            self.db.execute('DELETE FROM phases')
+            self.db.executemany('INSERT INTO phases VALUES (?, ?, ?, ?)', self._phase_dirs())
+
+        result.elapsed_ms = (time.perf_counter() - started) * 1000
+        return result
+
+    def _forget(self, rel: str) -> None:
+        self.db.execute('DELETE FROM files WHERE path = ?', (rel,))
+        self.db.execute('DELETE FROM plans WHERE path = ?', (rel,))
+        self.db.execute('DELETE FROM must_haves WHERE plan_path = ?', (rel,))
+
+    def _store(self, rel: str, st: os.stat_result, digest: str, data: bytes) -> None:
+        self._forget(rel)
+        total, done = gsd_runtime.count_checkboxes(data)
+        self.db.execute('INSERT INTO files VALUES (?, ?, ?, ?, ?, ?)',
+                        (rel, st.st_mtime_ns, st.st_size, digest, total, done))
+        if rel.startswith(PHASES_DIR + os.sep) and rel.endswith(PLAN_SUFFIX) and rel.count(os.sep) == 2:
+            plan, must_haves = parse_plan(rel, data)
+            columns = ', '.join(plan)
+            self.db.execute(f'INSERT INTO plans ({columns}) VALUES ({", ".join("?" * len(plan))})',
+                            tuple(plan.values()))
+            self.db.executemany('INSERT INTO must_haves VALUES (?, ?, ?, ?)',
+                                [(rel, *row) for row in must_haves])
+
+    # -- queries -------------------------------------------------------------
+
+    def find_phase(self, phase: str) -> str | None:
+        """The phase directory for a number ("4", "04", "2.1") or directory name."""
+        row = self.db.execute('SELECT dir FROM phases WHERE dir = ? OR number = ?',
+                              (os.path.join(PHASES_DIR, phase), phase)).fetchone()
+        if row is None:
+            try:
+                ordinal = float(phase)
+            except ValueError:
+                return None
+            row = self.db.execute('SELECT dir FROM phases WHERE ordinal = ? ORDER BY dir',
+                                  (ordinal,)).fetchone()
+        return row['dir'] if row else None
+
+    def plans(self, phase: str | None = None, pending: bool = False,
+              gaps_only: bool = False) -> list[dict[str, Any]]:
+        """Plans ordered by phase, wave and plan id."""
+        where, params = [], []
+        if phase is not None:
+            phase_dir = self.find_phase(phase)
+            if phase_dir is None:
+                return []
+            where.append('phase_dir = ?')
+            params.append(phase_dir)
+        if pending:
+            where.append('NOT done')
+        if gaps_only:
+            where.append('gap_closure')
+        sql = ('SELECT path, phase, plan_id, title, type, wave, depends_on, autonomous, '
+               'gap_closure, task_count, checkbox_total, checkbox_done, done FROM plan_status')
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY phase_ordinal, wave, plan_id'
+        plans = []
+        for row in self.db.execute(sql, params):
+            plan = dict(row)
+            plan['depends_on'] = json.loads(plan['depends_on'])
+            for flag in ('autonomous', 'gap_closure', 'done'):
+                plan[flag] = bool(plan[flag])
+            plans.append(plan)
+        return plans
+
+    def pending_by_wave(self, phase: str, gaps_only: bool = False) -> dict[int, list[dict[str, Any]]]:
+        """Pending plans of a phase grouped by wave, lowest wave first."""
+        waves: dict[int, list[dict[str, Any]]] = {}
+        for plan in self.plans(phase, pending=True, gaps_only=gaps_only):
+            waves.setdefault(plan['wave'], []).append(plan)
+        return waves
+
+    def must_haves(self, plan_path: str) -> dict[str, list[Any]]:
+        result: dict[str, list[Any]] = {kind: [] for kind in MUST_HAVE_KINDS}
+        for row in self.db.execute(
+                'SELECT kind, item FROM must_haves WHERE plan_path = ? ORDER BY kind, position',
+                (plan_path,)):
+            item = row['item']
+            result[row['kind']].append(json.loads(item) if item[:1] in '{[' else item)
+        return result
+
+    def phases(self) -> list[dict[str, Any]]:
+        """Per-phase plan counts, in phase order."""
+        return [dict(row) for row in self.db.execute("""
+            SELECT phases.dir, phases.number AS phase, phases.name,
+                   COUNT(plan_status.path) AS plans,
+                   COALESCE(SUM(plan_status.done), 0) AS done,
+                   COALESCE(MAX(plan_status.wave), 0) AS waves
+            FROM phases LEFT JOIN plan_status ON plan_status.phase_dir = phases.dir
+            GROUP BY phases.dir ORDER BY phases.ordinal, phases.dir""")]
+
+    def checkboxes(self, rel_path: str) -> tuple[int, int] | None:
+        """(total, checked) checkboxes of an indexed file, e.g. ROADMAP.md."""
+        row = self.db.execute('SELECT checkbox_total, checkbox_done FROM files WHERE path = ?',
+                              (rel_path,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def query(self, sql: str, params: tuple[Any, ...] = ()) -> list[dict[str, Any]]:
+        return [dict(row) for row in self.db.execute(sql, params)]
+
+
+def open_index(work_dir: str | None = None, update: bool = True) -> PlanningIndex | None:
+    """The index of the project containing work_dir, updated; None outside one."""
+    root = gsd_runtime.find_project_root(work_dir)
+    if root is None:
+        return None
+    index = PlanningIndex(os.path.join(root, gsd_runtime.PLANNING_DIR))
+    if update:
+        index.update()
+    return index
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def _print_rows(rows: list[dict[str, Any]]) -> None:
+    for row in rows:
+        print(json.dumps(row))
+
+
+def _format_plans(plans: list[dict[str, Any]]) -> str:
+    lines = []
+    for plan in plans:
+        mark = "✓" if plan['done'] else "⏳"
+        flags = " gap" if plan['gap_closure'] else ""
+        flags += "" if plan['autonomous'] else " checkpoint"
+        depends = f" after {','.join(plan['depends_on'])}" if plan['depends_on'] else ""
+        lines.append(f"{mark} wave {plan['wave']}  {plan['path']}{flags}{depends}")
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = sys.argv[1:] if argv is None else argv
+    as_json = '--json' in args
+    gaps_only = '--gaps-only' in args
+    args = [arg for arg in args if arg not in ('--json', '--gaps-only')]
+    command = args[0] if args else 'summary'
+
+    index = open_index(update=False)
+    if index is None:
+        print("No .planning directory found. Run /skill:gsd-new-project first.")
+        return 1
+    with index:
+        try:
+            result = index.rebuild() if command == 'rebuild' else index.update()
+        except sqlite3.DatabaseError as e:
+            print(f"❌ Index error ({index.path}): {e}")
+            return 1
+
+        if command in ('summary', 'rebuild'):
+            phases = index.phases()
+            if as_json:
+                _print_rows(phases)
+                return 0
+            print(f"🗂️  {index.path}: {result.scanned} files, {result.parsed} parsed, "
+                  f"{result.removed} removed in {result.elapsed_ms:.1f} ms")
+            for phase in phases:
+                print(f"   {phase['dir']:40} {phase['done']}/{phase['plans']} plans, "
+                      f"{phase['waves']} wave(s)")
+            return 0
+
+        if command in ('pending', 'plans'):
+            phase = args[1] if len(args) > 1 else None
+            if command == 'pending' and phase is None:
+                print("Usage: jim index pending PHASE [--gaps-only] [--json]")
+                return 2
+            if phase is not None and index.find_phase(phase) is None:
+                print(f"ERROR: Phase {phase} not found in .planning/{PHASES_DIR}/")
+                return 1
+            plans = index.plans(phase, pending=command == 'pending', gaps_only=gaps_only)
+            if as_json:
+                _print_rows(plans)
+            else:
+                print(_format_plans(plans), end='')
+            return 0
+
+        if command == 'sql' and len(args) > 1:
+            try:
+                _print_rows(index.query(args[1]))
+            except sqlite3.Error as e:
+                print(f"❌ {e}")
+                return 1
+            return 0
+
+    print(__doc__.split("Usage:")[1].rstrip())
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
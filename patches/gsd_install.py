@@ -0,0 +1,578 @@
+#!/usr/bin/env python3
+"""
+GSD Install v1.0
+Manifest-driven installer for GSD skills, agents, references, workflows,
+the master agent and the jim patches.
+
+It installs the same layout as scripts/install.js, but records every file it
+places in ~/.kimi/gsd-install-manifest.json (source, sha256, size, mtime_ns
+and how it was placed). A repeat install only stats sources and targets
+against that manifest. It hashes a file only when a stat differs and writes
+only files whose content changed, so an unchanged tree is a no-op. Files are
+placed as reflinks (copy-on-write clones) where the filesystem supports them,
+else as hardlinks to the source, else as copies. Files that left the tree are
+removed, and uninstall replays the manifest. Either way, a file that was
+edited after it was installed is kept.
+
+Hardlinked files share their inode with the source, so editing one edits the
+other. Use GSD_INSTALL_LINK=copy (or reflink) for a checkout you edit in
+place while the installed copy should stay put.
+
+Environment:
+    GSD_INSTALL_LINK   auto (default), reflink, hardlink or copy
+
+Usage:
+    python3 gsd_install.py [install] [--skills-only] [--link MODE] [-v]
+    python3 gsd_install.py status
+    python3 gsd_install.py uninstall
+"""
+
+from __future__ import annotations
+
+import errno
+import json
+import os
+import stat
+import sys
+import time
+from dataclasses import dataclass
+
+INSTALL_VERSION = "1.0.0"
+
+GSD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOME = os.path.expanduser('~')
+KIMI_DIR = os.path.join(HOME, '.kimi')
+MANIFEST = os.path.join(KIMI_DIR, 'gsd-install-manifest.json')
+LOCK_FILE = os.path.join(KIMI_DIR, '.gsd-install.lock')
+JIM_PATH = os.path.join(HOME, '.local', 'bin', 'jim')
+# Built at run time by jim (gsd_bundle.py) and the todo store (gsd_todos.py);
+# recorded in the manifest so uninstall removes them without importing either
+CACHE_DIRS = [os.path.join(KIMI_DIR, 'gsd-bundle'), os.path.join(KIMI_DIR, 'cache', 'todos')]
+
+# Same candidates and order as scripts/install.js
+SKILL_LOCATIONS = [
+    (os.path.join(HOME, '.config', 'agents', 'skills'), 'XDG Agents (recommended)'),
+    (os.path.join(HOME, '.agents', 'skills'), 'Legacy Agents'),
+    (os.path.join(HOME, '.kimi', 'skills'), 'Kimi'),
+]
+
+LINK_MODES = ('auto', 'reflink', 'hardlink', 'copy')
+# Linux FICLONE ioctl (_IOW(0x94, 9, int)): btrfs, XFS, bcachefs, overlayfs on those
+FICLONE = 0x40049409
+
+# Identical to the launcher written by scripts/install.js, so switching
+# installers does not rewrite it
+JIM_LAUNCHER = """#!/usr/bin/env python3
+import os
+import sys
+from importlib.machinery import SourceFileLoader
+
+wrapper = os.path.join(os.path.expanduser('~'), '.kimi', 'patches', 'jim-wrapper.py')
+if not os.path.exists(wrapper):
+    print("❌ jim-wrapper.py not found. Run: node scripts/install.js")
+    sys.exit(1)
+sys.argv[0] = wrapper
+# Loaded like an import, so its bytecode is cached in __pycache__ and reused
+code = SourceFileLoader('__main__', wrapper).get_code('__main__')
+exec(code, {'__name__': '__main__', '__file__': wrapper})
+"""
+
+
+@dataclass
+class Item:
+    """One file to install: copied from source, or generated from data."""
+    target: str
+    source: str | None = None
+    data: bytes | None = None
+    mode: int | None = None   # None: keep the source's permission bits
+
+
+@dataclass
+class InstallResult:
+    placed: dict[str, int]
+    unchanged: int
+    removed: int
+    kept: list[str]
+    elapsed_ms: float
+
+
+# =============================================================================
+# PLAN
+# =============================================================================
+
+def detect_skills_dir() -> tuple[str, str]:
+    """(directory, name) of the first existing skill location, else the first."""
+    for path, name in SKILL_LOCATIONS:
+        if os.path.isdir(path):
+            return path, name
+    return SKILL_LOCATIONS[0]
+
+
+def _tree(source_dir: str, target_dir: str) -> list[Item]:
+    items = []
+    for dirpath, dirnames, filenames in os.walk(source_dir):
+        dirnames.sort()
+        rel = os.path.relpath(dirpath, source_dir)
+        for name in sorted(filenames):
+            items.append(Item(os.path.normpath(os.path.join(target_dir, rel, name)),
+                              source=os.path.join(dirpath, name)))
+    return items
+
+
+def _gsd_dirs(directory: str) -> list[str]:
+    return sorted(name for name in os.listdir(directory)
+                  if name.startswith('gsd-') and os.path.isdir(os.path.join(directory, name)))
+
+
+def _markdown(source_dir: str, target_dir: str) -> list[Item]:
+    return [Item(os.path.join(target_dir, name), source=os.path.join(source_dir, name))
+            for name in sorted(os.listdir(source_dir)) if name.endswith('.md')]
+
+
+def build_plan(skills_dir: str, skills_only: bool = False) -> list[Item]:
+    """Every file scripts/install.js would write, with its target path."""
+    items: list[Item] = []
+    skills = os.path.join(GSD_DIR, 'skills')
+    for skill in _gsd_dirs(skills):
+        items += _tree(os.path.join(skills, skill), os.path.join(skills_dir, skill))
+
+    agents = os.path.join(GSD_DIR, 'agents')
+    agents_dir = os.path.join(skills_dir, 'gsd-agents')
+    for agent in _gsd_dirs(agents):
+        items += _tree(os.path.join(agents, agent), os.path.join(agents_dir, agent))
+    system = os.path.join(agents, 'gsd-system.md')
+    if os.path.isfile(system):
+        items.append(Item(os.path.join(agents_dir, 'gsd-system.md'), source=system))
+
+    items += _markdown(os.path.join(GSD_DIR, 'references'),
+                       os.path.join(skills_dir, 'gsd-references'))
+    items += _markdown(os.path.join(GSD_DIR, 'workflows'),
+                       os.path.join(skills_dir, 'gsd-workflows'))
+
+    # The master agent is rendered with ~/.kimi made absolute, never linked
+    with open(os.path.join(GSD_DIR, 'gsd-agent.yaml'), encoding='utf-8') as f:
+        master = f.read().replace('~/.kimi', KIMI_DIR)
+    items.append(Item(os.path.join(KIMI_DIR, 'gsd-agent.yaml'), data=master.encode('utf-8')))
+
+    if not skills_only:
+        patches = os.path.join(GSD_DIR, 'patches')
+        for name in sorted(os.listdir(patches)):
+            if name.endswith('.py'):
+                items.append(Item(os.path.join(KIMI_DIR, 'patches', name),
+                                  source=os.path.join(patches, name), mode=0o755))
+        items.append(Item(JIM_PATH, data=JIM_LAUNCHER.encode('utf-8'), mode=0o755))
+    return items
+
+
+# =============================================================================
+# MANIFEST
+# =============================================================================
+
+def sha256_file(path: str) -> str:
+    import hashlib
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def sha256_bytes(data: bytes) -> str:
+    import hashlib
+    return hashlib.sha256(data).hexdigest()
+
+
+def load_manifest() -> dict:
+    try:
+        with open(MANIFEST, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def write_manifest(manifest: dict) -> bool:
+    """Atomically write the manifest; False when it was already identical."""
+    data = json.dumps(manifest, indent=2, sort_keys=True) + "\n"
+    try:
+        with open(MANIFEST, encoding='utf-8') as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    tmp = f"{MANIFEST}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(data)
+    os.replace(tmp, MANIFEST)
+    return True
+
+
+def _stat(path: str) -> os.stat_result | None:
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def _same_signature(st: os.stat_result | None, size: int | None, mtime_ns: int | None) -> bool:
+    return st is not None and st.st_size == size and st.st_mtime_ns == mtime_ns
+
+
+def target_state(target: str, entry: dict) -> str:
+    """'ok', 'modified' or 'missing' for an installed file.
+
+    A target whose size and mtime match the manifest is accepted without
+    hashing; a hardlink still sharing its source's inode is ours even when
+    the source was edited in place.
+    """
+    st = _stat(target)
+    if st is None:
+        return "missing"
+    if _same_signature(st, entry.get('size'), entry.get('mtime_ns')):
+        return "ok"
+    source = entry.get('source')
+    if entry.get('method') == 'hardlink' and source:
+        source_st = _stat(source)
+        if source_st is not None and os.path.samestat(st, source_st):
+            return "ok"
+    return "ok" if sha256_file(target) == entry.get('sha256') else "modified"
+
+
+# =============================================================================
+# PLACEMENT
+# =============================================================================
+
+class Placer:
+    """Puts files in place, remembering per device which link methods work."""
+
+    def __init__(self, link: str = 'auto'):
+        if link not in LINK_MODES:
+            raise ValueError(f"link mode must be one of {', '.join(LINK_MODES)}")
+        self.link = link
+        self.unsupported: set[tuple[int, str]] = set()
+        self.created_dirs: list[str] = []
+
+    def _makedirs(self, directory: str) -> None:
+        missing = []
+        while directory and not os.path.isdir(directory):
+            missing.append(directory)
+            directory = os.path.dirname(directory)
+        for path in reversed(missing):
+            os.makedirs(path, exist_ok=True)
+            self.created_dirs.append(path)
+
+    def _methods(self, device: int, same_mode: bool) -> list[str]:
+        methods = ['reflink', 'hardlink'] if self.link == 'auto' else [self.link]
+        if not same_mode and 'hardlink' in methods:
+            # A hardlink cannot have other permission bits than its source
+            methods.remove('hardlink')
+        methods = [m for m in methods if (device, m) not in self.unsupported]
+        return methods + ['copy'] if 'copy' not in methods else methods
+
+    def _reflink(self, source: str, tmp: str) -> None:
+        import fcntl
+        with open(source, 'rb') as src, open(tmp, 'wb') as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+    def place(self, item: Item) -> str:
+        """Install item atomically; returns the method used."""
+        directory = os.path.dirname(item.target)
+        self._makedirs(directory)
+        tmp = os.path.join(directory, f".{os.path.basename(item.target)}.{os.getpid()}.gsd-tmp")
+        if os.path.lexists(tmp):
+            os.unlink(tmp)
+        try:
+            if item.data is not None:
+                method = 'write'
+                with open(tmp, 'wb') as f:
+                    f.write(item.data)
+                os.chmod(tmp, 0o644 if item.mode is None else item.mode)
+            else:
+                method = self._link_or_copy(item, directory, tmp)
+            if os.path.exists(item.target) and os.path.samefile(tmp, item.target):
+                # rename() of two links to one inode is a no-op that keeps tmp
+                os.unlink(tmp)
+            else:
+                os.replace(tmp, item.target)
+        except BaseException:
+            if os.path.lexists(tmp):
+                os.unlink(tmp)
+            raise
+        return method
+
+    def _link_or_copy(self, item: Item, directory: str, tmp: str) -> str:
+        import shutil
+        source_mode = stat.S_IMODE(os.stat(item.source).st_mode)
+        mode = source_mode if item.mode is None else item.mode
+        device = os.stat(directory).st_dev
+        for method in self._methods(device, mode == source_mode):
+            if method == 'copy':
+                shutil.copyfile(item.source, tmp)
+                os.chmod(tmp, mode)
+                return method
+            try:
+                if method == 'reflink':
+                    self._reflink(item.source, tmp)
+                    os.chmod(tmp, mode)
+                else:
+                    os.link(item.source, tmp)
+                return method
+            except (OSError, ImportError) as e:
+                if isinstance(e, OSError) and e.errno == errno.EEXIST:
+                    raise
+                # EXDEV, EOPNOTSUPP, EPERM, ...: never try it on this device again
+                self.unsupported.add((device, method))
+        raise AssertionError("unreachable: copy is always tried last")
+
+
+def _prune_dirs(dirs: list[str], candidates: set[str]) -> list[str]:
+    """Remove recorded directories that are now empty, deepest first."""
+    removed = []
+    for directory in sorted(candidates & set(dirs), key=len, reverse=True):
+        try:
+            os.rmdir(directory)
+            removed.append(directory)
+        except OSError:
+            pass
+    return [d for d in dirs if d not in removed]
+
+
+# =============================================================================
+# INSTALL / UNINSTALL
+# =============================================================================
+
+def _lock():
+    import fcntl
+    os.makedirs(KIMI_DIR, exist_ok=True)
+    lock = open(LOCK_FILE, 'w')
+    fcntl.flock(lock, fcntl.LOCK_EX)
+    return lock
+
+
+def install(skills_dir: str, skills_only: bool = False, link: str = 'auto',
+            verbose: bool = False) -> InstallResult:
+    """Bring the installed tree in line with the plan, touching only changes."""
+    start = time.perf_counter()
+    placer = Placer(link)
+    manifest = load_manifest()
+    old_files: dict[str, dict] = manifest.get('files', {})
+    files: dict[str, dict] = {}
+    placed: dict[str, int] = {}
+    unchanged = 0
+
+    for item in build_plan(skills_dir, skills_only):
+        entry = old_files.get(item.target)
+        target_st = _stat(item.target)
+        if item.data is not None:
+            digest = sha256_bytes(item.data)
+            source_sig = {}
+        else:
+            source_st = os.stat(item.source)
+            source_sig = {'source': item.source, 'source_size': source_st.st_size,
+                          'source_mtime_ns': source_st.st_mtime_ns}
+            if (entry and entry.get('source') == item.source
+                    and _same_signature(source_st, entry.get('source_size'),
+                                        entry.get('source_mtime_ns'))
+                    and _same_signature(target_st, entry.get('size'), entry.get('mtime_ns'))
+                    and (item.mode is None or stat.S_IMODE(target_st.st_mode) == item.mode)):
+                files[item.target] = entry
+                unchanged += 1
+                continue
+            digest = sha256_file(item.source)
+
+        want_mode = item.mode
+        if want_mode is None:
+            want_mode = 0o644 if item.source is None else stat.S_IMODE(source_st.st_mode)
+        if (target_st is not None and stat.S_IMODE(target_st.st_mode) == want_mode
+                and ((entry and entry.get('sha256') == digest
+                      and _same_signature(target_st, entry.get('size'), entry.get('mtime_ns')))
+                     or sha256_file(item.target) == digest)):
+            # Content already in place: a touched source, a moved source tree
+            # or a file from an install without a manifest
+            if entry:
+                method = entry.get('method', 'copy')
+            elif item.source is not None and os.path.samestat(target_st, source_st):
+                method = 'hardlink'
+            else:
+                method = 'copy' if item.data is None else 'write'
+            unchanged += 1
+        else:
+            method = placer.place(item)
+            placed[method] = placed.get(method, 0) + 1
+            target_st = os.stat(item.target)
+            if verbose:
+                print(f"  ✓ {item.target} ({method})")
+        files[item.target] = {'sha256': digest, 'size': target_st.st_size,
+                              'mtime_ns': target_st.st_mtime_ns, 'method': method,
+                              **source_sig}
+
+    removed = 0
+    kept = []
+    emptied = set()
+    for target, entry in old_files.items():
+        if target in files:
+            continue
+        state = target_state(target, entry)
+        if state == "ok":
+            os.unlink(target)
+            removed += 1
+            emptied.add(os.path.dirname(target))
+            if verbose:
+                print(f"  - {target}")
+        elif state == "modified":
+            kept.append(target)
+
+    dirs = list(dict.fromkeys(manifest.get('dirs', []) + placer.created_dirs))
+    dirs = _prune_dirs(dirs, _with_parents(emptied, dirs))
+    write_manifest({'version': INSTALL_VERSION, 'gsd_dir': GSD_DIR,
+                    'skills_dir': skills_dir, 'files': files, 'dirs': dirs,
+                    'caches': [] if skills_only else CACHE_DIRS})
+    return InstallResult(placed, unchanged, removed, kept,
+                         (time.perf_counter() - start) * 1000)
+
+
+def _with_parents(paths: set[str], dirs: list[str]) -> set[str]:
+    """paths plus every recorded directory above them."""
+    recorded = set(dirs)
+    result = set()
+    for path in paths:
+        while path in recorded and path not in result:
+            result.add(path)
+            path = os.path.dirname(path)
+        result.add(path)
+    return result
+
+
+def uninstall(verbose: bool = False) -> tuple[int, list[str]]:
+    """Replay the manifest: remove unmodified files and emptied directories."""
+    manifest = load_manifest()
+    removed = 0
+    kept = []
+    for target, entry in sorted(manifest.get('files', {}).items()):
+        state = target_state(target, entry)
+        if state == "ok":
+            os.unlink(target)
+            removed += 1
+            if verbose:
+                print(f"  - {target}")
+        elif state == "modified":
+            kept.append(target)
+    dirs = manifest.get('dirs', [])
+    _prune_dirs(dirs, set(dirs))
+    if manifest:
+        os.unlink(MANIFEST)
+    if os.path.exists(LOCK_FILE):
+        os.unlink(LOCK_FILE)
+    caches = manifest.get('caches', [])
+    if caches:
+        import shutil
+        for directory in caches:
+            shutil.rmtree(directory, ignore_errors=True)
+    return removed, kept
+
+
+# =============================================================================
+# SHELL
+# =============================================================================
+
+def configure_shell() -> str | None:
+    """Put ~/.local/bin on PATH and drop an old jim alias, like install.js."""
+    shell = os.environ.get('SHELL', '')
+    rc_path = os.path.join(HOME, '.zshrc' if 'zsh' in shell else '.bashrc')
+    try:
+        with open(rc_path, encoding='utf-8') as f:
+            content = f.read()
+    except FileNotFoundError:
+        content = ''
+    updated = content
+    if 'alias jim=' in updated:
+        import re
+        updated = re.sub(r'alias jim=.*\n', '', updated)
+    if '.local/bin' not in updated:
+        updated += '\n# Add local bin to PATH\nexport PATH="$HOME/.local/bin:$PATH"\n'
+    if updated == content:
+        return None
+    with open(rc_path, 'w', encoding='utf-8') as f:
+        f.write(updated)
+    return rc_path
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def _status() -> int:
+    manifest = load_manifest()
+    files = manifest.get('files', {})
+    if not files:
+        print("ℹ️  Nothing installed by gsd_install.py (no manifest)")
+        return 1
+    states: dict[str, list[str]] = {}
+    methods: dict[str, int] = {}
+    for target, entry in sorted(files.items()):
+        states.setdefault(target_state(target, entry), []).append(target)
+        methods[entry.get('method', 'copy')] = methods.get(entry.get('method', 'copy'), 0) + 1
+    print(f"📋 {len(files)} files from {manifest.get('gsd_dir')} "
+          f"(skills in {manifest.get('skills_dir')})")
+    print("   " + ", ".join(f"{count} {method}" for method, count in sorted(methods.items())))
+    for state in ('modified', 'missing'):
+        for target in states.get(state, []):
+            print(f"  ⚠️  {state}: {target}")
+    return 0 if set(states) <= {'ok'} else 1
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='gsd_install.py',
+                                     description='Incremental, manifest-driven GSD installer.')
+    parser.add_argument('command', nargs='?', default='install',
+                        choices=('install', 'status', 'uninstall'))
+    parser.add_argument('--skills-only', action='store_true',
+                        help='skip the patches and the jim launcher')
+    parser.add_argument('--link', choices=LINK_MODES,
+                        default=os.environ.get('GSD_INSTALL_LINK', 'auto'),
+                        help='how files are placed (default: $GSD_INSTALL_LINK or auto)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='list every change')
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    if args.link not in LINK_MODES:
+        parser.error(f"GSD_INSTALL_LINK must be one of {', '.join(LINK_MODES)}")
+
+    if args.command == 'status':
+        return _status()
+
+    with _lock():
+        if args.command == 'uninstall':
+            removed, kept = uninstall(args.verbose)
+            print(f"🗑️  Removed {removed} files")
+            for target in kept:
+                print(f"  ⚠️  kept (modified since install): {target}")
+            return 0
+
+        skills_dir, location = detect_skills_dir()
+        try:
+            result = install(skills_dir, args.skills_only, args.link, args.verbose)
+        except OSError as e:
+            print(f"❌ Installation failed: {e}")
+            return 1
+    rc_path = configure_shell()
+
+    placed = sum(result.placed.values())
+    how = ", ".join(f"{count} {method}" for method, count in sorted(result.placed.items()))
+    print(f"📍 {location}: {skills_dir}")
+    print(f"✅ {placed} files installed{f' ({how})' if how else ''}, "
+          f"{result.unchanged} unchanged, {result.removed} removed "
+          f"in {result.elapsed_ms:.0f} ms")
+    for target in result.kept:
+        print(f"  ⚠️  kept (modified since install): {target}")
+    if rc_path:
+        print(f"📝 Updated {rc_path}; run: source {rc_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,442 @@
+"""
+GSD Runtime v1.0
+Shared GSD context loading for a patched Kimi CLI.
+
+The patcher installs this module next to the kimi_cli package and every
+injected hook (status bar, StatusSnapshot, welcome message) calls into it
+instead of carrying its own parser. Parsed values are kept in memory and
+a file is only re-read when its (st_mtime_ns, st_size, st_ino) signature
+changes, so a steady-state refresh costs a handful of stat calls.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import gsd_stats
+import gsd_todos
+
+RUNTIME_VERSION = "1.0.0"
+
+PLANNING_DIR = ".planning"
+STATE_FILE = "STATE.md"
+PROJECT_FILE = "PROJECT.md"
+ROADMAP_FILE = "ROADMAP.md"
+PROJECT_TODOS_FILE = ".kimi-todos.json"
+
+# Compiled once per process and matched against raw bytes, so a header can be
+# found without decoding (or even reading) the rest of the file
+PHASE_PATTERN = re.compile(rb'Current Phase[:\s]+(\d+)', re.IGNORECASE)
+TITLE_PATTERN = re.compile(rb'^#\s+(.+)$', re.MULTILINE)
+MILESTONE_PATTERN = re.compile(rb'##\s+Current Milestone[:\s]*([^\n]+)', re.IGNORECASE)
+# Markdown task-list items; group 1 is the box content (" ", "x" or "X")
+CHECKBOX_PATTERN = re.compile(rb'^[ \t]*[-*+][ \t]+\[([ xX])\]', re.MULTILINE)
+
+
+def env_number(name: str, default: Any, cast: Callable[[str], Any] = float,
+               allow_zero: bool = False) -> Any:
+    """Numeric environment setting; unset, malformed or non-positive gives default.
+
+    Runtime modules read their settings at import time or inside kimi's
+    hooks, where a typo in the environment must not break kimi. With
+    `allow_zero`, 0 is a valid value (e.g. "no throttling").
+    """
+    try:
+        value = cast(os.environ[name])
+    except (KeyError, ValueError):
+        return default
+    return value if value > 0 or (allow_zero and value == 0) else default
+
+
+# Headers live near the top of the planning docs; completed-task logs grow
+# below them. Scanning stops at the first match or after this many bytes.
+MAX_SCAN_BYTES = env_number('GSD_MAX_SCAN_BYTES', 256 * 1024, int)
+SCAN_CHUNK_SIZE = 16 * 1024
+
+# How long a .planning lookup is trusted before its directories are re-stat'ed
+RESOLVE_TTL = env_number('GSD_RESOLVE_TTL', 5.0)
+
+FileKey = tuple[int, int, int]
+
+# None unless GSD_STATS is set
+_stats = gsd_stats.collector()
+
+
+@dataclass(frozen=True, slots=True)
+class GSDContext:
+    """Immutable snapshot of the GSD state of one project."""
+    enabled: bool = False
+    root: str | None = None
+    phase: str | None = None
+    project: str | None = None
+    milestone: str | None = None
+    todos_total: int = 0
+    todos_done: int = 0
+
+    def status_fields(self) -> dict[str, Any]:
+        """Return the ``gsd_*`` keyword arguments for StatusSnapshot."""
+        return {
+            'gsd_enabled': self.enabled,
+            'gsd_phase': self.phase,
+            'gsd_todos_total': self.todos_total,
+            'gsd_todos_done': self.todos_done,
+            'gsd_milestone': self.milestone[:20] if self.milestone else None,
+            'gsd_project': self.project[:30] if self.project else None,
+        }
+
+
+EMPTY_CONTEXT = GSDContext()
+
+
+def file_key(path: str) -> FileKey | None:
+    """Return the stat signature of a file, or None if it is missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+# =============================================================================
+# PARSERS
+# =============================================================================
+
+def _scan_chunks(f: Any, pattern: re.Pattern[bytes], limit: int) -> bytes | None:
+    """Chunked fallback for scan_file when the file cannot be memory-mapped."""
+    tail = b''
+    read = 0
+    while read < limit:
+        chunk = f.read(min(SCAN_CHUNK_SIZE, limit - read))
+        if not chunk:
+            break
+        read += len(chunk)
+        buf = tail + chunk
+        match = pattern.search(buf)
+        # A match touching the end of the buffer may continue in the next chunk
+        if match and (match.end() < len(buf) or read >= limit):
+            return match.group(1)
+        # Carry the trailing partial line into the next chunk; it starts at a
+        # line boundary so ^ anchors stay correct
+        start = buf.rfind(b'\n') + 1
+        tail = buf[start:] if len(buf) - start <= SCAN_CHUNK_SIZE else b''
+    if tail:
+        match = pattern.search(tail)
+        if match:
+            return match.group(1)
+    return None
+
+
+def scan_file(path: str, pattern: re.Pattern[bytes], max_bytes: int | None = None) -> str | None:
+    """Return group 1 of the first match of a bytes pattern in a file.
+
+    The file is memory-mapped so only the pages up to the match are touched;
+    the search never looks past ``max_bytes`` (default MAX_SCAN_BYTES).
+    """
+    limit = max_bytes or MAX_SCAN_BYTES
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return None
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            value = _scan_chunks(f, pattern, limit)
+            scanned = f.tell()
+        else:
+            with mm:
+                match = pattern.search(mm, 0, min(size, limit))
+                value = match.group(1) if match else None
+                scanned = match.end() if match else min(size, limit)
+    if _stats is not None:
+        _stats.read(os.path.basename(path), scanned)
+    if value is None:
+        return None
+    return value.decode('utf-8', errors='replace').rstrip('\r')
+
+
+def parse_phase(path: str) -> str | None:
+    """Extract the current phase number from STATE.md."""
+    return scan_file(path, PHASE_PATTERN)
+
+
+def parse_title(path: str) -> str | None:
+    """Extract the first ``# `` heading from PROJECT.md."""
+    return scan_file(path, TITLE_PATTERN)
+
+
+def parse_milestone(path: str) -> str | None:
+    """Extract the ``## Current Milestone`` heading from ROADMAP.md."""
+    value = scan_file(path, MILESTONE_PATTERN)
+    return value.strip() if value else None
+
+
+def count_checkboxes(data: bytes) -> tuple[int, int]:
+    """Return (total, checked) Markdown checkboxes in data."""
+    boxes = CHECKBOX_PATTERN.findall(data)
+    return len(boxes), len(boxes) - boxes.count(b' ')
+
+
+def parse_checkboxes(path: str) -> tuple[int, int]:
+    """Return (total, checked) checkboxes of a whole file, e.g. ROADMAP.md."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if _stats is not None:
+        _stats.read(os.path.basename(path), len(data))
+    return count_checkboxes(data)
+
+
+def todos_key(path: str) -> tuple | None:
+    """Stat signature of a todo list: its JSON file and log."""
+    keys = (file_key(path), file_key(gsd_todos.log_path(path)))
+    return keys if any(keys) else None
+
+
+def parse_todos(path: str) -> tuple[int, int]:
+    """Return (total, done) counts from the todo store (read-only)."""
+    counts = gsd_todos.read_counts(path)
+    if _stats is not None:
+        _stats.read(os.path.basename(path), gsd_todos.SUMMARY_FORMAT.size)
+    return counts
+
+
+# =============================================================================
+# PROJECT DISCOVERY
+# =============================================================================
+
+def _dir_mtime(path: str) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class PlanningResolver:
+    """Finds the nearest ancestor with a .planning directory, memoized per cwd.
+
+    The walk stops at the first directory holding ``.git`` (the repository
+    root) or at the filesystem root. Both hits and misses are remembered
+    together with the mtimes of every directory visited: creating or removing
+    ``.planning``/``.git`` in any of them changes that mtime. Within
+    RESOLVE_TTL seconds a result is returned without touching the disk.
+    """
+
+    def __init__(self, ttl: float = RESOLVE_TTL) -> None:
+        self.ttl = ttl
+        self._entries: dict[str, tuple[str | None, tuple[str, ...], tuple[int | None, ...], float]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, cwd: str) -> str | None:
+        """Return the project root for cwd, or None outside a GSD project."""
+        return self.lookup(cwd)[0]
+
+    def lookup(self, cwd: str) -> tuple[str | None, tuple[str, ...]]:
+        """Return (project root or None, directories visited to find it)."""
+        now = time.monotonic()
+        entry = self._entries.get(cwd)
+        if entry is not None:
+            root, dirs, mtimes, checked = entry
+            if now - checked < self.ttl:
+                return root, dirs
+            if tuple(_dir_mtime(d) for d in dirs) == mtimes:
+                self._entries[cwd] = (root, dirs, mtimes, now)
+                return root, dirs
+
+        root, dirs = self._walk(cwd)
+        with self._lock:
+            self._entries[cwd] = (root, dirs, tuple(_dir_mtime(d) for d in dirs), now)
+        return root, dirs
+
+    def invalidate(self, cwd: str) -> None:
+        """Force the next lookup for cwd to re-check directory mtimes."""
+        entry = self._entries.get(cwd)
+        if entry is not None:
+            self._entries[cwd] = (*entry[:3], float('-inf'))
+
+    @staticmethod
+    def _walk(cwd: str) -> tuple[str | None, tuple[str, ...]]:
+        visited = []
+        current = os.path.abspath(cwd)
+        while True:
+            visited.append(current)
+            if os.path.isdir(os.path.join(current, PLANNING_DIR)):
+                return current, tuple(visited)
+            if os.path.exists(os.path.join(current, '.git')):
+                return None, tuple(visited)
+            parent = os.path.dirname(current)
+            if parent == current:
+                return None, tuple(visited)
+            current = parent
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_resolver = PlanningResolver()
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+class ContextCache:
+    """Per-process cache of parsed GSD files keyed by stat signature."""
+
+    def __init__(self) -> None:
+        self._files: dict[str, tuple[FileKey, Any]] = {}
+        self._contexts: dict[tuple[str, str | None], tuple[tuple, GSDContext]] = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, path: str, parser: Callable[[str], Any], default: Any,
+                key_func: Callable[[str], Any] = file_key) -> tuple[Any, Any]:
+        """Return (key, value) for a file, parsing only if its key changed."""
+        key = key_func(path)
+        if key is None:
+            self._files.pop(path, None)
+            return None, default
+        entry = self._files.get(path)
+        hit = entry is not None and entry[0] == key
+        if _stats is not None:
+            _stats.cache_lookup(os.path.basename(path), hit)
+        if hit:
+            return key, entry[1]
+        try:
+            value = parser(path)
+        except (OSError, ValueError, AttributeError, TypeError):
+            value = default
+        self._files[path] = (key, value)
+        return key, value
+
+    def load(self, work_dir: str, todos_file: str | None = None) -> GSDContext:
+        """Return the GSD context for work_dir, reusing unchanged results."""
+        root = _resolver.resolve(work_dir)
+        if root is None:
+            return EMPTY_CONTEXT
+        planning_dir = os.path.join(root, PLANNING_DIR)
+
+        with self._lock:
+            state_key, phase = self._lookup(
+                os.path.join(planning_dir, STATE_FILE), parse_phase, None)
+            project_key, project = self._lookup(
+                os.path.join(planning_dir, PROJECT_FILE), parse_title, None)
+            roadmap_key, milestone = self._lookup(
+                os.path.join(planning_dir, ROADMAP_FILE), parse_milestone, None)
+            todo_key, (total, done) = (None, (0, 0))
+            if todos_file:
+                todo_key, (total, done) = self._lookup(todos_file, parse_todos, (0, 0), todos_key)
+
+            keys = (root, state_key, project_key, roadmap_key, todo_key)
+            cached = self._contexts.get((work_dir, todos_file))
+            if cached is not None and cached[0] == keys:
+                return cached[1]
+
+            context = GSDContext(
+                enabled=True,
+                root=root,
+                phase=phase,
+                project=project,
+                milestone=milestone,
+                todos_total=total,
+                todos_done=done,
+            )
+            self._contexts[(work_dir, todos_file)] = (keys, context)
+            return context
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._files.clear()
+            self._contexts.clear()
+        _resolver.clear()
+
+
+_cache = ContextCache()
+
+
+# =============================================================================
+# DISPLAY WIDTH
+# =============================================================================
+
+# Zero-width joiner and variation selectors: part of the preceding glyph
+ZERO_WIDTH_CHARS = frozenset('\u200b\u200c\u200d\ufe0e\ufe0f')
+
+# Per-character cell widths, filled on first sight; toolbar text only ever
+# uses a handful of distinct characters
+_char_widths: dict[str, int] = {}
+
+
+def _char_width(ch: str) -> int:
+    import unicodedata
+
+    if ch in ZERO_WIDTH_CHARS or unicodedata.combining(ch):
+        return 0
+    return 2 if unicodedata.east_asian_width(ch) in ('W', 'F') else 1
+
+
+def display_width(text: str) -> int:
+    """Terminal cells text occupies: wide and emoji 2, combining marks 0.
+
+    len() counts "📋" as 1 although terminals draw it in 2 cells.
+    """
+    if text.isascii():
+        return len(text)
+    width = 0
+    for ch in text:
+        w = _char_widths.get(ch)
+        if w is None:
+            w = _char_widths[ch] = _char_width(ch)
+        width += w
+    return width
+
+
+# =============================================================================
+# PUBLIC API
+# =============================================================================
+
+def session_todos_file() -> str | None:
+    """Return the per-session todo file for KIMI_SESSION_ID, if any."""
+    session_id = os.environ.get('KIMI_SESSION_ID', '')
+    if not session_id:
+        return None
+    return os.path.join(os.path.expanduser('~'), '.kimi', 'todos', f'{session_id}.json')
+
+
+def find_project_root(work_dir: str | os.PathLike[str] | None = None) -> str | None:
+    """Return the nearest ancestor of work_dir (default: cwd) with .planning."""
+    return _resolver.resolve(os.fspath(work_dir) if work_dir is not None else os.getcwd())
+
+
+def project_dirs(work_dir: str) -> tuple[str | None, tuple[str, ...]]:
+    """Return (project root, directories searched) for work_dir."""
+    return _resolver.lookup(work_dir)
+
+
+def invalidate_project(work_dir: str) -> None:
+    """Re-check the .planning lookup for work_dir on its next use."""
+    _resolver.invalidate(work_dir)
+
+
+def project_todos_file(work_dir: str) -> str:
+    """Return the project-level todo file, next to the resolved .planning."""
+    return os.path.join(_resolver.resolve(work_dir) or work_dir, PROJECT_TODOS_FILE)
+
+
+def get_context(work_dir: str | os.PathLike[str] | None = None,
+                todos_file: str | None = None) -> GSDContext:
+    """Return the cached GSD context for work_dir (default: cwd)."""
+    work_dir = os.fspath(work_dir) if work_dir is not None else os.getcwd()
+    if _stats is None:
+        return _cache.load(work_dir, todos_file)
+    with _stats.timer('runtime.get_context'):
+        return _cache.load(work_dir, todos_file)
+
+
+def clear_cache() -> None:
+    """Forget all cached files and contexts."""
+    _cache.clear()
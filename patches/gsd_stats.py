@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+GSD Stats v1.0
+Opt-in hot-path instrumentation for a patched Kimi CLI.
+
+With GSD_STATS=1 the injected hooks and the runtime record call counts,
+latency histograms, bytes read and cache hits/misses per source file into
+an in-process Collector. Recent samples are also kept in a fixed-size ring.
+At exit the collector is flushed to one JSON file per process in
+~/.kimi/gsd-stats/; `jim --stats` (or this script) aggregates those files
+across sessions.
+
+When GSD_STATS is unset `collector()` returns None and every call site
+skips instrumentation with a single ``is not None`` check.
+
+Environment:
+    GSD_STATS       1 to record stats in this process
+    GSD_STATS_DIR   where stats files are written (default ~/.kimi/gsd-stats)
+
+Usage:
+    python3 gsd_stats.py [--json] [--reset]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any
+
+STATS_VERSION = "1.0.0"
+
+ENABLED = os.environ.get('GSD_STATS', '') not in ('', '0')
+STATS_DIR = os.environ.get('GSD_STATS_DIR') or os.path.join(
+    os.path.expanduser('~'), '.kimi', 'gsd-stats')
+
+# Recent (monotonic_ns, name, elapsed_ns) samples kept for the flush
+RING_SIZE = 4096
+# Histogram bucket i counts samples with elapsed_ns.bit_length() == i,
+# i.e. latencies in [2**(i-1), 2**i) ns; 40 buckets reach ~9 minutes
+HISTOGRAM_BUCKETS = 40
+
+
+# =============================================================================
+# COLLECTOR
+# =============================================================================
+
+class Collector:
+    """In-memory stats for one process."""
+
+    def __init__(self, ring_size: int = RING_SIZE) -> None:
+        self.started = time.time()
+        self.calls: dict[str, int] = {}
+        self.total_ns: dict[str, int] = {}
+        self.histograms: dict[str, list[int]] = {}
+        self.counters: dict[str, int] = {}
+        self.bytes_read: dict[str, int] = {}
+        self.cache: dict[str, list[int]] = {}
+        # First (monotonic_ns, elapsed_ns) per name; survives ring wrap-around
+        self.first: dict[str, tuple[int, int]] = {}
+        self.ring: deque[tuple[int, str, int]] = deque(maxlen=ring_size)
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, elapsed_ns: int) -> None:
+        """Record one call of `name` that took elapsed_ns."""
+        bucket = min(elapsed_ns.bit_length(), HISTOGRAM_BUCKETS - 1)
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self.total_ns[name] = self.total_ns.get(name, 0) + elapsed_ns
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = [0] * HISTOGRAM_BUCKETS
+            histogram[bucket] += 1
+            now = time.monotonic_ns()
+            if name not in self.first:
+                self.first[name] = (now, elapsed_ns)
+            self.ring.append((now, name, elapsed_ns))
+
+    def timer(self, name: str) -> _Timer:
+        """Context manager recording the duration of its block as `name`."""
+        return _Timer(self, name)
+
+    def incr(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def read(self, source: str, nbytes: int) -> None:
+        """Record nbytes read (or scanned) from a source file."""
+        with self._lock:
+            self.bytes_read[source] = self.bytes_read.get(source, 0) + nbytes
+
+    def cache_lookup(self, source: str, hit: bool) -> None:
+        with self._lock:
+            entry = self.cache.get(source)
+            if entry is None:
+                entry = self.cache[source] = [0, 0]
+            entry[0 if hit else 1] += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                'version': STATS_VERSION,
+                'pid': os.getpid(),
+                'argv': sys.argv[:1],
+                'started': self.started,
+                'ended': time.time(),
+                'calls': dict(self.calls),
+                'total_ns': dict(self.total_ns),
+                'histograms': {k: list(v) for k, v in self.histograms.items()},
+                'counters': dict(self.counters),
+                'bytes_read': dict(self.bytes_read),
+                'cache': {k: {'hit': v[0], 'miss': v[1]} for k, v in self.cache.items()},
+                'first': dict(self.first),
+                'ring': list(self.ring),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started = time.time()
+            for stats in (self.calls, self.total_ns, self.histograms, self.counters,
+                          self.bytes_read, self.cache, self.first, self.ring):
+                stats.clear()
+
+    def flush(self, directory: str | None = None) -> str | None:
+        """Write the stats to a new file in STATS_DIR and reset; returns its path.
+
+        jim flushes before exec'ing kimi, which keeps the pid, so file names
+        carry a nanosecond timestamp as well.
+        """
+        data = self.to_dict()
+        if not data['calls'] and not data['counters']:
+            return None
+        directory = directory or STATS_DIR
+        path = os.path.join(directory, f"{time.time_ns()}-{os.getpid()}.json")
+        try:
+            os.makedirs(directory, exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp, path)
+        except OSError:
+            return None
+        self.reset()
+        return path
+
+
+class _Timer:
+    __slots__ = ('collector', 'name', 'start')
+
+    def __init__(self, collector: Collector, name: str) -> None:
+        self.collector = collector
+        self.name = name
+        self.start = 0
+
+    def __enter__(self) -> _Timer:
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.collector.observe(self.name, time.perf_counter_ns() - self.start)
+
+
+_collector: Collector | None = None
+_collector_lock = threading.Lock()
+
+
+def collector() -> Collector | None:
+    """The process-wide collector, or None unless GSD_STATS is set."""
+    global _collector
+    if not ENABLED:
+        return None
+    if _collector is None:
+        with _collector_lock:
+            if _collector is None:
+                import atexit
+
+                _collector = Collector()
+                atexit.register(_collector.flush)
+    return _collector
+
+
+# =============================================================================
+# REPORTING
+# =============================================================================
+
+def load_stats(directory: str | None = None) -> list[dict[str, Any]]:
+    """Read every flushed stats file."""
+    directory = directory or STATS_DIR
+    try:
+        names = sorted(n for n in os.listdir(directory) if n.endswith('.json'))
+    except OSError:
+        return []
+    sessions = []
+    for name in names:
+        try:
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                sessions.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return sessions
+
+
+def _percentile(histogram: list[int], fraction: float) -> int:
+    """Upper bound (ns) of the bucket holding the given fraction of samples."""
+    target = sum(histogram) * fraction
+    seen = 0
+    for bucket, count in enumerate(histogram):
+        seen += count
+        if count and seen >= target:
+            return 1 << bucket
+    return 0
+
+
+def aggregate(sessions: list[dict[str, Any]]) -> dict[str, Any]:
+    """Merge per-process stats into totals across sessions."""
+    calls: dict[str, int] = {}
+    total_ns: dict[str, int] = {}
+    histograms: dict[str, list[int]] = {}
+    counters: dict[str, int] = {}
+    bytes_read: dict[str, int] = {}
+    cache: dict[str, dict[str, int]] = {}
+    for session in sessions:
+        for name, n in session.get('calls', {}).items():
+            calls[name] = calls.get(name, 0) + n
+        for name, ns in session.get('total_ns', {}).items():
+            total_ns[name] = total_ns.get(name, 0) + ns
+        for name, histogram in session.get('histograms', {}).items():
+            merged = histograms.setdefault(name, [0] * HISTOGRAM_BUCKETS)
+            for bucket, count in enumerate(histogram[:HISTOGRAM_BUCKETS]):
+                merged[bucket] += count
+        for name, n in session.get('counters', {}).items():
+            counters[name] = counters.get(name, 0) + n
+        for source, n in session.get('bytes_read', {}).items():
+            bytes_read[source] = bytes_read.get(source, 0) + n
+        for source, entry in session.get('cache', {}).items():
+            merged_entry = cache.setdefault(source, {'hit': 0, 'miss': 0})
+            merged_entry['hit'] += entry.get('hit', 0)
+            merged_entry['miss'] += entry.get('miss', 0)
+
+    timings = {
+        name: {
+            'calls': n,
+            'mean_us': total_ns.get(name, 0) / n / 1000 if n else 0.0,
+            'p50_us': _percentile(histograms.get(name, []), 0.50) / 1000,
+            'p95_us': _percentile(histograms.get(name, []), 0.95) / 1000,
+            'p99_us': _percentile(histograms.get(name, []), 0.99) / 1000,
+        }
+        for name, n in sorted(calls.items())
+    }
+    return {
+        'sessions': len(sessions),
+        'timings': timings,
+        'counters': dict(sorted(counters.items())),
+        'bytes_read': dict(sorted(bytes_read.items())),
+        'cache': dict(sorted(cache.items())),
+    }
+
+
+def format_report(report: dict[str, Any]) -> str:
+    lines = [f"📊 GSD stats across {report['sessions']} session(s)", ""]
+    if report['timings']:
+        lines.append(f"{'Hook / operation':34} {'calls':>9} {'mean':>10} {'p50':>10} {'p95':>10} {'p99':>10}")
+        for name, t in report['timings'].items():
+            lines.append(f"{name:34} {t['calls']:9} {t['mean_us']:8.1f}us {t['p50_us']:8.1f}us "
+                         f"{t['p95_us']:8.1f}us {t['p99_us']:8.1f}us")
+        lines.append("")
+    if report['cache'] or report['bytes_read']:
+        lines.append(f"{'Source file':34} {'hits':>9} {'misses':>9} {'hit %':>7} {'bytes read':>12}")
+        for source in sorted(set(report['cache']) | set(report['bytes_read'])):
+            entry = report['cache'].get(source, {'hit': 0, 'miss': 0})
+            lookups = entry['hit'] + entry['miss']
+            ratio = f"{100 * entry['hit'] / lookups:6.1f}%" if lookups else "     -"
+            lines.append(f"{source:34} {entry['hit']:9} {entry['miss']:9} {ratio:>7} "
+                         f"{report['bytes_read'].get(source, 0):12}")
+        lines.append("")
+    for name, n in report['counters'].items():
+        lines.append(f"{name:34} {n:9}")
+    return "\n".join(lines).rstrip() + "\n"
+
+
+def clear_stats(directory: str | None = None) -> int:
+    """Delete every flushed stats file; returns how many were removed."""
+    directory = directory or STATS_DIR
+    removed = 0
+    for name in os.listdir(directory) if os.path.isdir(directory) else ():
+        if name.endswith('.json'):
+            os.unlink(os.path.join(directory, name))
+            removed += 1
+    return removed
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: list[str] | None = None) -> int:
+    args = sys.argv[1:] if argv is None else argv
+    if '--reset' in args:
+        print(f"🗑️  Removed {clear_stats()} stats file(s) from {STATS_DIR}")
+        return 0
+    sessions = load_stats()
+    if not sessions:
+        print(f"No GSD stats in {STATS_DIR}. Run kimi/jim with GSD_STATS=1 to record some.")
+        return 0
+    report = aggregate(sessions)
+    if '--json' in args:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_report(report), end='')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+GSD Status Daemon v1.0
+One shared .planning watcher per project for every kimi shell on the machine.
+
+gsd-statusd keeps a gsd_watcher.ContextWatcher (and one parse cache) per
+project root and pushes each new GSDContext to subscribed processes over a
+Unix socket. Patched kimi processes get a gsd_watcher.RemoteWatcher from
+get_watcher() while the socket exists. It behaves like a local watcher, but
+its snapshot is fed by the daemon. If the daemon cannot be reached or goes
+away, the RemoteWatcher continues as a local watcher in the same thread, so
+hooks never notice. `jim` starts the daemon on demand in GSD projects; it
+exits after GSD_STATUSD_IDLE seconds without clients.
+
+Loading this module imports nothing heavy (socket and gsd_watcher are
+imported where used), so jim can call ensure_running() on every launch.
+
+Wire format: frames of a ``!BI`` header (message type, payload length) and
+a payload. Strings are ``!H``-length-prefixed UTF-8, 0xFFFF meaning None;
+a context is ``!BII`` (enabled, todos_total, todos_done) followed by root,
+phase, project and milestone.
+
+Environment:
+    GSD_STATUSD          0 to neither start nor use the daemon
+    GSD_STATUSD_SOCKET   socket path (default $XDG_RUNTIME_DIR/gsd-statusd.sock,
+                         else ~/.kimi/gsd-statusd.sock)
+    GSD_STATUSD_IDLE     seconds without clients before exiting (default 900)
+
+Usage:
+    python3 gsd_statusd.py [serve|status|stop]
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+import gsd_runtime
+from gsd_runtime import EMPTY_CONTEXT, GSDContext
+
+if TYPE_CHECKING:
+    import socket
+
+    import gsd_watcher
+
+STATUSD_VERSION = "1.0.0"
+PROTOCOL_VERSION = 1
+
+DEFAULT_IDLE_TIMEOUT = 900.0
+CONNECT_TIMEOUT = 0.5
+
+MSG_HELLO = 1       # server -> client: protocol version byte
+MSG_SUBSCRIBE = 2   # client -> server: work_dir, todos_file
+MSG_CONTEXT = 3     # server -> client: encoded GSDContext
+MSG_STATS = 4       # client -> server: empty; reply is MSG_STATS with JSON
+MSG_SHUTDOWN = 5    # client -> server: empty
+
+_HEADER = struct.Struct('!BI')
+_STRING_LENGTH = struct.Struct('!H')
+_CONTEXT_HEAD = struct.Struct('!BII')
+_NONE = 0xFFFF
+MAX_FRAME = 64 * 1024
+
+
+def socket_path() -> str:
+    path = os.environ.get('GSD_STATUSD_SOCKET')
+    if path:
+        return path
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, 'gsd-statusd.sock')
+    return os.path.join(os.path.expanduser('~'), '.kimi', 'gsd-statusd.sock')
+
+
+def available() -> bool:
+    """Whether a daemon socket exists (one stat; liveness is checked on connect)."""
+    return os.path.exists(socket_path())
+
+
+# =============================================================================
+# FRAMING
+# =============================================================================
+
+def encode_strings(*values: str | None) -> bytes:
+    parts = []
+    for value in values:
+        if value is None:
+            parts.append(_STRING_LENGTH.pack(_NONE))
+        else:
+            data = value.encode('utf-8')[:_NONE - 1]
+            parts.append(_STRING_LENGTH.pack(len(data)) + data)
+    return b''.join(parts)
+
+
+def decode_strings(data: bytes, count: int, offset: int = 0) -> list[str | None]:
+    values: list[str | None] = []
+    for _ in range(count):
+        (length,) = _STRING_LENGTH.unpack_from(data, offset)
+        offset += _STRING_LENGTH.size
+        if length == _NONE:
+            values.append(None)
+        else:
+            values.append(data[offset:offset + length].decode('utf-8', errors='replace'))
+            offset += length
+    return values
+
+
+def encode_context(context: GSDContext) -> bytes:
+    return (_CONTEXT_HEAD.pack(context.enabled, context.todos_total, context.todos_done)
+            + encode_strings(context.root, context.phase, context.project, context.milestone))
+
+
+def decode_context(data: bytes) -> GSDContext:
+    enabled, total, done = _CONTEXT_HEAD.unpack_from(data)
+    root, phase, project, milestone = decode_strings(data, 4, _CONTEXT_HEAD.size)
+    if not enabled:
+        return EMPTY_CONTEXT
+    return GSDContext(enabled=True, root=root, phase=phase, project=project,
+                      milestone=milestone, todos_total=total, todos_done=done)
+
+
+def send_frame(sock: socket.socket, msg: int, payload: bytes = b'') -> None:
+    sock.sendall(_HEADER.pack(msg, len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise EOFError("connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_frame(sock: socket.socket) -> tuple[int, bytes]:
+    msg, length = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    if length > MAX_FRAME:
+        raise ValueError(f"frame too large: {length}")
+    return msg, _recv_exact(sock, length) if length else b''
+
+
+def connect(path: str | None = None, timeout: float = CONNECT_TIMEOUT) -> socket.socket:
+    """Connect and check the daemon's protocol version."""
+    import socket
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(path or socket_path())
+        msg, payload = recv_frame(sock)
+        if msg != MSG_HELLO or payload[:1] != bytes([PROTOCOL_VERSION]):
+            raise ValueError("gsd-statusd protocol mismatch")
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+# =============================================================================
+# SERVER
+# =============================================================================
+
+class _Client:
+    """One connected process; sends are serialized with the watcher threads."""
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.lock = threading.Lock()
+
+    def send_context(self, context: GSDContext) -> None:
+        with self.lock:
+            try:
+                send_frame(self.sock, MSG_CONTEXT, encode_context(context))
+            except OSError:
+                pass  # the handler thread sees the disconnect
+
+    def send_snapshot(self, watcher: gsd_watcher.ContextWatcher) -> None:
+        # Read under the lock: a listener call for a newer context is then
+        # either already sent or queued behind this one
+        with self.lock:
+            try:
+                send_frame(self.sock, MSG_CONTEXT, encode_context(watcher.snapshot))
+            except OSError:
+                pass
+
+
+class StatusServer:
+    """Shares one ContextWatcher per project root between connected clients."""
+
+    def __init__(self, path: str | None = None, idle_timeout: float | None = None) -> None:
+        self.path = path or socket_path()
+        self.idle_timeout = idle_timeout or gsd_runtime.env_number(
+            'GSD_STATUSD_IDLE', DEFAULT_IDLE_TIMEOUT)
+        self.started = time.time()
+        self._watchers: dict[tuple[str, str | None], list[Any]] = {}
+        self._clients = 0
+        self._idle_since = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    # -- watchers --------------------------------------------------------------
+
+    def _key(self, work_dir: str, todos_file: str | None) -> tuple[str, str | None]:
+        # Shells in different subdirectories of one project share its watcher
+        return gsd_runtime.find_project_root(work_dir) or work_dir, todos_file
+
+    def acquire(self, work_dir: str, todos_file: str | None) -> tuple[Any, gsd_watcher.ContextWatcher]:
+        import gsd_watcher
+
+        key = self._key(work_dir, todos_file)
+        with self._lock:
+            entry = self._watchers.get(key)
+            if entry is None:
+                # Always local: this process is the daemon
+                watcher = gsd_watcher.ContextWatcher(*key).start()
+                entry = self._watchers[key] = [watcher, 0]
+            entry[1] += 1
+            return key, entry[0]
+
+    def release(self, key: tuple[str, str | None]) -> None:
+        with self._lock:
+            entry = self._watchers.get(key)
+            if entry is not None:
+                entry[1] -= 1
+                if entry[1] <= 0:
+                    entry[0].stop()
+                    del self._watchers[key]
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                'version': STATUSD_VERSION,
+                'pid': os.getpid(),
+                'uptime': time.time() - self.started,
+                'clients': self._clients,
+                'projects': {f"{root}|{todos or ''}": entry[1]
+                             for (root, todos), entry in self._watchers.items()},
+            }
+
+    # -- connections -----------------------------------------------------------
+
+    def handle(self, sock: socket.socket) -> None:
+        client = _Client(sock)
+        subscriptions = []
+        with self._lock:
+            self._clients += 1
+        try:
+            send_frame(sock, MSG_HELLO, bytes([PROTOCOL_VERSION]))
+            while True:
+                msg, payload = recv_frame(sock)
+                if msg == MSG_SUBSCRIBE:
+                    work_dir, todos_file = decode_strings(payload, 2)
+                    key, watcher = self.acquire(work_dir or '/', todos_file)
+                    watcher.subscribe(client.send_context)
+                    subscriptions.append((key, watcher))
+                    watcher.wait_ready(1.0)
+                    client.send_snapshot(watcher)
+                elif msg == MSG_STATS:
+                    import json
+
+                    with client.lock:
+                        send_frame(sock, MSG_STATS, json.dumps(self.stats()).encode())
+                elif msg == MSG_SHUTDOWN:
+                    self.shutdown()
+                    return
+        except (OSError, ValueError, EOFError, struct.error):
+            pass
+        finally:
+            for key, watcher in subscriptions:
+                watcher.unsubscribe(client.send_context)
+                self.release(key)
+            sock.close()
+            with self._lock:
+                self._clients -= 1
+                if not self._clients:
+                    self._idle_since = time.monotonic()
+
+    def serve_forever(self) -> None:
+        import socket
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        old_umask = os.umask(0o077)
+        try:
+            sock.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        sock.listen(64)
+        sock.settimeout(min(5.0, self.idle_timeout))
+        try:
+            while not self._stop.is_set():
+                try:
+                    conn, _ = sock.accept()
+                except socket.timeout:
+                    with self._lock:
+                        idle = not self._clients and time.monotonic() - self._idle_since > self.idle_timeout
+                    if idle:
+                        break
+                    continue
+                except OSError:
+                    if self._stop.is_set():
+                        break
+                    raise
+                if self._stop.is_set():
+                    conn.close()
+                    break
+                conn.settimeout(None)
+                # A client that stops reading must not stall a watcher thread
+                conn.setsockopt(socket.SOL_SOCKET, socket.SO_SNDTIMEO, struct.pack('ll', 1, 0))
+                threading.Thread(target=self.handle, args=(conn,), daemon=True,
+                                 name="gsd-statusd-client").start()
+        finally:
+            sock.close()
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            with self._lock:
+                for watcher, _ in self._watchers.values():
+                    watcher.stop()
+                self._watchers.clear()
+
+    def shutdown(self) -> None:
+        import socket
+
+        self._stop.set()
+        # Wake the accept() in serve_forever
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as wake:
+                wake.settimeout(CONNECT_TIMEOUT)
+                wake.connect(self.path)
+        except OSError:
+            pass
+
+
+# =============================================================================
+# LIFECYCLE
+# =============================================================================
+
+def _lock_file(path: str) -> int | None:
+    """Hold an exclusive lock next to the socket; None if another daemon has it."""
+    import fcntl
+
+    fd = os.open(path + '.lock', os.O_CREAT | os.O_RDWR, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def serve(path: str | None = None) -> int:
+    path = path or socket_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lock = _lock_file(path)
+    if lock is None:
+        return 0  # already running
+    try:
+        StatusServer(path).serve_forever()
+    finally:
+        os.close(lock)
+    return 0
+
+
+def ensure_running() -> bool:
+    """Start the daemon in the background unless one holds its lock.
+
+    Costs one flock() while the daemon is up. The double fork keeps the
+    daemon from becoming a child (and later a zombie) of the kimi process
+    that jim execs into.
+    """
+    if os.environ.get('GSD_STATUSD', '') == '0':
+        return False
+    path = socket_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        lock = _lock_file(path)
+    except OSError:
+        return False
+    if lock is None:
+        return False
+    os.close(lock)
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.setsid()
+            if os.fork() == 0:
+                devnull = os.open(os.devnull, os.O_RDWR)
+                for fd in (0, 1, 2):
+                    os.dup2(devnull, fd)
+                os.execv(sys.executable, [sys.executable, os.path.abspath(__file__), 'serve'])
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    return True
+
+
+def request(msg: int) -> dict[str, Any] | None:
+    """Send a control message; returns the JSON reply for MSG_STATS."""
+    sock = connect()
+    try:
+        send_frame(sock, msg)
+        if msg != MSG_STATS:
+            return None
+        reply, payload = recv_frame(sock)
+        import json
+
+        return json.loads(payload) if reply == MSG_STATS else None
+    finally:
+        sock.close()
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: list[str] | None = None) -> int:
+    args = sys.argv[1:] if argv is None else argv
+    action = args[0] if args else 'status'
+    if action == 'serve':
+        return serve()
+    try:
+        if action == 'stop':
+            request(MSG_SHUTDOWN)
+            print("🛑 gsd-statusd stopped")
+        elif action == 'status':
+            stats = request(MSG_STATS) or {}
+            print(f"✅ gsd-statusd {stats.get('version')} (pid {stats.get('pid')}) on {socket_path()}")
+            print(f"   {stats.get('clients', 0)} client(s), up {stats.get('uptime', 0):.0f}s")
+            for project, subscribers in stats.get('projects', {}).items():
+                print(f"   {subscribers:3}  {project.rstrip('|')}")
+        else:
+            print(f"Unknown action: {action} (expected serve, status or stop)")
+            return 2
+    except (OSError, ValueError, EOFError, struct.error):
+        print(f"⚪ gsd-statusd is not running ({socket_path()})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+GSD Sweep v1.0
+Status of many GSD projects at once, for `jim status --all`.
+
+Each root (or every directory matched by a glob) is resolved with
+gsd_runtime, the loader the patched toolbar uses, so phase, milestone and
+todo counts are exactly what a kimi session in that project would show.
+ROADMAP.md checkbox completion is added on top. Projects are loaded in
+parallel across a process pool; each worker uses its own runtime cache.
+
+Roots come from the command line, else from GSD_PROJECTS
+(os.pathsep-separated roots or globs), else every directory directly
+under the current one.
+
+Environment:
+    GSD_PROJECTS   default roots/globs for `jim status --all`
+
+Usage:
+    jim status                                   # the current project
+    jim status --all [ROOT|GLOB ...] [--json] [--jobs N]
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import os
+import sys
+from typing import Any
+
+import gsd_runtime
+
+SWEEP_VERSION = "1.0.0"
+
+# Below this many projects the pool costs more than it saves
+MIN_POOL_PROJECTS = 8
+MAX_JOBS = 16
+
+COLUMNS = ('project', 'phase', 'milestone', 'todos_done', 'todos_total',
+           'roadmap_done', 'roadmap_total', 'root')
+
+
+# =============================================================================
+# PROJECTS
+# =============================================================================
+
+def _is_glob(arg: str) -> bool:
+    return any(char in arg for char in '*?[')
+
+
+def expand_roots(args: list[str]) -> list[tuple[str, bool]]:
+    """(directory, explicit) for each argument; globs expand to their matches.
+
+    Explicitly named directories are resolved like a kimi session started
+    in them (the .planning may be in a parent) and reported even without one.
+    A directory matched by a glob is a project only if it has a .planning of
+    its own, so a plain subdirectory of a project is not reported as it.
+    """
+    dirs: list[tuple[str, bool]] = []
+    for arg in args:
+        arg = os.path.expanduser(arg)
+        if _is_glob(arg):
+            dirs.extend((path, False) for path in sorted(glob.glob(arg, recursive=True))
+                        if os.path.isdir(os.path.join(path, gsd_runtime.PLANNING_DIR)))
+        else:
+            dirs.append((arg, True))
+    return dirs
+
+
+def project_status(work_dir: str) -> dict[str, Any]:
+    """One status row for the project containing work_dir (picklable)."""
+    root = gsd_runtime.find_project_root(work_dir)
+    if root is None:
+        return {'root': os.path.abspath(work_dir), 'error': 'no .planning'}
+    ctx = gsd_runtime.get_context(root, gsd_runtime.project_todos_file(root))
+    try:
+        roadmap_total, roadmap_done = gsd_runtime.parse_checkboxes(
+            os.path.join(root, gsd_runtime.PLANNING_DIR, gsd_runtime.ROADMAP_FILE))
+    except OSError:
+        roadmap_total = roadmap_done = 0
+    return {
+        'project': ctx.project or os.path.basename(root),
+        'phase': ctx.phase,
+        'milestone': ctx.milestone,
+        'todos_done': ctx.todos_done,
+        'todos_total': ctx.todos_total,
+        'roadmap_done': roadmap_done,
+        'roadmap_total': roadmap_total,
+        'root': root,
+    }
+
+
+def _safe_status(work_dir: str) -> dict[str, Any]:
+    try:
+        return project_status(work_dir)
+    except Exception as e:
+        return {'root': os.path.abspath(work_dir), 'error': f"{type(e).__name__}: {e}"}
+
+
+def sweep(dirs: list[tuple[str, bool]], jobs: int | None = None) -> list[dict[str, Any]]:
+    """Status rows for dirs, in order, one per distinct project root."""
+    paths = [path for path, _ in dirs]
+    jobs = min(jobs or os.cpu_count() or 1, MAX_JOBS, len(paths))
+    if jobs > 1 and len(paths) >= MIN_POOL_PROJECTS:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # fork: workers inherit the imported runtime instead of re-importing it
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        with ProcessPoolExecutor(jobs, mp_context=context) as pool:
+            rows = list(pool.map(_safe_status, paths,
+                                 chunksize=max(1, len(paths) // (jobs * 4))))
+    else:
+        rows = [_safe_status(path) for path in paths]
+
+    seen: set[str] = set()
+    result = []
+    for (_, explicit), row in zip(dirs, rows):
+        if 'error' in row and not explicit:
+            continue
+        if row['root'] in seen:
+            continue
+        seen.add(row['root'])
+        result.append(row)
+    return result
+
+
+# =============================================================================
+# OUTPUT
+# =============================================================================
+
+def _fraction(done: int, total: int) -> str:
+    return f"{done}/{total}" if total else "-"
+
+
+def format_table(rows: list[dict[str, Any]]) -> str:
+    table = [('PROJECT', 'PHASE', 'MILESTONE', 'TODOS', 'ROADMAP', 'ROOT')]
+    for row in rows:
+        if 'error' in row:
+            table.append(('-', '-', row['error'], '-', '-', row['root']))
+            continue
+        roadmap = _fraction(row['roadmap_done'], row['roadmap_total'])
+        if row['roadmap_total']:
+            roadmap += f" ({100 * row['roadmap_done'] // row['roadmap_total']}%)"
+        table.append((row['project'], row['phase'] or '-', row['milestone'] or '-',
+                      _fraction(row['todos_done'], row['todos_total']), roadmap, row['root']))
+    # Width in terminal cells, so emoji and CJK project names stay aligned
+    widths = [max(gsd_runtime.display_width(line[i]) for line in table)
+              for i in range(len(table[0]) - 1)]
+    lines = []
+    for line in table:
+        cells = [cell + ' ' * (width - gsd_runtime.display_width(cell))
+                 for cell, width in zip(line, widths)]
+        lines.append('  '.join(cells + [line[-1]]))
+    return "\n".join(lines) + "\n"
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='jim status',
+                                     description='GSD status of one or many projects.')
+    parser.add_argument('roots', nargs='*', help='project directories or globs')
+    parser.add_argument('--all', action='store_true',
+                        help='sweep many projects (default: $GSD_PROJECTS or ./*)')
+    parser.add_argument('--json', action='store_true', help='one JSON object per line')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='worker processes (default: number of CPUs)')
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    roots = args.roots
+    if not roots and args.all:
+        configured = os.environ.get('GSD_PROJECTS', '')
+        roots = [r for r in configured.split(os.pathsep) if r] or [os.path.join(os.curdir, '*')]
+    if not roots:
+        roots = [os.curdir]
+    rows = sweep(expand_roots(roots), args.jobs)
+
+    if args.json:
+        for row in rows:
+            print(json.dumps(row))
+    elif rows:
+        print(format_table(rows), end='')
+    else:
+        print(f"No GSD projects found in {' '.join(roots)}")
+    return 1 if any('error' in row for row in rows) or not rows else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+GSD Todo Store v1.0
+Append-only todo log with an O(1) progress summary.
+
+A todo list ``X.json`` (a JSON array of ``{"title": ..., "done": ...}``) is
+accompanied by ``X.jsonl``, an append-only event log of changes made through
+this store. Its first line records the sha256 of the ``X.json`` it was
+started on, and its events only apply while ``X.json`` still has that
+content. A ``touch``, a checkout or an editor save that leaves the content
+alone does not orphan the log.
+
+Every write appends one event and rewrites a 40-byte summary record with the
+total/done counts under ~/.kimi/cache/todos/, so the status bar normally
+only reads that record. The log is periodically compacted back into
+``X.json``, so other tools keep seeing a plain JSON array.
+
+Readers never write. When the summary is missing or does not match the stat
+signatures of ``X.json`` and the log, the counts are computed in memory from
+both files. Nothing is created, and the log is never truncated. Only writers,
+which hold the store lock, rewrite the summary or fold and discard the log.
+A log whose base no longer matches ``X.json`` (the JSON was rewritten
+elsewhere) is moved aside to ``X.jsonl.orphaned`` by the next writer, not
+deleted.
+
+The summary is only kept current by TodoStore writers. When kimi (or any
+other tool) rewrites ``X.json`` directly, the recorded signature no longer
+matches and every status bar read takes the slow path above until the next
+TodoStore write or ``refresh_summary()``.
+
+Environment:
+    GSD_TODOS_CACHE   summary/lock directory (default ~/.kimi/cache/todos)
+
+Usage:
+    python3 gsd_todos.py [--file PATH] [list|add TITLE|done N|undo N|remove N|compact]
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import struct
+import sys
+import threading
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+TODOS_VERSION = "1.0.0"
+
+LOG_SUFFIX = ".jsonl"
+ORPHAN_SUFFIX = ".orphaned"
+SUMMARY_SUFFIX = ".summary"
+COMPACT_LOG_BYTES = 64 * 1024
+CACHE_DIR = os.environ.get('GSD_TODOS_CACHE') or os.path.join(
+    os.path.expanduser('~'), '.kimi', 'cache', 'todos')
+
+# magic, version, reserved, total, done, json mtime_ns, json size, log size
+SUMMARY_FORMAT = struct.Struct('<4sHHIIqqq')
+SUMMARY_MAGIC = b'GSDT'
+SUMMARY_VERSION = 2
+
+
+def log_path(path: str) -> str:
+    """Event log belonging to a todo JSON file."""
+    root, ext = os.path.splitext(path)
+    return (root if ext == '.json' else path) + LOG_SUFFIX
+
+
+def summary_path(path: str) -> str:
+    """Summary record of a todo JSON file, in the cache directory."""
+    key = hashlib.sha256(os.fsencode(os.path.abspath(path))).hexdigest()[:24]
+    return os.path.join(CACHE_DIR, key + SUMMARY_SUFFIX)
+
+
+def _json_key(path: str) -> tuple[int, int]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (0, 0)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def _is_done(todo: Any) -> bool:
+    return bool(todo.get('done')) if isinstance(todo, dict) else False
+
+
+def _count(todos: list[Any]) -> tuple[int, int]:
+    return len(todos), sum(1 for t in todos if _is_done(t))
+
+
+# =============================================================================
+# FILES
+# =============================================================================
+
+def _read_json(path: str) -> tuple[list[Any], str]:
+    """(todos, sha256 of the file's bytes); a missing file is an empty list."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return [], hashlib.sha256(b'').hexdigest()
+    todos = json.loads(data) if data.strip() else []
+    if not isinstance(todos, list):
+        raise ValueError(f"{path}: expected a JSON array")
+    return todos, hashlib.sha256(data).hexdigest()
+
+
+def _read_log(path: str) -> tuple[str | None, list[dict[str, Any]]] | None:
+    """(base sha256, events) of a log, or None when there is no log.
+
+    A log without a base line (written by an earlier revision) has base None
+    and is applied as is, so its events are never silently dropped.
+    """
+    try:
+        with open(log_path(path), encoding='utf-8') as f:
+            lines = [line for line in f if line.strip()]
+    except FileNotFoundError:
+        return None
+    base = None
+    events = []
+    for i, line in enumerate(lines):
+        try:
+            event = json.loads(line)
+        except ValueError:
+            if i == len(lines) - 1:
+                break  # a torn final append
+            raise
+        if i == 0 and event.get('op') == 'base':
+            base = event.get('sha256')
+        else:
+            events.append(event)
+    return base, events
+
+
+def _materialize(path: str) -> tuple[list[Any], str, bool]:
+    """(todos, JSON sha256, whether an existing log does not apply)."""
+    todos, digest = _read_json(path)
+    log = _read_log(path)
+    if log is None:
+        return todos, digest, False
+    base, events = log
+    if base is not None and base != digest:
+        return todos, digest, True
+    for event in events:
+        _apply(todos, event)
+    return todos, digest, False
+
+
+# =============================================================================
+# SUMMARY
+# =============================================================================
+
+def read_summary(path: str) -> tuple[int, int, tuple[int, int], int] | None:
+    """Return (total, done, json_key, log_size) from the summary, if valid."""
+    try:
+        with open(summary_path(path), 'rb') as f:
+            data = f.read(SUMMARY_FORMAT.size)
+    except OSError:
+        return None
+    if len(data) != SUMMARY_FORMAT.size:
+        return None
+    magic, version, _, total, done, mtime_ns, size, log_size = SUMMARY_FORMAT.unpack(data)
+    if magic != SUMMARY_MAGIC or version != SUMMARY_VERSION:
+        return None
+    return total, done, (mtime_ns, size), log_size
+
+
+def write_summary(path: str, total: int, done: int, json_key: tuple[int, int], log_size: int) -> None:
+    """Atomically replace the summary record (writers only)."""
+    target = summary_path(path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(SUMMARY_FORMAT.pack(SUMMARY_MAGIC, SUMMARY_VERSION, 0, total, done,
+                                    json_key[0], json_key[1], log_size))
+    os.replace(tmp, target)
+
+
+def read_counts(path: str) -> tuple[int, int]:
+    """Return (total, done) for a todo file without writing anything.
+
+    O(1) when the summary matches the JSON file and log; otherwise both are
+    parsed in memory.
+    """
+    summary = read_summary(path)
+    if summary is not None:
+        total, done, recorded_key, log_size = summary
+        if recorded_key == _json_key(path) and log_size == _file_size(log_path(path)):
+            return total, done
+    return _count(_materialize(path)[0])
+
+
+# =============================================================================
+# STORE
+# =============================================================================
+
+class TodoStore:
+    """Read/write access to a todo list through its append-only log."""
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = os.fspath(path)
+        self.log_path = log_path(self.path)
+        self.summary_path = summary_path(self.path)
+        self._lock = threading.Lock()
+
+    # -- reading -------------------------------------------------------------
+
+    def load(self) -> list[Any]:
+        """Materialize the current todo list (JSON base plus log events)."""
+        return _materialize(self.path)[0]
+
+    def counts(self) -> tuple[int, int]:
+        return read_counts(self.path)
+
+    def refresh_summary(self) -> tuple[int, int]:
+        """Recount from JSON and log and rewrite the summary record."""
+        with self._locked():
+            total, done = _count(self.load())
+            write_summary(self.path, total, done, _json_key(self.path),
+                          _file_size(self.log_path))
+            return total, done
+
+    # -- writing -------------------------------------------------------------
+
+    def add(self, title: str, done: bool = False, **fields: Any) -> int:
+        """Append a todo and return its index."""
+        todo = {'title': title, 'done': done, **fields}
+        todos = self._write({'op': 'add', 'todo': todo})
+        return len(todos) - 1
+
+    def set_done(self, index: int, done: bool = True) -> None:
+        self._write({'op': 'update', 'index': index, 'done': done})
+
+    def remove(self, index: int) -> None:
+        self._write({'op': 'remove', 'index': index})
+
+    def replace(self, todos: list[Any]) -> None:
+        self._write({'op': 'set', 'todos': todos})
+
+    def compact(self) -> None:
+        """Fold the log into the JSON file and start a fresh log."""
+        with self._locked():
+            todos, _, orphaned = _materialize(self.path)
+            if orphaned:
+                self._orphan_log()
+            self._compact(todos)
+
+    def _write(self, event: dict[str, Any]) -> list[Any]:
+        with self._locked():
+            todos, digest, orphaned = _materialize(self.path)
+            if orphaned:
+                # X.json was rewritten elsewhere: it is the new base
+                self._orphan_log()
+            _apply(todos, event)
+            lines = [json.dumps(event, separators=(',', ':')) + '\n']
+            if not os.path.exists(self.log_path):
+                lines.insert(0, json.dumps({'op': 'base', 'sha256': digest},
+                                           separators=(',', ':')) + '\n')
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(lines))
+            log_size = _file_size(self.log_path)
+            if log_size > COMPACT_LOG_BYTES:
+                self._compact(todos)
+            else:
+                total, done = _count(todos)
+                self._write_summary(total, done, log_size)
+            return todos
+
+    def _compact(self, todos: list[Any]) -> None:
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(todos, f, indent=2)
+        os.replace(tmp, self.path)
+        # Everything in the log is now part of X.json
+        try:
+            os.unlink(self.log_path)
+        except FileNotFoundError:
+            pass
+        total, done = _count(todos)
+        self._write_summary(total, done, 0)
+
+    def _orphan_log(self) -> None:
+        os.replace(self.log_path, self.log_path + ORPHAN_SUFFIX)
+
+    def _write_summary(self, total: int, done: int, log_size: int) -> None:
+        # The summary is a cache: the JSON file and log stay authoritative
+        try:
+            write_summary(self.path, total, done, _json_key(self.path), log_size)
+        except OSError:
+            pass
+
+    def _locked(self) -> _StoreLock:
+        return _StoreLock(self)
+
+
+class _StoreLock:
+    """Thread lock plus an advisory flock shared with other processes.
+
+    The lock file lives next to the summary in the cache directory, never in
+    the project.
+    """
+
+    def __init__(self, store: TodoStore) -> None:
+        self.store = store
+        self._fd: int | None = None
+
+    def __enter__(self) -> _StoreLock:
+        self.store._lock.acquire()
+        if fcntl is not None:
+            try:
+                os.makedirs(os.path.dirname(self.store.summary_path), exist_ok=True)
+                self._fd = os.open(self.store.summary_path + '.lock', os.O_CREAT | os.O_RDWR, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except OSError:
+                self._fd = None
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self.store._lock.release()
+
+
+def _apply(todos: list[Any], event: dict[str, Any]) -> None:
+    """Apply one log event to a materialized todo list in place."""
+    op = event.get('op')
+    if op == 'add':
+        todos.append(event['todo'])
+    elif op == 'update':
+        index = event['index']
+        if 0 <= index < len(todos) and isinstance(todos[index], dict):
+            todos[index]['done'] = event['done']
+    elif op == 'remove':
+        index = event['index']
+        if 0 <= index < len(todos):
+            del todos[index]
+    elif op == 'set':
+        todos[:] = event['todos']
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="GSD todo store")
+    parser.add_argument("--file", default=".kimi-todos.json", help="Todo JSON file (default: .kimi-todos.json)")
+    parser.add_argument("action", nargs="?", default="list",
+                        choices=["list", "add", "done", "undo", "remove", "compact"])
+    parser.add_argument("value", nargs="?", help="Title for add, index for done/undo/remove")
+    args = parser.parse_args()
+
+    store = TodoStore(args.file)
+    try:
+        if args.action == "add":
+            if not args.value:
+                parser.error("add requires a title")
+            print(f"✅ Added #{store.add(args.value)}: {args.value}")
+        elif args.action in ("done", "undo", "remove"):
+            if args.value is None or not args.value.isdigit():
+                parser.error(f"{args.action} requires a todo index")
+            if args.action == "remove":
+                store.remove(int(args.value))
+            else:
+                store.set_done(int(args.value), args.action == "done")
+        elif args.action == "compact":
+            store.compact()
+        else:
+            for i, todo in enumerate(store.load()):
+                mark = "x" if _is_done(todo) else " "
+                title = todo.get('title', '') if isinstance(todo, dict) else todo
+                print(f"{i:3} [{mark}] {title}")
+        total, done = store.counts()
+        print(f"📋 {os.path.basename(args.file)}: {done}/{total} done")
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
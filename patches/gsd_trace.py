@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+GSD Trace v1.0
+Startup timeline for `jim --trace-startup`.
+
+One launch is recorded into a Chrome trace (chrome://tracing, Perfetto):
+
+- jim's own stages, timed with a gsd_stats Collector
+- the GSD hooks timed inside kimi, up to the first toolbar render; GSD_STATS
+  is forced on for the child and pointed at a private directory
+- kimi's ``-X importtime`` report, as a nested import tree plus self time
+  aggregated per top-level package
+
+Every timestamp comes from time.monotonic_ns(), which is system-wide, so the
+samples of both processes land on one timeline. The import tree carries
+durations only; it is laid out back to back from the moment kimi is spawned.
+
+Usage:
+    jim --trace-startup[=PATH] [kimi-cli-args...]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+TRACE_VERSION = "1.0.0"
+
+TRACE_DIR = os.path.join(os.path.expanduser('~'), '.kimi', 'gsd-traces')
+IMPORTTIME_PREFIX = "import time:"
+# The toolbar hook runs on every prompt render; its first call is the prompt
+FIRST_PROMPT = 'prompt._get_gsd_context'
+TOP_IMPORTS = 10
+
+JIM_TID = 1
+KIMI_TID = 2
+IMPORTS_TID = 3
+
+
+# =============================================================================
+# IMPORT TIME
+# =============================================================================
+
+@dataclass
+class ImportNode:
+    """One line of a -X importtime report with the imports it triggered."""
+    name: str
+    self_us: int
+    cumulative_us: int
+    children: list[ImportNode] = field(default_factory=list)
+
+
+def parse_importtime(lines: list[str]) -> list[ImportNode]:
+    """Rebuild the import tree from -X importtime lines.
+
+    Lines are reported when an import finishes, so children precede their
+    parent; the indentation of the name gives the nesting depth.
+    """
+    pending: dict[int, list[ImportNode]] = {}
+    for line in lines:
+        if not line.startswith(IMPORTTIME_PREFIX):
+            continue
+        parts = line[len(IMPORTTIME_PREFIX):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # the header line
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        node = ImportNode(name.strip(), int(parts[0]), int(parts[1]),
+                          pending.pop(depth + 1, []))
+        pending.setdefault(depth, []).append(node)
+    return pending.get(0, [])
+
+
+def import_totals(roots: list[ImportNode]) -> dict[str, int]:
+    """Self time (us) per top-level package, largest first."""
+    totals: dict[str, int] = {}
+    stack = list(roots)
+    while stack:
+        node = stack.pop()
+        package = node.name.partition(".")[0]
+        totals[package] = totals.get(package, 0) + node.self_us
+        stack.extend(node.children)
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def import_events(roots: list[ImportNode], start_us: float, pid: int) -> list[dict[str, Any]]:
+    """Complete events for the import tree, siblings laid out back to back."""
+    events = []
+    stack = []
+    offset = start_us
+    for node in roots:
+        stack.append((node, offset))
+        offset += node.cumulative_us
+    while stack:
+        node, ts = stack.pop()
+        events.append({
+            'name': node.name, 'cat': 'import', 'ph': 'X', 'ts': ts,
+            'dur': node.cumulative_us, 'pid': pid, 'tid': IMPORTS_TID,
+            'args': {'self_us': node.self_us},
+        })
+        for child in node.children:
+            stack.append((child, ts))
+            ts += child.cumulative_us
+    return events
+
+
+# =============================================================================
+# TIMELINE
+# =============================================================================
+
+def _samples(session: dict[str, Any]) -> list[tuple[int, str, int]]:
+    """(end_ns, name, elapsed_ns) samples of one stats session, oldest first."""
+    samples = {(end, name, elapsed) for end, name, elapsed in session.get('ring', [])}
+    samples.update((end, name, elapsed) for name, (end, elapsed) in session.get('first', {}).items())
+    return sorted(samples)
+
+
+def _first_prompt(samples: list[tuple[int, str, int]]) -> int | None:
+    return next((end for end, name, _ in samples if name == FIRST_PROMPT), None)
+
+
+def build_trace(sessions: list[dict[str, Any]], imports: list[ImportNode],
+                origin_ns: int, spawn_ns: int | None, jim_pid: int,
+                kimi_pid: int | None) -> dict[str, Any]:
+    """Assemble the Chrome trace; timestamps are us since jim started."""
+    def us(ns: int) -> float:
+        return (ns - origin_ns) / 1000
+
+    events: list[dict[str, Any]] = [
+        {'name': 'process_name', 'ph': 'M', 'pid': jim_pid, 'args': {'name': 'jim'}},
+        {'name': 'thread_name', 'ph': 'M', 'pid': jim_pid, 'tid': JIM_TID, 'args': {'name': 'jim'}},
+    ]
+    end_ns = spawn_ns or time.monotonic_ns()
+    events.append({'name': 'jim', 'cat': 'jim', 'ph': 'X', 'ts': 0.0,
+                   'dur': us(end_ns), 'pid': jim_pid, 'tid': JIM_TID})
+
+    first_prompt = None
+    for session in sessions:
+        samples = _samples(session)
+        is_jim = session.get('pid') == jim_pid
+        if not is_jim:
+            first_prompt = _first_prompt(samples)
+            if first_prompt is not None:
+                # Startup ends at the first prompt; later renders are the session
+                samples = [s for s in samples if s[0] <= first_prompt]
+        for end, name, elapsed in samples:
+            events.append({
+                'name': name, 'cat': 'jim' if is_jim else 'hook', 'ph': 'X',
+                'ts': us(end - elapsed), 'dur': elapsed / 1000,
+                'pid': jim_pid if is_jim else kimi_pid,
+                'tid': JIM_TID if is_jim else KIMI_TID,
+            })
+
+    summary: dict[str, Any] = {'version': TRACE_VERSION}
+    if kimi_pid is not None and spawn_ns is not None:
+        events += [
+            {'name': 'process_name', 'ph': 'M', 'pid': kimi_pid, 'args': {'name': 'kimi'}},
+            {'name': 'thread_name', 'ph': 'M', 'pid': kimi_pid, 'tid': KIMI_TID,
+             'args': {'name': 'kimi'}},
+            {'name': 'thread_name', 'ph': 'M', 'pid': kimi_pid, 'tid': IMPORTS_TID,
+             'args': {'name': 'imports (-X importtime, back to back)'}},
+        ]
+        events += import_events(imports, us(spawn_ns), kimi_pid)
+        summary['spawn_ms'] = us(spawn_ns) / 1000
+        summary['import_ms'] = sum(node.cumulative_us for node in imports) / 1000
+        summary['import_packages_ms'] = {
+            package: total / 1000 for package, total in import_totals(imports).items()}
+        if first_prompt is not None:
+            events.append({'name': 'first prompt', 'ph': 'i', 's': 'g',
+                           'ts': us(first_prompt), 'pid': kimi_pid, 'tid': KIMI_TID})
+            events.append({'name': 'kimi startup', 'cat': 'kimi', 'ph': 'X',
+                           'ts': us(spawn_ns), 'dur': (first_prompt - spawn_ns) / 1000,
+                           'pid': kimi_pid, 'tid': KIMI_TID})
+            summary['first_prompt_ms'] = us(first_prompt) / 1000
+
+    return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': summary}
+
+
+def format_summary(trace: dict[str, Any], path: str) -> str:
+    """Stage offsets and the heaviest import packages, for the terminal."""
+    summary = trace['otherData']
+    lines = [f"⏱️  Startup trace: {path}", "   (open in chrome://tracing or https://ui.perfetto.dev)"]
+    stages = sorted((e for e in trace['traceEvents']
+                     if e['ph'] == 'X' and e.get('cat') in ('jim', 'hook', 'kimi')),
+                    key=lambda e: e['ts'])
+    for event in stages:
+        lines.append(f"   +{event['ts'] / 1000:9.1f} ms  {event['name']:32} {event['dur'] / 1000:9.1f} ms")
+    if 'import_ms' in summary:
+        lines.append(f"   kimi imports: {summary['import_ms']:.1f} ms cumulative")
+        top = list(summary['import_packages_ms'].items())[:TOP_IMPORTS]
+        for package, total in top:
+            lines.append(f"      {package:30} {total:9.1f} ms")
+    if 'first_prompt_ms' in summary:
+        lines.append(f"   first prompt at +{summary['first_prompt_ms']:.1f} ms")
+    return "\n".join(lines) + "\n"
+
+
+# =============================================================================
+# TRACED LAUNCH
+# =============================================================================
+
+def importtime_command(cmd: list[str]) -> tuple[list[str], dict[str, str]]:
+    """Command and extra environment that make kimi report its import times.
+
+    `kimi` is a console script, so its interpreter is run with -X importtime
+    directly; unlike PYTHONPROFILEIMPORTTIME this is not inherited by the
+    Python tools kimi itself starts.
+    """
+    import shlex
+    import shutil
+
+    script = shutil.which(cmd[0])
+    if script:
+        try:
+            with open(script, 'rb') as f:
+                shebang = f.readline().decode(errors='replace')
+        except OSError:
+            shebang = ''
+        if shebang.startswith('#!') and 'python' in shebang:
+            return shlex.split(shebang[2:].strip()) + ['-X', 'importtime', script] + cmd[1:], {}
+    return cmd, {'PYTHONPROFILEIMPORTTIME': '1'}
+
+
+class StartupTrace:
+    """Collects one traced jim launch and writes it out."""
+
+    def __init__(self, output: str | None = None) -> None:
+        import tempfile
+
+        self.origin_ns = time.monotonic_ns()
+        self.output = output or os.path.join(
+            TRACE_DIR, time.strftime("startup-%Y%m%d-%H%M%S.json"))
+        self.stats_dir = tempfile.mkdtemp(prefix="gsd-trace-")
+        self.spawn_ns: int | None = None
+        self.kimi_pid: int | None = None
+        self.import_lines: list[str] = []
+        # Must happen before gsd_stats is imported (here or in kimi)
+        os.environ['GSD_STATS'] = '1'
+        os.environ['GSD_STATS_DIR'] = self.stats_dir
+
+    def run(self, cmd: list[str]) -> int:
+        """Run kimi as a child (not exec) so its import times can be read."""
+        import signal
+        import subprocess
+
+        cmd, env = importtime_command(cmd)
+        self.spawn_ns = time.monotonic_ns()
+        try:
+            child = subprocess.Popen(cmd, stderr=subprocess.PIPE, env={**os.environ, **env})
+        except OSError as e:
+            print(f"❌ Failed to launch kimi: {e}")
+            self.spawn_ns = None
+            self.finish()
+            return 127 if isinstance(e, FileNotFoundError) else 126
+        self.kimi_pid = child.pid
+        reader = threading.Thread(target=self._read_stderr, args=(child.stderr,), daemon=True)
+        reader.start()
+        # Ctrl-C belongs to kimi; jim only waits for it (set after the
+        # spawn so kimi does not inherit the ignored disposition)
+        previous = signal.signal(signal.SIGINT, signal.SIG_IGN)
+        try:
+            returncode = child.wait()
+        finally:
+            signal.signal(signal.SIGINT, previous)
+        reader.join(timeout=5)
+        self.finish()
+        return returncode
+
+    def _read_stderr(self, stream: Any) -> None:
+        # importtime lines are collected; anything else is kimi's own stderr
+        for raw in stream:
+            line = raw.decode(errors='replace')
+            if line.startswith(IMPORTTIME_PREFIX):
+                self.import_lines.append(line)
+            else:
+                sys.stderr.write(line)
+                sys.stderr.flush()
+
+    def finish(self) -> str | None:
+        """Write the trace file, print the summary and drop the stats directory."""
+        import shutil
+        import gsd_stats
+
+        collector = gsd_stats.collector()
+        if collector is not None:
+            collector.flush(self.stats_dir)
+        trace = build_trace(gsd_stats.load_stats(self.stats_dir),
+                            parse_importtime(self.import_lines), self.origin_ns,
+                            self.spawn_ns, os.getpid(), self.kimi_pid)
+        shutil.rmtree(self.stats_dir, ignore_errors=True)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.output)), exist_ok=True)
+            with open(self.output, 'w', encoding='utf-8') as f:
+                json.dump(trace, f)
+        except OSError as e:
+            print(f"❌ Could not write startup trace: {e}")
+            return None
+        print(format_summary(trace, self.output), end='')
+        return self.output
@@ -0,0 +1,359 @@
+"""
+GSD Watcher v1.0
+Background .planning watcher for a patched Kimi CLI.
+
+A watcher thread owns all filesystem access for one project: it reloads the
+context through gsd_runtime whenever inotify (via ctypes, Linux only) reports
+a change to .planning/, the todo file or a directory searched for .planning,
+or on a polling interval elsewhere. When gsd-statusd is running, get_watcher()
+hands out a RemoteWatcher instead, which receives the same
+snapshots from the daemon's shared watcher (see gsd_statusd.py).
+The result is published as an immutable GSDContext on ``watcher.snapshot`` so
+render paths read it with a single attribute load and never touch the disk.
+
+Environment:
+    GSD_WATCH_MODE      auto (default), inotify or poll
+    GSD_POLL_INTERVAL   seconds between polls in poll mode (default 1.0)
+    GSD_STATUSD         0 to never use gsd-statusd
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import socket
+import struct
+import sys
+import threading
+from typing import Callable
+
+import gsd_runtime
+import gsd_stats
+import gsd_statusd
+import gsd_todos
+from gsd_runtime import EMPTY_CONTEXT, GSDContext
+
+WATCHER_VERSION = "1.0.0"
+
+DEFAULT_POLL_INTERVAL = 1.0
+# Even with inotify, re-stat occasionally to catch changes it cannot see
+# (network filesystems, a todo directory created after startup).
+INOTIFY_RESCAN_INTERVAL = 30.0
+# Editors and executors write files in bursts; collapse them into one reload
+DEBOUNCE_SECONDS = 0.05
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+Listener = Callable[[GSDContext], None]
+
+
+# =============================================================================
+# INOTIFY
+# =============================================================================
+
+def _load_libc() -> ctypes.CDLL | None:
+    """Return libc with inotify symbols, or None where unavailable."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class Inotify:
+    """Minimal ctypes wrapper around a non-blocking inotify descriptor."""
+
+    def __init__(self, libc: ctypes.CDLL) -> None:
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int | None:
+        """Watch a directory; returns the watch descriptor or None on failure."""
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        return wd if wd >= 0 else None
+
+    def read_events(self, timeout: float | None) -> list[tuple[int, int, str]]:
+        """Wait up to timeout for events and return (wd, mask, name) tuples."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return []
+            raise
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode(errors='replace')
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self) -> None:
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+# =============================================================================
+# WATCHER
+# =============================================================================
+
+class ContextWatcher:
+    """Keeps an up-to-date GSDContext for one project on a background thread."""
+
+    def __init__(self, work_dir: str, todos_file: str | None = None,
+                 mode: str | None = None, poll_interval: float | None = None) -> None:
+        self.work_dir = work_dir
+        self.todos_file = todos_file
+        self.snapshot: GSDContext = EMPTY_CONTEXT
+        self.mode = mode or os.environ.get('GSD_WATCH_MODE', 'auto')
+        self.poll_interval = poll_interval or gsd_runtime.env_number(
+            'GSD_POLL_INTERVAL', DEFAULT_POLL_INTERVAL)
+        self._listeners: list[Listener] = []
+        self._stats = gsd_stats.collector()
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # -- public --------------------------------------------------------------
+
+    def start(self) -> ContextWatcher:
+        """Start the background thread (idempotent)."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name=f"gsd-watcher:{self.work_dir}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def wait_ready(self, timeout: float | None = None) -> bool:
+        """Block until the first snapshot has been published."""
+        return self._ready.wait(timeout)
+
+    def subscribe(self, listener: Listener) -> None:
+        """Call listener(context) from the watcher thread on every change."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Listener) -> None:
+        try:
+            self._listeners.remove(listener)
+        except ValueError:
+            pass
+
+    def refresh(self) -> GSDContext:
+        """Reload the context now and publish it if it changed."""
+        context = gsd_runtime.get_context(self.work_dir, self.todos_file)
+        if self._stats is not None:
+            self._stats.incr('watcher.refresh')
+        return self._publish(context)
+
+    def _publish(self, context: GSDContext) -> GSDContext:
+        """Make context the snapshot and notify listeners if it changed."""
+        if context != self.snapshot:
+            if self._stats is not None:
+                self._stats.incr('watcher.publish')
+            self.snapshot = context
+            for listener in list(self._listeners):
+                try:
+                    listener(context)
+                except Exception:
+                    pass
+        self._ready.set()
+        return context
+
+    # -- thread --------------------------------------------------------------
+
+    def _run(self) -> None:
+        libc = _load_libc() if self.mode in ('auto', 'inotify') else None
+        if libc is not None:
+            try:
+                self._run_inotify(Inotify(libc))
+                return
+            except OSError:
+                pass
+        self._run_polling()
+
+    def _run_polling(self) -> None:
+        self.refresh()
+        while not self._stop.wait(self.poll_interval):
+            self.refresh()
+
+    def _watched_names(self) -> dict[str, set[str]]:
+        """Directories to watch mapped to the entry names that matter in each."""
+        root, searched = gsd_runtime.project_dirs(self.work_dir)
+        names = {directory: {gsd_runtime.PLANNING_DIR, '.git'} for directory in searched}
+        if root is not None:
+            names[os.path.join(root, gsd_runtime.PLANNING_DIR)] = {
+                gsd_runtime.STATE_FILE, gsd_runtime.PROJECT_FILE, gsd_runtime.ROADMAP_FILE}
+        if self.todos_file:
+            for path in (self.todos_file, gsd_todos.log_path(self.todos_file)):
+                parent, name = os.path.split(path)
+                names.setdefault(parent, set()).add(name)
+        return names
+
+    def _run_inotify(self, inotify: Inotify) -> None:
+        watched: dict[str, set[str]] = {}
+        wds: dict[int, str] = {}
+
+        def add_watches() -> None:
+            # Re-resolve: the project root may have moved up or down the tree
+            watched.clear()
+            watched.update(self._watched_names())
+            for directory in watched:
+                wd = inotify.add_watch(directory)
+                if wd is not None:
+                    wds[wd] = directory
+
+        try:
+            add_watches()
+            if not wds:
+                raise OSError(errno.ENOENT, "nothing to watch")
+            # Watches first, then the initial load, so no change slips between
+            self.refresh()
+            while not self._stop.is_set():
+                events = inotify.read_events(INOTIFY_RESCAN_INTERVAL)
+                if not events:
+                    # Timeout: safety-net rescan and pick up new directories
+                    add_watches()
+                    self.refresh()
+                    continue
+
+                relevant = False
+                if self._stats is not None:
+                    self._stats.incr('watcher.inotify_wakeup')
+                while events:
+                    for wd, mask, name in events:
+                        if mask & IN_IGNORED:
+                            wds.pop(wd, None)
+                            relevant = True
+                        elif name in watched.get(wds.get(wd, ''), ()):
+                            relevant = True
+                    events = inotify.read_events(DEBOUNCE_SECONDS)
+
+                if relevant:
+                    # .planning may have been created, removed or replaced
+                    gsd_runtime.invalidate_project(self.work_dir)
+                    add_watches()
+                    self.refresh()
+        finally:
+            inotify.close()
+
+
+class RemoteWatcher(ContextWatcher):
+    """ContextWatcher whose snapshots are pushed by gsd-statusd.
+
+    Falls back to watching locally (ContextWatcher._run, same thread) when
+    the daemon is unreachable or disconnects.
+    """
+
+    def __init__(self, work_dir: str, todos_file: str | None = None) -> None:
+        super().__init__(work_dir, todos_file)
+        self.remote = False
+        self._sock: socket.socket | None = None
+
+    def stop(self) -> None:
+        super().stop()
+        sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def refresh(self) -> GSDContext:
+        if self.remote:
+            return self.snapshot
+        return super().refresh()
+
+    def _run(self) -> None:
+        try:
+            self._run_remote()
+        except (OSError, ValueError, EOFError, struct.error):
+            pass
+        finally:
+            self.remote = False
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+        if not self._stop.is_set():
+            super()._run()
+
+    def _run_remote(self) -> None:
+        sock = self._sock = gsd_statusd.connect()
+        gsd_statusd.send_frame(sock, gsd_statusd.MSG_SUBSCRIBE,
+                               gsd_statusd.encode_strings(self.work_dir, self.todos_file))
+        sock.settimeout(None)
+        self.remote = True
+        while not self._stop.is_set():
+            msg, payload = gsd_statusd.recv_frame(sock)
+            if msg == gsd_statusd.MSG_CONTEXT:
+                if self._stats is not None:
+                    self._stats.incr('watcher.remote_update')
+                self._publish(gsd_statusd.decode_context(payload))
+
+
+_watchers: dict[tuple[str, str | None], ContextWatcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def get_watcher(work_dir: str | os.PathLike[str] | None = None,
+                todos_file: str | None = None) -> ContextWatcher:
+    """Return the started watcher for a project, creating it on first use."""
+    key = (os.fspath(work_dir) if work_dir is not None else os.getcwd(), todos_file)
+    watcher = _watchers.get(key)
+    if watcher is None:
+        with _watchers_lock:
+            watcher = _watchers.get(key)
+            if watcher is None:
+                watcher = _watchers[key] = _new_watcher(*key).start()
+    return watcher
+
+
+def _new_watcher(work_dir: str, todos_file: str | None) -> ContextWatcher:
+    """A watcher fed by gsd-statusd when it is running, else a local one."""
+    if os.environ.get('GSD_STATUSD', '') != '0' and gsd_statusd.available():
+        return RemoteWatcher(work_dir, todos_file)
+    return ContextWatcher(work_dir, todos_file)
+
+
+def stop_all() -> None:
+    """Stop every watcher started in this process."""
+    with _watchers_lock:
+        for watcher in _watchers.values():
+            watcher.stop()
+        _watchers.clear()
@@ -12,73 +12,122 @@ Usage:
     jim [kimi-cli-args...]
     jim --patch    # Force re-patch Kimi CLI
     jim --restore  # Restore original Kimi CLI
+    jim --status   # Show patch status
+    jim --stats    # Aggregate GSD_STATS data across sessions (--json, --reset)
+    jim --trace-startup[=PATH] [kimi-cli-args...]
+                   # Record a Chrome-trace startup timeline (see gsd_trace.py)
+    jim index [pending PHASE|plans|sql|rebuild]
+                   # Query the SQLite index of .planning (see gsd_index.py)
+    jim execute-phase PHASE [--jobs N] [--dry-run]
+                   # Run a phase's plans as headless kimi workers (see gsd_execute.py)
+    jim status [--all] [ROOT|GLOB...] [--json]
+                   # GSD status of one or many projects (see gsd_sweep.py)
+
+jim stays a single short-lived process: the patcher runs in-process and kimi
+replaces the wrapper via exec, so no second interpreter is started and none
+is left idle for the session. Only os/sys are imported up front.
+
+Environment:
+    JIM_DRY_RUN       print the kimi command instead of exec'ing it (for timing)
+    GSD_STATS         record hot-path stats in jim and kimi (see gsd_stats.py)
+    GSD_STATUSD       0 to not start or use the gsd-statusd daemon (see gsd_statusd.py)
+    GSD_EXECUTE_JOBS  worker limit for `jim execute-phase` (see gsd_execute.py)
+    GSD_BUNDLE        0 to pass gsd-agent.yaml instead of its bundle (see gsd_bundle.py)
 """
 
 from __future__ import annotations
 
-import argparse
 import os
-import subprocess
 import sys
-from pathlib import Path
 
 # Configuration
-KIMI_CLI_ROOT = Path("/Users/aig/.local/share/uv/tools/kimi-cli/lib/python3.13/site-packages/kimi_cli")
-GSD_AGENT = Path.home() / ".kimi" / "gsd-agent.yaml"
+GSD_AGENT = os.path.join(os.path.expanduser("~"), ".kimi", "gsd-agent.yaml")
+PATCHES_DIR = os.path.dirname(os.path.realpath(__file__))
+
+# jim flag -> kimi_cli_patcher action
+JIM_ACTIONS = {"--patch": "apply", "--restore": "restore", "--status": "status"}
+# jim subcommand (first argument) -> module whose main(argv) runs it
+JIM_COMMANDS = {"index": "gsd_index", "execute-phase": "gsd_execute", "status": "gsd_sweep"}
+
+if PATCHES_DIR not in sys.path:
+    sys.path.insert(0, PATCHES_DIR)
+
+
+def run_patcher(action: str) -> int:
+    """Run a kimi_cli_patcher action in this process."""
+    try:
+        import kimi_cli_patcher
+    except ImportError:
+        print("❌ Patcher script not found")
+        return 1
+    return kimi_cli_patcher.run_action(action)
+
+
+def stats_collector():
+    """The gsd_stats collector when GSD_STATS is set, else None."""
+    if not os.environ.get("GSD_STATS"):
+        return None
+    try:
+        import gsd_stats
+    except ImportError:
+        return None
+    return gsd_stats.collector()
 
 
 def ensure_patched() -> bool:
     """Ensure Kimi CLI is patched, apply if not."""
-    patcher_script = Path(__file__).parent / "kimi_cli_patcher.py"
+    try:
+        import kimi_cli_patcher
+    except ImportError:
+        return False
     
-    # Check if already patched
-    backup_exists = (KIMI_CLI_ROOT / "ui" / "shell" / "prompt.py.gsd-backup").exists()
+    # Cached install location, then the patch manifest: stat-only unless
+    # kimi-cli moved or files changed
+    try:
+        kimi_root = kimi_cli_patcher.get_kimi_cli_root()
+    except FileNotFoundError:
+        return False
+    if kimi_cli_patcher.is_patched(kimi_root):
+        return True
+    if kimi_cli_patcher.apply_failed(kimi_root):
+        # Same install and patch version as a failed apply: it would fail
+        # again, so only `jim --patch` (or a kimi-cli upgrade) retries
+        print("⚠️  GSD patches not applied (last attempt failed); run 'jim --patch' to retry")
+        return False
     
-    if not backup_exists and patcher_script.exists():
-        print("🔧 First run: Applying GSD patches to Kimi CLI...")
-        result = subprocess.run(
-            [sys.executable, str(patcher_script), "apply"],
-            capture_output=True,
-            text=True
-        )
-        if result.returncode == 0:
-            print("✅ Patches applied successfully!\n")
-            return True
-        else:
-            print("⚠️  Patching failed, continuing with standard Kimi CLI...")
-            print(result.stderr)
-            return False
+    import contextlib
+    import io
     
-    return backup_exists
+    print("🔧 Applying GSD patches to Kimi CLI...")
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            ok = kimi_cli_patcher.run_action("apply", kimi_root) == 0
+        except Exception as e:
+            print(f"❌ {e}")
+            ok = False
+    if ok:
+        print("✅ Patches applied successfully!\n")
+        return True
+    print("⚠️  Patching failed, continuing with standard Kimi CLI...")
+    print(output.getvalue())
+    return False
 
 
 def get_gsd_welcome():
     """Generate GSD welcome message."""
     try:
-        from pathlib import Path
-        import re
+        import gsd_runtime
         
-        planning_dir = Path.cwd() / '.planning'
-        if not planning_dir.exists():
+        ctx = gsd_runtime.get_context()
+        if not ctx.enabled:
             return None
         
         lines = []
-        
-        # Project name
-        project_file = planning_dir / 'PROJECT.md'
-        if project_file.exists():
-            content = project_file.read_text()
-            title_match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
-            if title_match:
-                lines.append(f"📋 Project: {title_match.group(1)}")
-        
-        # Phase info
-        state_file = planning_dir / 'STATE.md'
-        if state_file.exists():
-            content = state_file.read_text()
-            phase_match = re.search(r'Current Phase[:\s]+(\d+)', content, re.IGNORECASE)
-            if phase_match:
-                lines.append(f"🎯 Phase: {phase_match.group(1)}")
+        if ctx.project:
+            lines.append(f"📋 Project: {ctx.project}")
+        if ctx.phase:
+            lines.append(f"🎯 Phase: {ctx.phase}")
         
         if lines:
             return " | ".join(lines)
@@ -87,86 +136,129 @@ def get_gsd_welcome():
         return None
 
 
-def launch_kimi(args: list[str]) -> int:
-    """Launch Kimi CLI with GSD agent."""
-    # Build command
+def agent_file() -> str:
+    """The GSD agent for kimi: its pre-resolved bundle while that is current."""
+    if os.environ.get("GSD_BUNDLE") == "0":
+        return GSD_AGENT
+    try:
+        import gsd_bundle
+        return gsd_bundle.ensure_bundle(GSD_AGENT) or GSD_AGENT
+    except Exception:
+        return GSD_AGENT
+
+
+def build_command(args: list[str]) -> list[str]:
+    """The kimi command line for args."""
     cmd = ["kimi"]
     
     # Add agent file if exists and not already specified
-    if GSD_AGENT.exists() and "--agent-file" not in args and "--agent" not in args:
-        cmd.extend(["--agent-file", str(GSD_AGENT)])
+    if os.path.exists(GSD_AGENT) and "--agent-file" not in args and "--agent" not in args:
+        cmd.extend(["--agent-file", agent_file()])
     
     # Add remaining args
     cmd.extend(args)
+    return cmd
+
+
+def start_statusd() -> None:
+    """Start the shared gsd-statusd daemon unless it is already running."""
+    try:
+        import gsd_statusd
+        gsd_statusd.ensure_running()
+    except Exception:
+        pass
+
+
+def run_command(name: str, argv: list[str]) -> int:
+    """Run a jim subcommand through its module's main(argv)."""
+    import importlib
+    
+    module = importlib.import_module(JIM_COMMANDS[name])
+    if name == "execute-phase":
+        # Workers are launched with the same kimi command line as jim itself
+        return module.main(argv, build_command)
+    return module.main(argv)
+
+
+def launch_kimi(args: list[str], trace=None) -> int:
+    """Replace this process with Kimi CLI running the GSD agent.
+    
+    With a StartupTrace kimi runs as a child instead, and jim stays to
+    collect its timeline.
+    """
+    stats = stats_collector()
+    if stats is None:
+        cmd = build_command(args)
+    else:
+        with stats.timer("jim.build_command"):
+            cmd = build_command(args)
     
     # Show GSD welcome if in project
-    welcome = get_gsd_welcome()
+    if stats is None:
+        welcome = get_gsd_welcome()
+    else:
+        with stats.timer("jim.get_gsd_welcome"):
+            welcome = get_gsd_welcome()
     if welcome:
         print(f"\n🚀 {welcome}\n")
+        # In a GSD project: let this and other shells share one watcher
+        start_statusd()
+    
+    if os.environ.get("JIM_DRY_RUN"):
+        print(" ".join(cmd))
+        if trace is not None:
+            trace.finish()
+        return 0
     
-    # Run kimi
-    return subprocess.run(cmd).returncode
+    if trace is not None:
+        return trace.run(cmd)
+    
+    # exec discards unflushed Python buffers and skips atexit handlers
+    if stats is not None:
+        stats.flush()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    try:
+        os.execvp(cmd[0], cmd)
+    except FileNotFoundError:
+        print("❌ kimi not found on PATH. Install it with: uv tool install kimi-cli")
+        return 127
+    except OSError as e:
+        print(f"❌ Failed to launch kimi: {e}")
+        return 126
 
 
 def main():
-    parser = argparse.ArgumentParser(
-        description="jim - GSD-enhanced Kimi CLI",
-        add_help=False
-    )
-    parser.add_argument(
-        "--patch",
-        action="store_true",
-        help="Force re-patch Kimi CLI"
-    )
-    parser.add_argument(
-        "--restore",
-        action="store_true",
-        help="Restore original Kimi CLI"
-    )
-    parser.add_argument(
-        "--status",
-        action="store_true",
-        help="Show patch status"
-    )
-    parser.add_argument(
-        "kimi_args",
-        nargs="*",
-        help="Arguments to pass to Kimi CLI"
-    )
+    args = sys.argv[1:]
     
-    args, unknown = parser.parse_known_args()
+    # jim's own subcommands and flags; everything else is passed to kimi verbatim
+    if args and args[0] in JIM_COMMANDS:
+        return run_command(args[0], args[1:])
+    if "--stats" in args:
+        import gsd_stats
+        return gsd_stats.main([arg for arg in args if arg != "--stats"])
+    for flag, action in JIM_ACTIONS.items():
+        if flag in args:
+            return run_patcher(action)
     
-    patcher_script = Path(__file__).parent / "kimi_cli_patcher.py"
-    
-    if args.patch:
-        if patcher_script.exists():
-            return subprocess.run([sys.executable, str(patcher_script), "apply"]).returncode
-        else:
-            print("❌ Patcher script not found")
-            return 1
-    
-    if args.restore:
-        if patcher_script.exists():
-            return subprocess.run([sys.executable, str(patcher_script), "restore"]).returncode
-        else:
-            print("❌ Patcher script not found")
-            return 1
-    
-    if args.status:
-        if patcher_script.exists():
-            return subprocess.run([sys.executable, str(patcher_script), "status"]).returncode
-        else:
-            print("❌ Patcher script not found")
-            return 1
+    trace = None
+    for arg in args:
+        if arg == "--trace-startup" or arg.startswith("--trace-startup="):
+            import gsd_trace
+            trace = gsd_trace.StartupTrace(arg.partition("=")[2] or None)
+            args = [a for a in args if a != arg]
+            break
     
     # Ensure patches are applied
-    ensure_patched()
-    
-    # Combine kimi_args with unknown args
-    all_args = (args.kimi_args or []) + unknown
+    stats = stats_collector()
+    if stats is None:
+        ensure_patched()
+    else:
+        with stats.timer("jim.ensure_patched"):
+            ensure_patched()
     
     # Launch kimi
-    return launch_kimi(all_args)
+    return launch_kimi(args, trace)
 
 
 if __name__ == "__main__":
@@ -17,19 +17,26 @@ The patcher creates backups and can restore original files.
 
 from __future__ import annotations
 
-import argparse
-import hashlib
+import json
+import os
 import shutil
-import subprocess
 import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable
+from types import CodeType
+from typing import Any, Callable
+
+# argparse, hashlib and subprocess are imported where used: jim imports this
+# module on every launch and only needs the stat-only manifest check.
 
 # Configuration
-KIMI_CLI_ROOT = Path("/Users/aig/.local/share/uv/tools/kimi-cli/lib/python3.13/site-packages/kimi_cli")
 BACKUP_SUFFIX = ".gsd-backup"
-PATCH_VERSION = "1.0.0"
+PATCH_VERSION = "1.3.0"
+PATCHES_DIR = Path(__file__).resolve().parent
+RUNTIME_MODULES = ["gsd_runtime.py", "gsd_watcher.py", "gsd_events.py", "gsd_todos.py", "gsd_stats.py",
+                   "gsd_statusd.py", "gsd_git.py"]
+MANIFEST_NAME = ".gsd-manifest.json"
+INSTALL_STATE_FILE = Path.home() / ".kimi" / "gsd-install.json"
 
 
 @dataclass
@@ -42,46 +49,190 @@ class Patch:
     description: str
 
 
-def get_kimi_cli_root() -> Path:
-    """Find Kimi CLI installation directory."""
-    # Try common locations
-    candidates = [
-        Path.home() / ".local/share/uv/tools/kimi-cli/lib/python3.13/site-packages/kimi_cli",
-        Path.home() / ".local/share/uv/tools/kimi-cli/lib/python3.12/site-packages/kimi_cli",
-        Path.home() / ".local/share/uv/tools/kimi-cli/lib/python3.11/site-packages/kimi_cli",
-    ]
-    
-    for candidate in candidates:
-        if candidate.exists():
-            return candidate
+# =============================================================================
+# INSTALL DISCOVERY
+# =============================================================================
+
+def uv_tools_dir() -> Path:
+    """Directory uv installs tools into (honours UV_TOOL_DIR and XDG_DATA_HOME)."""
+    if os.environ.get("UV_TOOL_DIR"):
+        return Path(os.environ["UV_TOOL_DIR"])
+    data_home = os.environ.get("XDG_DATA_HOME") or str(Path.home() / ".local" / "share")
+    return Path(data_home) / "uv" / "tools"
+
+
+def _python_version_key(path: Path) -> tuple[int, ...]:
+    """Sort key for .../lib/python3.X/... paths, newest interpreter last."""
+    version = path.parents[1].name[len("python"):]
+    return tuple(int(part) for part in version.split(".") if part.isdigit())
+
+
+def _find_in_tool_dir(tool_dir: Path) -> Path | None:
+    """Newest lib/python3.*/site-packages/kimi_cli inside a uv tool environment."""
+    candidates = [c for c in tool_dir.glob("lib/python3.*/site-packages/kimi_cli") if c.is_dir()]
+    return max(candidates, key=_python_version_key) if candidates else None
+
+
+def kimi_cli_version(kimi_root: Path) -> str | None:
+    """Installed kimi-cli version, read from its dist-info directory name."""
+    for dist_info in kimi_root.parent.glob("kimi_cli-*.dist-info"):
+        return dist_info.name[len("kimi_cli-"):-len(".dist-info")]
+    return None
+
+
+def _mtime_ns(path: Path) -> int | None:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _install_signature(kimi_root: Path, tool_dir: Path) -> dict:
+    # site-packages changes when kimi-cli is upgraded (new dist-info), lib/
+    # when uv rebuilds the tool for another interpreter
+    return {
+        "root_mtime_ns": _mtime_ns(kimi_root),
+        "site_packages_mtime_ns": _mtime_ns(kimi_root.parent),
+        "tool_lib_mtime_ns": _mtime_ns(tool_dir / "lib"),
+    }
+
+
+def load_install_state() -> dict | None:
+    """Read the cached install location, or None if missing or unreadable."""
+    try:
+        state = json.loads(INSTALL_STATE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return state if isinstance(state, dict) and state.get("root") else None
+
+
+def write_install_state(kimi_root: Path, tool_dir: Path, apply_failed: str | None = None) -> dict:
+    """Cache a discovered install location; failures to write are ignored."""
+    state = {
+        "root": str(kimi_root),
+        "tool_dir": str(tool_dir),
+        "version": kimi_cli_version(kimi_root),
+        **_install_signature(kimi_root, tool_dir),
+    }
+    if apply_failed:
+        state["apply_failed"] = apply_failed
+    try:
+        INSTALL_STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = INSTALL_STATE_FILE.with_name(f"{INSTALL_STATE_FILE.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(state, indent=2) + "\n", encoding="utf-8")
+        os.replace(tmp, INSTALL_STATE_FILE)
+    except OSError:
+        pass
+    return state
+
+
+def _discover_kimi_cli() -> tuple[Path, Path]:
+    """Locate kimi_cli from scratch; returns (kimi_root, uv tool dir)."""
+    tool_dir = uv_tools_dir() / "kimi-cli"
+    root = _find_in_tool_dir(tool_dir)
+    if root is not None:
+        return root, tool_dir
     
-    # Try to find via pip/uv
+    # Non-default uv layout: ask uv (cold path only, the result is cached)
     try:
+        import subprocess
         result = subprocess.run(
-            ["uv", "tool", "dir", "kimi-cli"],
+            ["uv", "tool", "dir"],
             capture_output=True,
             text=True,
             check=True
         )
-        base_path = Path(result.stdout.strip())
-        # Find python version
-        lib_dir = base_path / "lib"
-        for py_dir in lib_dir.iterdir():
-            if py_dir.name.startswith("python"):
-                candidate = py_dir / "site-packages" / "kimi_cli"
-                if candidate.exists():
-                    return candidate
+        tool_dir = Path(result.stdout.strip()) / "kimi-cli"
+        root = _find_in_tool_dir(tool_dir)
+        if root is not None:
+            return root, tool_dir
     except Exception:
         pass
     
     raise FileNotFoundError("Could not find Kimi CLI installation. Is it installed?")
 
 
-def backup_file(original: Path) -> Path:
-    """Create backup of original file if not exists."""
+def find_kimi_cli() -> dict:
+    """Return the install state (root, version, ...) for Kimi CLI.
+    
+    The location is cached in INSTALL_STATE_FILE and re-used for as long as
+    the cached root, its site-packages and the tool's lib/ directory keep
+    their mtimes, so a launch costs three stat calls and no subprocess.
+    """
+    state = load_install_state()
+    if state is not None:
+        signature = _install_signature(Path(state["root"]), Path(state.get("tool_dir", "")))
+        if signature["root_mtime_ns"] is not None and all(
+                state.get(key) == value for key, value in signature.items()):
+            return state
+    return write_install_state(*_discover_kimi_cli())
+
+
+def get_kimi_cli_root() -> Path:
+    """Find Kimi CLI installation directory."""
+    return Path(find_kimi_cli()["root"])
+
+
+def record_apply_result(kimi_root: Path, ok: bool) -> None:
+    """Remember a failed apply in the install state, or forget it on success.
+    
+    The state is rewritten with the signature taken after the attempt, so the
+    record lasts until kimi-cli is upgraded or reinstalled (which triggers
+    rediscovery and drops it); apply_failed() also ignores it once
+    PATCH_VERSION changes.
+    """
+    state = load_install_state()
+    if state is None or state["root"] != str(kimi_root):
+        return
+    if ok and "apply_failed" not in state:
+        return
+    write_install_state(kimi_root, Path(state.get("tool_dir", "")),
+                        None if ok else PATCH_VERSION)
+
+
+def apply_failed(kimi_root: Path) -> bool:
+    """True if apply already failed on this unchanged install at this PATCH_VERSION."""
+    try:
+        state = find_kimi_cli()
+    except FileNotFoundError:
+        return False
+    return state["root"] == str(kimi_root) and state.get("apply_failed") == PATCH_VERSION
+
+
+# =============================================================================
+# BACKUPS
+# =============================================================================
+
+def atomic_write(path: Path, data: bytes, mode_from: Path | None = None) -> None:
+    """Replace path with data via a temp file in the same directory.
+    
+    Readers see either the old or the new file, never a partial write. The
+    permission bits of `mode_from` (default: the file being replaced) are kept.
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.gsd-tmp")
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        mode_source = mode_from or path
+        if mode_source.exists():
+            shutil.copymode(mode_source, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def backup_file(original: Path, refresh: bool = False,
+                txn: PatchTransaction | None = None) -> Path:
+    """Create backup of original file if not exists (or replace it if refresh)."""
     backup = original.with_suffix(original.suffix + BACKUP_SUFFIX)
-    if not backup.exists():
-        shutil.copy2(original, backup)
+    if refresh or not backup.exists():
+        if txn is not None:
+            txn.copy(original, backup)
+        else:
+            shutil.copy2(original, backup)
         print(f"  📝 Backed up: {original.name}")
     return backup
 
@@ -97,43 +248,543 @@ def restore_file(original: Path) -> bool:
     return False
 
 
-def verify_python_syntax(code: str, filename: str) -> bool:
-    """Verify code is valid Python."""
-    try:
-        compile(code, filename, 'exec')
-        return True
-    except SyntaxError as e:
-        print(f"  ❌ Syntax error in patch: {e}")
-        return False
+def runtime_dir(kimi_root: Path) -> Path:
+    """Directory the GSD runtime modules are installed into (next to kimi_cli)."""
+    return kimi_root.parent
 
 
-def apply_patch(patch: Patch) -> bool:
-    """Apply a single patch."""
-    print(f"\n🔧 {patch.description}")
+def install_runtime(kimi_root: Path, txn: PatchTransaction | None = None) -> bool:
+    """Copy the GSD runtime modules next to the kimi_cli package."""
+    print("\n🔧 GSD runtime modules")
     
-    if not patch.target.exists():
-        print(f"  ❌ Target not found: {patch.target}")
+    missing = [module for module in RUNTIME_MODULES if not (PATCHES_DIR / module).exists()]
+    for module in missing:
+        print(f"  ❌ Runtime module not found: {PATCHES_DIR / module}")
+    if missing:
         return False
     
+    for module in RUNTIME_MODULES:
+        source = PATCHES_DIR / module
+        if txn is not None:
+            txn.copy(source, runtime_dir(kimi_root) / module)
+        else:
+            shutil.copy2(source, runtime_dir(kimi_root) / module)
+        print(f"  ✅ Installed: {module}")
+    return True
+
+
+def remove_runtime(kimi_root: Path) -> None:
+    """Remove the GSD runtime modules installed next to kimi_cli."""
+    for module in RUNTIME_MODULES:
+        target = runtime_dir(kimi_root) / module
+        if target.exists():
+            target.unlink()
+            print(f"  🗑️  Removed: {module}")
+
+
+# =============================================================================
+# MANIFEST
+# =============================================================================
+
+def sha256_file(path: Path) -> str:
+    """Return the hex sha256 of a file."""
+    import hashlib
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_signature(path: Path) -> dict:
+    """Return sha256, size and mtime of a file for the manifest."""
+    st = path.stat()
+    return {"sha256": sha256_file(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def manifest_path(kimi_root: Path) -> Path:
+    return kimi_root / MANIFEST_NAME
+
+
+def load_manifest(kimi_root: Path) -> dict | None:
+    """Read the patch manifest written by apply, if any."""
     try:
-        original = patch.target.read_text()
-        patched = patch.patch_func(original)
-        
-        if original == patched:
-            print(f"  ⚠️  No changes needed (already patched?)")
-            return True
-        
-        if not verify_python_syntax(patched, patch.target.name):
+        return json.loads(manifest_path(kimi_root).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(kimi_root: Path, patches: list[Patch],
+                   txn: PatchTransaction | None = None) -> None:
+    """Record original and patched signatures of every target."""
+    files = {}
+    for patch in patches:
+        if not patch.target.exists():
+            continue
+        entry = {"patched": file_signature(patch.target)}
+        if patch.backup.exists():
+            entry["original"] = file_signature(patch.backup)
+        files[patch.name] = entry
+    runtime = {}
+    for module in RUNTIME_MODULES:
+        path = runtime_dir(kimi_root) / module
+        if path.exists():
+            runtime[module] = {"patched": file_signature(path)}
+    manifest = {"patch_version": PATCH_VERSION, "files": files, "runtime": runtime}
+    data = (json.dumps(manifest, indent=2) + "\n").encode("utf-8")
+    if txn is not None:
+        txn.write(manifest_path(kimi_root), data)
+    else:
+        atomic_write(manifest_path(kimi_root), data)
+
+
+def file_state(path: Path, entry: dict | None) -> str:
+    """Classify a file against its manifest entry.
+
+    Returns 'patched', 'original', 'modified' (neither, e.g. after a kimi-cli
+    upgrade), 'missing' or 'unknown' (no manifest entry). Files whose size and
+    mtime match the recorded patched signature are accepted without hashing.
+    """
+    try:
+        st = path.stat()
+    except OSError:
+        return "missing"
+    if not entry:
+        return "unknown"
+    patched = entry.get("patched")
+    if patched and st.st_size == patched["size"] and st.st_mtime_ns == patched["mtime_ns"]:
+        return "patched"
+    digest = sha256_file(path)
+    if patched and digest == patched["sha256"]:
+        return "patched"
+    original = entry.get("original")
+    if original and digest == original["sha256"]:
+        return "original"
+    return "modified"
+
+
+def verify_manifest(kimi_root: Path, manifest: dict | None = None) -> dict[str, str]:
+    """Return the manifest state of every patch target and runtime module."""
+    if manifest is None:
+        manifest = load_manifest(kimi_root) or {}
+    files = manifest.get("files", {})
+    runtime = manifest.get("runtime", {})
+    states = {patch.name: file_state(patch.target, files.get(patch.name))
+              for patch in get_patches(kimi_root)}
+    for module in RUNTIME_MODULES:
+        states[module] = file_state(runtime_dir(kimi_root) / module, runtime.get(module))
+    return states
+
+
+def is_patched(kimi_root: Path) -> bool:
+    """True if every target matches the manifest of the current patch version."""
+    manifest = load_manifest(kimi_root)
+    if not manifest or manifest.get("patch_version") != PATCH_VERSION:
+        return False
+    return all(state == "patched" for state in verify_manifest(kimi_root, manifest).values())
+
+
+# =============================================================================
+# TRANSACTIONAL APPLY
+# =============================================================================
+
+@dataclass
+class PreparedPatch:
+    """A patch transformed and validated in memory, not yet written."""
+    patch: Patch
+    original: str | None = None
+    patched: str | None = None
+    code: CodeType | None = None
+    error: str | None = None
+    rebuilt: bool = False
+    
+    @property
+    def changed(self) -> bool:
+        return self.error is None and self.original != self.patched
+
+
+class PatchTransaction:
+    """Journal of every file written during an apply.
+    
+    The first write to a path records its previous content (or its absence);
+    `rollback()` puts all of them back in reverse order, so a failed or
+    interrupted apply leaves kimi-cli exactly as it found it.
+    """
+    
+    def __init__(self) -> None:
+        self._journal: list[tuple[Path, bytes | None]] = []
+        self._seen: set[Path] = set()
+    
+    def _record(self, path: Path) -> None:
+        if path in self._seen:
+            return
+        self._seen.add(path)
+        try:
+            previous = path.read_bytes()
+        except FileNotFoundError:
+            previous = None
+        self._journal.append((path, previous))
+    
+    def write(self, path: Path, data: bytes) -> None:
+        self._record(path)
+        atomic_write(path, data)
+    
+    def track(self, path: Path) -> None:
+        """Journal a path that something outside the transaction will write."""
+        self._record(path)
+    
+    def copy(self, source: Path, target: Path) -> None:
+        self._record(target)
+        atomic_write(target, source.read_bytes(), mode_from=source)
+        shutil.copystat(source, target)
+    
+    def rollback(self) -> None:
+        for path, previous in reversed(self._journal):
+            try:
+                if previous is None:
+                    path.unlink(missing_ok=True)
+                else:
+                    atomic_write(path, previous)
+                print(f"  ↩️  Rolled back: {path.name}")
+            except OSError as e:
+                print(f"  ❌ Rollback failed for {path}: {e}")
+        self._journal.clear()
+        self._seen.clear()
+
+
+def needs_rebuild(patch: Patch, state: str, manifest: dict | None) -> bool:
+    """True if a target must be re-derived from its backup.
+    
+    Edits are skipped when their `present` marker exists, so patching a
+    target in place keeps whatever GSD code an older patch version injected.
+    A target patched by another version (or by a patcher that wrote no
+    manifest) is therefore rebuilt from its pristine backup. A 'modified'
+    target, or an 'unknown' one without GSD code, was replaced by kimi-cli
+    and is itself the pristine source.
+    """
+    if state == "patched":
+        return manifest is None or manifest.get("patch_version") != PATCH_VERSION
+    if state == "unknown":
+        try:
+            return "gsd" in patch.target.read_text(encoding="utf-8").lower()
+        except OSError:
             return False
-        
-        backup_file(patch.target)
-        patch.target.write_text(patched)
+    return False
+
+
+def prepare_patch(patch: Patch, rebuild: bool = False) -> PreparedPatch:
+    """Read, transform and syntax-check one target without writing anything.
+    
+    With `rebuild`, the patch is applied to the backup instead of the target.
+    """
+    if not patch.target.exists():
+        return PreparedPatch(patch, error=f"Target not found: {patch.target}")
+    if rebuild and not patch.backup.exists():
+        return PreparedPatch(patch, error=(
+            f"{patch.name} was patched by another patcher version and has no "
+            f"backup to rebuild from; reinstall kimi-cli and apply again"))
+    try:
+        original = patch.target.read_text(encoding="utf-8")
+        source = patch.backup.read_text(encoding="utf-8") if rebuild else original
+        patched = patch.patch_func(source)
+        # Kept for write_bytecode, so the first kimi start loads a .pyc
+        code = compile(patched, str(patch.target), 'exec', dont_inherit=True)
+    except SyntaxError as e:
+        return PreparedPatch(patch, error=f"Syntax error in patch: {e}")
+    except Exception as e:
+        return PreparedPatch(patch, error=str(e))
+    return PreparedPatch(patch, original, patched, code, rebuilt=rebuild)
+
+
+def prepare_patches(patches: list[Patch], rebuild: set[str] = frozenset()) -> list[PreparedPatch]:
+    """Prepare every patch concurrently; results keep the order of `patches`.
+    
+    Targets named in `rebuild` are re-derived from their backups.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    with ThreadPoolExecutor(max_workers=max(1, len(patches))) as pool:
+        return list(pool.map(lambda p: prepare_patch(p, p.name in rebuild), patches))
+
+
+def commit_patch(prepared: PreparedPatch, txn: PatchTransaction, state: str = "unknown") -> None:
+    """Back up and atomically replace one prepared target.
+    
+    `state` is the target's manifest state; a 'modified' target was replaced
+    since the last apply (kimi-cli upgrade), as was an 'unknown' one that is
+    not rebuilt, so its backup is refreshed. A rebuilt target keeps the
+    backup it was derived from.
+    """
+    patch = prepared.patch
+    print(f"\n🔧 {patch.description}")
+    if not prepared.changed:
+        print(f"  ⚠️  No changes needed (already patched?)")
+        return
+    backup_file(patch.target, refresh=(state in ("modified", "unknown") and not prepared.rebuilt), txn=txn)
+    txn.write(patch.target, prepared.patched.encode("utf-8"))
+    if prepared.rebuilt:
+        print(f"  ✅ Rebuilt from backup: {patch.target.name}")
+    else:
         print(f"  ✅ Patched: {patch.target.name}")
-        return True
+
+
+# =============================================================================
+# BYTECODE
+# =============================================================================
+
+def target_python_version(kimi_root: Path) -> tuple[int, int] | None:
+    """(major, minor) of the environment kimi_cli lives in, from lib/pythonX.Y."""
+    name = kimi_root.parent.parent.name
+    if kimi_root.parent.name != "site-packages" or not name.startswith("python"):
+        return None
+    parts = name[len("python"):].split(".")
+    if len(parts) != 2 or not all(part.isdigit() for part in parts):
+        return None
+    return int(parts[0]), int(parts[1])
+
+
+def tool_python(kimi_root: Path, version: tuple[int, int]) -> Path | None:
+    """Interpreter of the virtualenv kimi_cli is installed in, if present."""
+    bin_dir = kimi_root.parents[3] / ("Scripts" if os.name == "nt" else "bin")
+    for name in (f"python{version[0]}.{version[1]}", f"python{version[0]}", "python"):
+        candidate = bin_dir / name
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def pyc_data(code: CodeType, source: Path) -> bytes:
+    """Timestamp-validated .pyc contents (PEP 552 header + marshalled code)."""
+    import importlib.util
+    import marshal
+    import struct
+    
+    st = source.stat()
+    header = struct.pack('<III', 0, int(st.st_mtime) & 0xFFFFFFFF, st.st_size & 0xFFFFFFFF)
+    return importlib.util.MAGIC_NUMBER + header + marshal.dumps(code)
+
+
+def pyc_path(source: Path, version: tuple[int, int]) -> Path:
+    """__pycache__ entry CPython `version` uses for source."""
+    return source.parent / "__pycache__" / f"{source.stem}.cpython-{version[0]}{version[1]}.pyc"
+
+
+def write_bytecode(kimi_root: Path, sources: dict[Path, CodeType | None],
+                   txn: PatchTransaction | None = None) -> None:
+    """Write __pycache__ entries for freshly written sources.
+    
+    Code objects are only valid for the interpreter version that compiled
+    them: when this process matches the kimi-cli environment the code
+    objects from prepare_patch are marshalled directly, otherwise the
+    environment's own interpreter compiles the files. Only kimi's version is
+    written; other interpreters never load this tree. Either way every .pyc
+    is journaled in `txn`, so a rollback removes (or restores) it with the
+    sources. Failures only cost the first launch a recompile, so they are
+    reported but never fatal.
+    """
+    print("\n🔧 Bytecode")
+    version = target_python_version(kimi_root)
+    
+    if version is None or version == sys.version_info[:2]:
+        import importlib.util
         
-    except Exception as e:
-        print(f"  ❌ Failed: {e}")
-        return False
+        for source, code in sources.items():
+            try:
+                if code is None:
+                    code = compile(source.read_bytes(), str(source), 'exec', dont_inherit=True)
+                pyc = Path(importlib.util.cache_from_source(str(source)))
+                pyc.parent.mkdir(parents=True, exist_ok=True)
+                data = pyc_data(code, source)
+                if txn is not None:
+                    txn.write(pyc, data)
+                else:
+                    atomic_write(pyc, data)
+            except (OSError, SyntaxError, ValueError) as e:
+                print(f"  ⚠️  {source.name}: {e}")
+        print(f"  ✅ Compiled {len(sources)} modules for Python {sys.version_info[0]}.{sys.version_info[1]}")
+        return
+    
+    python = tool_python(kimi_root, version)
+    if python is None:
+        print(f"  ⚠️  No Python {version[0]}.{version[1]} found; kimi will compile on first start")
+        return
+    import subprocess
+    if txn is not None:
+        for source in sources:
+            txn.track(pyc_path(source, version))
+    result = subprocess.run(
+        [str(python), "-m", "compileall", "-q", *(str(source) for source in sources)],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode == 0:
+        print(f"  ✅ Compiled {len(sources)} modules with {python}")
+    else:
+        print(f"  ⚠️  {python} could not compile: {(result.stdout + result.stderr).strip()}")
+
+
+def remove_bytecode(source: Path) -> None:
+    """Delete every cached .pyc of a source file (all interpreter versions)."""
+    for pyc in (source.parent / "__pycache__").glob(f"{source.stem}.*.pyc"):
+        pyc.unlink(missing_ok=True)
+
+
+# =============================================================================
+# PATCH ENGINE
+# =============================================================================
+
+class AnchorError(ValueError):
+    """Raised when a target lacks the structure a patch needs."""
+    
+    def __init__(self, filename: str, missing: list[str]) -> None:
+        self.filename = filename
+        self.missing = missing
+        super().__init__(f"{filename}: anchor not found: {', '.join(missing)}")
+
+
+@dataclass
+class Edit:
+    """One structural edit of a patch target.
+    
+    `anchor` is a dotted class/function path ("KimiSoul.status"; a suffix of
+    the full qualified name is enough, "" is the module). `action` is one of
+    insert_before, insert_after (after the anchor body statement matching
+    `statement`), append_body, replace or append (end of module). `present`
+    ("Path" or "Path:name") is what exists once the edit has been applied, so
+    re-applying is a no-op. `text` is re-indented to the anchor's column.
+    """
+    anchor: str
+    action: str
+    text: str
+    present: str
+    statement: Callable[[Any], bool] | None = None
+    statement_desc: str = ""
+    
+    def describe(self) -> str:
+        if self.statement_desc:
+            return f"{self.anchor or '<module>'} ({self.statement_desc})"
+        return self.anchor or "<module>"
+
+
+class SourceIndex:
+    """Parsed module with every class/function indexed by qualified name."""
+    
+    def __init__(self, content: str, filename: str = "<patch target>") -> None:
+        import ast
+        
+        self.ast = ast
+        self.tree = ast.parse(content, filename)
+        self.defs: dict[str, Any] = {}
+        self._index(self.tree.body, "")
+    
+    def _index(self, body: list, prefix: str) -> None:
+        ast = self.ast
+        for node in body:
+            if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                qualname = prefix + node.name
+                self.defs.setdefault(qualname, node)
+                self._index(node.body, qualname + ".")
+    
+    def find(self, path: str) -> Any:
+        """The node at a dotted path (or path suffix); the module for ''."""
+        if not path:
+            return self.tree
+        node = self.defs.get(path)
+        if node is not None:
+            return node
+        suffix = "." + path
+        for qualname, node in self.defs.items():
+            if qualname.endswith(suffix):
+                return node
+        return None
+    
+    def contains(self, spec: str) -> bool:
+        """True if "Path" exists, or "Path:name" references `name` inside it."""
+        path, _, name = spec.partition(":")
+        node = self.find(path)
+        if node is None or not name:
+            return node is not None
+        return any(isinstance(n, self.ast.Name) and n.id == name for n in self.ast.walk(node))
+
+
+def _span(index: SourceIndex, edit: Edit, line_count: int) -> tuple[int, int, int] | None:
+    """(first line, end line, indent) replaced by an edit; 0-based, end exclusive."""
+    node = index.find(edit.anchor)
+    if node is None:
+        return None
+    if edit.action == "append":
+        return line_count, line_count, 0
+    start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])]) - 1
+    if edit.action == "insert_before":
+        return start, start, node.col_offset
+    if edit.action == "replace":
+        return start, node.end_lineno, node.col_offset
+    if edit.action == "append_body":
+        return node.body[-1].end_lineno, node.body[-1].end_lineno, node.body[0].col_offset
+    if edit.action == "insert_after":
+        for stmt in node.body:
+            if edit.statement(stmt):
+                return stmt.end_lineno, stmt.end_lineno, stmt.col_offset
+        return None
+    raise ValueError(f"Unknown edit action: {edit.action}")
+
+
+def _reindent(text: str, indent: int) -> list[str]:
+    import textwrap
+    
+    prefix = " " * indent
+    lines = textwrap.dedent(text).splitlines()
+    return [(prefix + line if line.strip() else "") + "\n" for line in lines]
+
+
+def apply_edits(content: str, edits: list[Edit], filename: str) -> str:
+    """Apply every edit for one target from a single parse.
+    
+    All anchors are located first; if any is missing an AnchorError lists
+    them all and nothing is changed. Edits are then spliced in bottom-up so
+    earlier line numbers stay valid, and untouched lines are kept verbatim.
+    """
+    index = SourceIndex(content, filename)
+    lines = content.splitlines(keepends=True)
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+    
+    splices = []
+    missing = []
+    for edit in edits:
+        if index.contains(edit.present):
+            continue
+        span = _span(index, edit, len(lines))
+        if span is None:
+            missing.append(edit.describe())
+            continue
+        start, end, indent = span
+        splices.append((start, end, _reindent(edit.text, indent)))
+    if missing:
+        raise AnchorError(filename, missing)
+    if not splices:
+        return content
+    
+    for start, end, new_lines in sorted(splices, key=lambda s: (s[0], s[1]), reverse=True):
+        lines[start:end] = new_lines
+    return "".join(lines)
+
+
+def assigns(name: str) -> Callable[[Any], bool]:
+    """Statement predicate: assigns to the plain variable `name`."""
+    def match(stmt: Any) -> bool:
+        targets = getattr(stmt, "targets", None) or [getattr(stmt, "target", None)]
+        return any(getattr(t, "id", None) == name for t in targets)
+    return match
+
+
+def mentions(name: str) -> Callable[[Any], bool]:
+    """Statement predicate: references the variable `name` anywhere."""
+    import ast
+    
+    def match(stmt: Any) -> bool:
+        return any(isinstance(n, ast.Name) and n.id == name for n in ast.walk(stmt))
+    return match
 
 
 # =============================================================================
@@ -144,135 +795,139 @@ def patch_prompt_py(content: str) -> str:
     """
     Patch ui/shell/prompt.py to add GSD status bar integration.
     """
-    # Add GSD import and helper function
+    # Add GSD helpers: renders read the last published snapshot and never
+    # wait; the watcher is started (and refreshed) off the event loop
     gsd_helper = '''
-    def _get_gsd_context(self) -> dict:
-        """Load GSD context from .planning directory."""
+    # (context, git status, columns, fragments, cells) of the last GSD segment
+    _gsd_toolbar = (None, None, None, (), 0)
+
+    def _get_gsd_context(self):
+        """Return the last known GSD context without blocking the render."""
+        try:
+            watcher = self._gsd_watcher
+        except AttributeError:
+            self._gsd_start()
+            return None
+        if watcher is None:
+            return None
+        if self._gsd_stats is None:
+            return watcher.snapshot
+        with self._gsd_stats.timer('prompt._get_gsd_context'):
+            return watcher.snapshot
+
+    def _gsd_start(self):
+        """Start the watcher on a helper thread, once (single flight)."""
+        import threading
+        
+        self._gsd_watcher = None
+        self._gsd_git_watcher = None
+        self._gsd_stats = None
+        # Captured here: the helper and watcher threads have no current app
+        try:
+            from prompt_toolkit.application.current import get_app_or_none
+            self._gsd_app = get_app_or_none()
+        except Exception:
+            self._gsd_app = None
+        threading.Thread(target=self._gsd_start_watcher, name="gsd-prompt-start",
+                         daemon=True).start()
+
+    def _gsd_start_watcher(self):
         try:
-            from pathlib import Path
-            import re
-            import json
             import os
-            
-            planning_dir = Path.cwd() / '.planning'
-            if not planning_dir.exists():
-                return {}
-            
-            context = {
-                'enabled': True,
-                'phase': None,
-                'todos_total': 0,
-                'todos_done': 0,
-                'milestone': None,
-                'project': None,
-            }
-            
-            # Parse STATE.md for current phase
-            state_file = planning_dir / 'STATE.md'
-            if state_file.exists():
-                content = state_file.read_text()
-                phase_match = re.search(r'Current Phase[:\s]+(\d+)', content, re.IGNORECASE)
-                if phase_match:
-                    context['phase'] = phase_match.group(1)
-            
-            # Parse PROJECT.md for project name
-            project_file = planning_dir / 'PROJECT.md'
-            if project_file.exists():
-                content = project_file.read_text()
-                title_match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
-                if title_match:
-                    context['project'] = title_match.group(1)[:25]  # Truncate
-            
-            # Count todos from session
-            session_id = os.environ.get('KIMI_SESSION_ID', '')
-            if session_id:
-                todos_file = Path.home() / '.kimi' / 'todos' / f'{session_id}.json'
-                if todos_file.exists():
-                    todos = json.loads(todos_file.read_text())
-                    context['todos_total'] = len(todos)
-                    context['todos_done'] = sum(1 for t in todos if t.get('done'))
-            
-            return context
+            import gsd_runtime
+            import gsd_stats
+            import gsd_watcher
+            self._gsd_stats = gsd_stats.collector()
+            watcher = gsd_watcher.get_watcher(os.getcwd(), gsd_runtime.session_todos_file())
+            watcher.subscribe(self._gsd_on_change)
+        except Exception:
+            return
+        self._gsd_watcher = watcher
+        try:
+            import gsd_git
+            git_watcher = gsd_git.get_watcher(os.getcwd())
+            if git_watcher is not None:
+                git_watcher.subscribe(self._gsd_on_change)
+                self._gsd_git_watcher = git_watcher
         except Exception:
-            return {}
+            pass
+        self._gsd_on_change(watcher.snapshot)
+
+    def _gsd_on_change(self, context):
+        """Redraw the toolbar; watchers only call this when the context changed."""
+        app = self._gsd_app
+        if app is not None:
+            try:
+                app.invalidate()
+            except Exception:
+                pass
+
+    def _get_gsd_git(self):
+        """Return the last git branch/dirty status of the work dir, or None."""
+        watcher = getattr(self, '_gsd_git_watcher', None)
+        return watcher.snapshot if watcher is not None else None
+
+    def _gsd_toolbar_segment(self, ctx, git, columns):
+        """Fragments for the GSD segment and the terminal cells they use."""
+        if ctx is None or not ctx.enabled:
+            return (), 0
+        import gsd_runtime
+        
+        parts = []
+        if ctx.phase:
+            parts.append(f"📋P{ctx.phase}")
+        if ctx.todos_total:
+            parts.append(f"✅{ctx.todos_done}/{ctx.todos_total}")
+        label = git.label if git is not None else None
+        if label:
+            if len(label) > 24:
+                label = label[:23] + "…"
+            parts.append(f"🌿{label}{'*' if git.dirty else ''}")
+        # Leave at least half of a narrow toolbar to kimi's own segments:
+        # drop the least important parts (branch, then todos) and show "…"
+        # in their place; below the width of "📋P3 …" nothing is shown
+        for shown in range(len(parts), 0, -1):
+            kept = parts[:shown] if shown == len(parts) else parts[:shown] + ["…"]
+            gsd_str = " | " + " ".join(kept)
+            cells = gsd_runtime.display_width(gsd_str) + 1
+            if cells <= columns // 2:
+                return (("fg:#00ff00", gsd_str), ("", " ")), cells
+        return (), 0
 
 '''
     
-    # Find insertion point - before _render_bottom_toolbar
-    marker = "    def _render_bottom_toolbar(self) -> FormattedText:"
-    if marker in content and '_get_gsd_context' not in content:
-        content = content.replace(marker, gsd_helper + marker)
-    
-    # Modify _render_bottom_toolbar to include GSD info
-    # Add after mode display, before shortcuts
-    old_mode_display = '''        mode = str(self._mode).lower()
-        if self._mode == PromptMode.AGENT:
-            mode_details: list[str] = []
-            if self._model_name:
-                mode_details.append(self._model_name)
-            if self._thinking:
-                mode_details.append("thinking")
-            if mode_details:
-                mode += f" ({', '.join(mode_details)})"
-        status = self._status_provider()'''
-    
-    new_mode_display = '''        mode = str(self._mode).lower()
-        if self._mode == PromptMode.AGENT:
-            mode_details: list[str] = []
-            if self._model_name:
-                mode_details.append(self._model_name)
-            if self._thinking:
-                mode_details.append("thinking")
-            if mode_details:
-                mode += f" ({', '.join(mode_details)})"
-        status = self._status_provider()
-        
-        # ADD: GSD context
+    # Add GSD info to the toolbar right after the status is fetched, before
+    # the shortcuts (uses the method's `fragments` and `columns`)
+    gsd_toolbar = '''
+        # ADD: GSD context and git status; the segment is rebuilt only when
+        # one of them (a new object per change) or the terminal width changes
         gsd_ctx = self._get_gsd_context()
-        if gsd_ctx.get('enabled'):
-            gsd_parts = []
-            if gsd_ctx.get('phase'):
-                gsd_parts.append(f"📋P{gsd_ctx['phase']}")
-            if gsd_ctx.get('todos_total'):
-                done = gsd_ctx.get('todos_done', 0)
-                total = gsd_ctx['todos_total']
-                gsd_parts.append(f"✅{done}/{total}")
-            if gsd_parts:
-                gsd_str = " | " + " ".join(gsd_parts)
-                fragments.extend([("fg:#00ff00", gsd_str), ("", " ")])
-                columns -= len(gsd_str) + 1'''
+        gsd_git = self._get_gsd_git()
+        gsd_toolbar = self._gsd_toolbar
+        if (gsd_toolbar[0] is not gsd_ctx or gsd_toolbar[1] is not gsd_git
+                or gsd_toolbar[2] != columns):
+            gsd_toolbar = self._gsd_toolbar = (
+                gsd_ctx, gsd_git, columns,
+                *self._gsd_toolbar_segment(gsd_ctx, gsd_git, columns))
+        if gsd_toolbar[3]:
+            fragments.extend(gsd_toolbar[3])
+            columns -= gsd_toolbar[4]'''
     
-    if old_mode_display in content:
-        content = content.replace(old_mode_display, new_mode_display)
-    
-    return content
+    return apply_edits(content, [
+        Edit("_render_bottom_toolbar", "insert_before", gsd_helper,
+             present="_get_gsd_context"),
+        Edit("_render_bottom_toolbar", "insert_after", gsd_toolbar,
+             present="_render_bottom_toolbar:gsd_ctx",
+             statement=assigns("status"), statement_desc="status = ..."),
+    ], "prompt.py")
 
 
 def patch_soul_init(content: str) -> str:
     """
     Patch soul/__init__.py to extend StatusSnapshot with GSD fields.
     """
-    # Find and extend StatusSnapshot
-    old_snapshot = '''@dataclass(frozen=True, slots=True)
-class StatusSnapshot:
-    """Status snapshot for the soul."""
-
-    context_usage: float
-    """The usage of the context, in percentage."""
-
-    yolo_enabled: bool
-    """Whether YOLO mode is enabled."""'''
-    
-    new_snapshot = '''@dataclass(frozen=True, slots=True)
-class StatusSnapshot:
-    """Status snapshot for the soul."""
-
-    context_usage: float
-    """The usage of the context, in percentage."""
-
-    yolo_enabled: bool
-    """Whether YOLO mode is enabled."""
-    
+    # Defaulted fields go after the existing ones
+    gsd_fields = '''
     # GSD Extensions
     gsd_enabled: bool = False
     """Whether GSD is active in current project."""
@@ -290,190 +945,207 @@ class StatusSnapshot:
     """Current GSD milestone name."""
     
     gsd_project: str | None = None
-    """Current GSD project name."""'''
+    """Current GSD project name."""
     
-    if old_snapshot in content:
-        content = content.replace(old_snapshot, new_snapshot)
+    gsd_generation: int = 0
+    """Bumped by KimiSoul.status whenever any field changes."""'''
     
-    return content
+    # The marker only proves some GSD fields exist: a field added here needs
+    # a PATCH_VERSION bump so older trees are rebuilt from their backup
+    return apply_edits(content, [
+        Edit("StatusSnapshot", "append_body", gsd_fields,
+             present="StatusSnapshot:gsd_enabled"),
+    ], "soul/__init__.py")
 
 
 def patch_kimisoul_status(content: str) -> str:
     """
     Patch soul/kimisoul.py to add GSD context to status property.
     """
-    # Find status property and enhance it
-    old_status = '''    @property
-    def status(self) -> StatusSnapshot:
-        return StatusSnapshot(
-            context_usage=self._context_usage,
-            yolo_enabled=self._approval.is_yolo(),
-        )'''
-    
-    new_status = '''    def _load_gsd_context(self) -> dict:
-        """Load GSD context from .planning directory."""
-        try:
-            from pathlib import Path
-            import re
-            import json
-            import os
-            
-            work_dir = Path(str(self.runtime.builtin_args.KIMI_WORK_DIR))
-            planning_dir = work_dir / '.planning'
-            if not planning_dir.exists():
-                return {}
+    # Replace the status property with the GSD helpers and an enhanced one
+    new_status = '''    def _gsd_get_watcher(self):
+        """Return the background watcher for this soul's work dir."""
+        watcher = getattr(self, '_gsd_watcher', None)
+        if watcher is None:
+            import gsd_runtime
+            import gsd_stats
+            import gsd_watcher
             
-            context = {
-                'gsd_enabled': True,
-                'gsd_phase': None,
-                'gsd_todos_total': 0,
-                'gsd_todos_done': 0,
-                'gsd_milestone': None,
-                'gsd_project': None,
-            }
-            
-            # Parse STATE.md
-            state_file = planning_dir / 'STATE.md'
-            if state_file.exists():
-                content = state_file.read_text()
-                phase_match = re.search(r'Current Phase[:\s]+(\d+)', content, re.IGNORECASE)
-                if phase_match:
-                    context['gsd_phase'] = phase_match.group(1)
-            
-            # Parse PROJECT.md
-            project_file = planning_dir / 'PROJECT.md'
-            if project_file.exists():
-                proj_content = project_file.read_text()
-                title_match = re.search(r'^#\s+(.+)$', proj_content, re.MULTILINE)
-                if title_match:
-                    context['gsd_project'] = title_match.group(1)[:30]
-            
-            # Parse ROADMAP.md for milestone
-            roadmap_file = planning_dir / 'ROADMAP.md'
-            if roadmap_file.exists():
-                road_content = roadmap_file.read_text()
-                mile_match = re.search(r'##\s+Current Milestone[:\s]*([^\n]+)', road_content, re.IGNORECASE)
-                if mile_match:
-                    context['gsd_milestone'] = mile_match.group(1).strip()[:20]
-            
-            # Read todos
-            try:
-                todo_file = work_dir / '.kimi-todos.json'
-                if todo_file.exists():
-                    todos = json.loads(todo_file.read_text())
-                    context['gsd_todos_total'] = len(todos)
-                    context['gsd_todos_done'] = sum(1 for t in todos if t.get('done'))
-            except Exception:
-                pass
+            self._gsd_stats = gsd_stats.collector()
+            work_dir = str(self.runtime.builtin_args.KIMI_WORK_DIR)
+            watcher = self._gsd_watcher = gsd_watcher.get_watcher(
+                work_dir, gsd_runtime.project_todos_file(work_dir))
+        return watcher
+
+    def _gsd_get_publisher(self):
+        """Return the publisher pushing GSDStatusEvent deltas over the wire."""
+        publisher = getattr(self, '_gsd_publisher', None)
+        if publisher is None:
+            import gsd_events
+            from kimi_cli.wire.types import GSDStatusEvent
             
-            return context
+            self._gsd_wire = gsd_events.WireChannel(GSDStatusEvent)
+            publisher = self._gsd_publisher = gsd_events.StatusPublisher(
+                self._gsd_get_watcher(), self._gsd_wire.send)
+        if self._gsd_wire.bind():
+            # A new wire client is attached: start it off with a full snapshot
+            publisher.snapshot()
+        return publisher
+
+    def _load_gsd_context(self) -> dict:
+        """Return the GSD fields published by the background watcher."""
+        ctx = self._gsd_context()
+        return ctx.status_fields() if ctx is not None and ctx.enabled else {}
+
+    def _gsd_context(self):
+        # status is read while rendering: until the watcher is up (started
+        # once, off this thread) report no GSD context instead of waiting
+        watcher = getattr(self, '_gsd_watcher', None)
+        if watcher is None:
+            if not getattr(self, '_gsd_starting', False):
+                import threading
+                
+                self._gsd_starting = True
+                threading.Thread(target=self._gsd_start, name="gsd-soul-start",
+                                 daemon=True).start()
+            return None
+        try:
+            self._gsd_get_publisher()
         except Exception:
-            return {}
+            pass
+        return watcher.snapshot
+
+    def _gsd_start(self):
+        try:
+            self._gsd_get_watcher()
+        except Exception:
+            pass
 
     @property
     def status(self) -> StatusSnapshot:
-        base = StatusSnapshot(
-            context_usage=self._context_usage,
-            yolo_enabled=self._approval.is_yolo(),
+        stats = getattr(self, '_gsd_stats', None)
+        if stats is None:
+            return self._gsd_status()
+        with stats.timer('kimisoul.status'):
+            return self._gsd_status()
+
+    def _gsd_status(self) -> StatusSnapshot:
+        # GSD contexts are immutable and only replaced on change, so equal
+        # inputs return the previous StatusSnapshot object itself: callers
+        # can compare by identity, or by gsd_generation across reads
+        gsd_ctx = self._gsd_context()
+        key = (self._context_usage, self._approval.is_yolo(), gsd_ctx)
+        cached = getattr(self, '_gsd_status_cache', None)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        fields = gsd_ctx.status_fields() if gsd_ctx is not None and gsd_ctx.enabled else {}
+        snapshot = StatusSnapshot(
+            context_usage=key[0],
+            yolo_enabled=key[1],
+            gsd_generation=cached[1].gsd_generation + 1 if cached is not None else 1,
+            **fields
         )
-        
-        # Add GSD context
-        gsd_ctx = self._load_gsd_context()
-        if gsd_ctx.get('gsd_enabled'):
-            return StatusSnapshot(
-                context_usage=base.context_usage,
-                yolo_enabled=base.yolo_enabled,
-                **gsd_ctx
-            )
-        return base'''
-    
-    if old_status in content:
-        content = content.replace(old_status, new_status)
+        self._gsd_status_cache = (key, snapshot)
+        return snapshot'''
     
-    return content
+    return apply_edits(content, [
+        Edit("KimiSoul.status", "replace", new_status,
+             present="KimiSoul._load_gsd_context"),
+    ], "kimisoul.py")
 
 
 def patch_shell_init(content: str) -> str:
     """
     Patch ui/shell/__init__.py to add GSD welcome and update check.
     """
-    # Add GSD welcome after regular welcome
-    old_welcome = '''def _print_welcome_info(name: str, items: list[WelcomeInfoItem] | None):
-    console.print()
-    console.print(f"[bold]{name}[/bold]", justify="center")'''
-    
-    new_welcome = '''def _get_gsd_welcome() -> str | None:
+    # Add GSD welcome helper before the regular welcome
+    gsd_welcome_func = '''def _get_gsd_welcome() -> str | None:
     """Generate GSD welcome message."""
     try:
-        from pathlib import Path
-        import re
+        import gsd_stats
+        stats = gsd_stats.collector()
+    except Exception:
+        stats = None
+    if stats is None:
+        return _gsd_welcome_text()
+    with stats.timer('shell._get_gsd_welcome'):
+        return _gsd_welcome_text()
+
+
+def _gsd_welcome_text() -> str | None:
+    try:
+        import os
+        import gsd_runtime
+        import gsd_watcher
         
-        planning_dir = Path.cwd() / '.planning'
-        if not planning_dir.exists():
+        # Start the status bar watcher with the shell; the welcome itself
+        # is printed once, so it may read the (shared) cache directly.
+        gsd_watcher.get_watcher(os.getcwd(), gsd_runtime.session_todos_file())
+        ctx = gsd_runtime.get_context()
+        if not ctx.enabled:
             return None
         
         lines = ["[bold green]📋 GSD Project[/bold green]"]
-        
-        # Project name
-        project_file = planning_dir / 'PROJECT.md'
-        if project_file.exists():
-            content = project_file.read_text()
-            title_match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
-            if title_match:
-                lines.append(f"   [cyan]{title_match.group(1)}[/cyan]")
-        
-        # Current phase
-        state_file = planning_dir / 'STATE.md'
-        if state_file.exists():
-            content = state_file.read_text()
-            phase_match = re.search(r'Current Phase[:\s]+(\d+)', content, re.IGNORECASE)
-            if phase_match:
-                lines.append(f"   Phase: [yellow]{phase_match.group(1)}[/yellow]")
+        if ctx.project:
+            lines.append(f"   [cyan]{ctx.project}[/cyan]")
+        if ctx.phase:
+            lines.append(f"   Phase: [yellow]{ctx.phase}[/yellow]")
         
         return "\\n".join(lines)
     except Exception:
         return None
 
-def _print_welcome_info(name: str, items: list[WelcomeInfoItem] | None):
-    console.print()
-    console.print(f"[bold]{name}[/bold]", justify="center")
+
+'''
     
+    # ... and print it right after the name line
+    gsd_welcome = '''
     # ADD: GSD welcome
     gsd_welcome = _get_gsd_welcome()
     if gsd_welcome:
         console.print()
         console.print(gsd_welcome)'''
     
-    if old_welcome in content and '_get_gsd_welcome' not in content:
-        content = content.replace(old_welcome, new_welcome)
-    
-    return content
+    return apply_edits(content, [
+        Edit("_print_welcome_info", "insert_before", gsd_welcome_func,
+             present="_get_gsd_welcome"),
+        Edit("_print_welcome_info", "insert_after", gsd_welcome,
+             present="_print_welcome_info:_get_gsd_welcome",
+             statement=mentions("name"), statement_desc="statement printing name"),
+    ], "shell/__init__.py")
 
 
 def patch_wire_types(content: str) -> str:
     """
-    Patch wire/types.py to add GSD-specific wire messages (for future extensibility).
+    Patch wire/types.py to add GSD-specific wire messages.
     """
-    # Add GSD event type at end of file
+    # Add GSD event types at end of file
     gsd_event = '''
 
 # GSD Extension Events
 class GSDStatusEvent(BaseModel):
-    """GSD status update event."""
+    """GSD status update event.
+    
+    A full snapshot (``full=True``) sets every field. A delta only sets the
+    fields listed in ``changed``; clients merge those into their last state.
+    """
     
     type: Literal["gsd_status"] = "gsd_status"
+    full: bool = True
+    seq: int = 0
+    changed: list[str] = []
+    enabled: bool = False
     phase: str | None = None
     todos_total: int = 0
     todos_done: int = 0
     milestone: str | None = None
     project: str | None = None
-
 '''
     
-    if 'GSDStatusEvent' not in content:
-        content = content.rstrip() + gsd_event
-    
-    return content
+    # As for StatusSnapshot, changing these models needs a PATCH_VERSION bump
+    return apply_edits(content, [
+        Edit("", "append", gsd_event, present="GSDStatusEvent"),
+    ], "wire/types.py")
 
 
 # =============================================================================
@@ -529,11 +1201,41 @@ def apply_all_patches(kimi_root: Path) -> bool:
     print(f"\nTarget: {kimi_root}")
     
     patches = get_patches(kimi_root)
-    success = True
+    manifest = load_manifest(kimi_root)
+    states = verify_manifest(kimi_root, manifest)
+    rebuild = {p.name for p in patches if needs_rebuild(p, states[p.name], manifest)}
+    if rebuild and manifest is not None:
+        print(f"\nUpgrading patch v{manifest.get('patch_version')} → v{PATCH_VERSION}")
     
-    for patch in patches:
-        if not apply_patch(patch):
+    # Phase 1: read, transform and validate every target; nothing is written
+    # unless all of them succeed
+    prepared = prepare_patches(patches, rebuild)
+    failed = [p for p in prepared if p.error is not None]
+    for p in failed:
+        print(f"\n❌ {p.patch.description}: {p.error}")
+    
+    # Phase 2: commit through a journal, undoing every write on any failure
+    success = not failed
+    if success:
+        txn = PatchTransaction()
+        try:
+            success = install_runtime(kimi_root, txn)
+            if success:
+                for p in prepared:
+                    commit_patch(p, txn, states[p.patch.name])
+                sources = {p.patch.target: p.code for p in prepared}
+                sources.update((runtime_dir(kimi_root) / module, None) for module in RUNTIME_MODULES)
+                write_bytecode(kimi_root, sources, txn)
+                write_manifest(kimi_root, patches, txn)
+        except BaseException as e:
+            print(f"\n❌ Apply interrupted: {e!r}")
+            txn.rollback()
+            if not isinstance(e, Exception):
+                raise
             success = False
+        else:
+            if not success:
+                txn.rollback()
     
     print(f"\n{'='*60}")
     if success:
@@ -543,7 +1245,7 @@ def apply_all_patches(kimi_root: Path) -> bool:
         print("  2. Navigate to a GSD project directory")
         print("  3. See GSD status in the bottom toolbar!")
     else:
-        print("⚠️  Some patches failed. Run with 'restore' to rollback.")
+        print("⚠️  Apply failed; Kimi CLI was left unchanged.")
     print(f"{'='*60}\n")
     
     return success
@@ -556,13 +1258,25 @@ def restore_all_patches(kimi_root: Path) -> bool:
     print(f"{'='*60}\n")
     
     patches = get_patches(kimi_root)
+    states = verify_manifest(kimi_root)
     success = True
     
     for patch in patches:
-        if restore_file(patch.target):
+        if states[patch.name] == "modified" and patch.backup.exists():
+            # kimi-cli was upgraded over the patch: the backup is older than
+            # the installed file, so restoring it would downgrade kimi-cli
+            patch.backup.unlink()
+            print(f"  ⚠️  {patch.name} changed since patching; dropped stale backup")
+        elif restore_file(patch.target):
             pass
         else:
             print(f"  ⚠️  No backup found for {patch.name}")
+        remove_bytecode(patch.target)
+    
+    for module in RUNTIME_MODULES:
+        remove_bytecode(runtime_dir(kimi_root) / module)
+    remove_runtime(kimi_root)
+    manifest_path(kimi_root).unlink(missing_ok=True)
     
     print(f"\n{'='*60}")
     print("✅ Restore complete!")
@@ -577,17 +1291,67 @@ def check_status(kimi_root: Path) -> None:
     print("📊 Patching Status")
     print(f"{'='*60}\n")
     
-    patches = get_patches(kimi_root)
+    version = kimi_cli_version(kimi_root)
+    print(f"Kimi CLI {version or '(unknown version)'}: {kimi_root}\n")
     
-    for patch in patches:
-        status = "✅ Patched" if patch.backup.exists() else "❌ Not patched"
-        exists = "📁" if patch.target.exists() else "❓"
-        print(f"{exists} {patch.name:25} {status}")
+    manifest = load_manifest(kimi_root)
+    labels = {
+        "patched": "✅ Patched",
+        "original": "❌ Not patched",
+        "modified": "⚠️  Changed since patching (kimi-cli upgraded?)",
+        "missing": "❌ Missing",
+    }
+    
+    backups = {patch.name: patch.backup for patch in get_patches(kimi_root)}
+    
+    for name, state in verify_manifest(kimi_root, manifest).items():
+        if state == "unknown":
+            # No manifest entry (patched by an older patcher): fall back to backups
+            legacy_patched = backups[name].exists() if name in backups else True
+            state = "patched" if legacy_patched else "original"
+        exists = "❓" if state == "missing" else "📁"
+        label = "✅ Installed" if state == "patched" and name in RUNTIME_MODULES else labels[state]
+        print(f"{exists} {name:25} {label}")
+    
+    if manifest is None:
+        print("\nℹ️  No patch manifest found; run 'apply' to create one.")
+    elif manifest.get("patch_version") != PATCH_VERSION:
+        print(f"\nℹ️  Patched by v{manifest.get('patch_version')}; run 'apply' to update to v{PATCH_VERSION}.")
+    if apply_failed(kimi_root):
+        print(f"\n⚠️  The last apply of v{PATCH_VERSION} failed; jim skips it until kimi-cli "
+              "or the patch version changes. Run 'apply' to retry.")
     
     print(f"\n{'='*60}\n")
 
 
+def run_action(action: str, kimi_root: Path | None = None) -> int:
+    """Run apply/restore/status and return an exit code (used by jim in-process)."""
+    if kimi_root is None:
+        try:
+            kimi_root = get_kimi_cli_root()
+        except FileNotFoundError as e:
+            print(f"❌ Error: {e}")
+            print("\nMake sure Kimi CLI is installed:")
+            print("  uv tool install kimi-cli")
+            return 1
+    
+    if action == "apply":
+        ok = False
+        try:
+            ok = apply_all_patches(kimi_root)
+        finally:
+            record_apply_result(kimi_root, ok)
+        return 0 if ok else 1
+    elif action == "restore":
+        return 0 if restore_all_patches(kimi_root) else 1
+    else:
+        check_status(kimi_root)
+        return 0
+
+
 def main():
+    import argparse
+    
     parser = argparse.ArgumentParser(
         description="Kimi CLI GSD Patcher - Enable full GSD integration"
     )
@@ -600,22 +1364,7 @@ def main():
     )
     
     args = parser.parse_args()
-    
-    try:
-        kimi_root = get_kimi_cli_root()
-    except FileNotFoundError as e:
-        print(f"❌ Error: {e}")
-        print("\nMake sure Kimi CLI is installed:")
-        print("  uv tool install kimi-cli")
-        return 1
-    
-    if args.action == "apply":
-        return 0 if apply_all_patches(kimi_root) else 1
-    elif args.action == "restore":
-        return 0 if restore_all_patches(kimi_root) else 1
-    else:
-        check_status(kimi_root)
-        return 0
+    return run_action(args.action)
 
 
 if __name__ == "__main__":
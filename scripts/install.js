@@ -263,31 +263,21 @@ function installPatches() {
     fs.mkdirSync(jimDir, { recursive: true });
   }
   
+  // Thin launcher: run jim-wrapper.py in this interpreter (no subprocess);
+  // the wrapper then execs kimi in place of this process
   const jimScript = `#!/usr/bin/env python3
+import os
 import sys
-from pathlib import Path
-
-patches_dir = Path.home() / '.kimi' / 'patches'
-sys.path.insert(0, str(patches_dir))
-
-if len(sys.argv) > 1 and sys.argv[1] in ['--patch', '--restore', '--status']:
-    patcher = patches_dir / 'kimi_cli_patcher_v2.py'
-    if not patcher.exists():
-        patcher = patches_dir / 'kimi_cli_patcher.py'
-    if patcher.exists():
-        import subprocess
-        action = sys.argv[1].replace('--', '')
-        subprocess.run([sys.executable, str(patcher), action])
-    else:
-        print("❌ Patcher not found. Run: node scripts/install.js")
-else:
-    import subprocess
-    agent_file = Path.home() / '.kimi' / 'gsd-agent.yaml'
-    cmd = ['kimi']
-    if agent_file.exists():
-        cmd.extend(['--agent-file', str(agent_file)])
-    cmd.extend(sys.argv[1:])
-    subprocess.run(cmd)
+from importlib.machinery import SourceFileLoader
+
+wrapper = os.path.join(os.path.expanduser('~'), '.kimi', 'patches', 'jim-wrapper.py')
+if not os.path.exists(wrapper):
+    print("❌ jim-wrapper.py not found. Run: node scripts/install.js")
+    sys.exit(1)
+sys.argv[0] = wrapper
+# Loaded like an import, so its bytecode is cached in __pycache__ and reused
+code = SourceFileLoader('__main__', wrapper).get_code('__main__')
+exec(code, {'__name__': '__main__', '__file__': wrapper})
 `;
   
   fs.writeFileSync(jimPath, jimScript);
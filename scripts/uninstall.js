@@ -190,6 +190,31 @@ function uninstallMasterAgent() {
     }
   }
   
+  // Caches built at run time: jim's pre-resolved agent bundle
+  // (patches/gsd_bundle.py) and the todo summaries (patches/gsd_todos.py)
+  for (const cacheDir of [path.join(KIMI_DIR, 'gsd-bundle'), path.join(KIMI_DIR, 'cache', 'todos')]) {
+    if (!fs.existsSync(cacheDir)) continue;
+    try {
+      fs.rmSync(cacheDir, { recursive: true, force: true });
+      console.log(`  ✓ ${cacheDir}`);
+      removed++;
+    } catch (err) {
+      console.error(`  ✗ ${cacheDir} - ${err.message}`);
+    }
+  }
+  
+  // Manifest of patches/gsd_install.py; its files are removed above
+  const installManifest = path.join(KIMI_DIR, 'gsd-install-manifest.json');
+  if (fs.existsSync(installManifest)) {
+    try {
+      fs.unlinkSync(installManifest);
+      console.log(`  ✓ ${installManifest}`);
+      removed++;
+    } catch (err) {
+      console.error(`  ✗ ${installManifest} - ${err.message}`);
+    }
+  }
+  
   if (removed === 0) {
     console.log('  ℹ️  No master agent files found');
   }
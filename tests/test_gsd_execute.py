@@ -0,0 +1,242 @@
+"""jim execute-phase: the plan DAG and the worker scheduler."""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "patches"))
+
+import gsd_execute  # noqa: E402
+import gsd_index  # noqa: E402
+
+PHASE_DIR = Path(".planning") / "phases" / "04-api"
+
+# Stands in for `kimi --print`: logs start/end to GSD_TEST_EVENTS, waits
+# GSD_TEST_DELAYS[plan] seconds, then writes the SUMMARY.md it was asked for
+# unless the plan is listed in GSD_TEST_FAIL.
+WORKER = textwrap.dedent("""\
+    import json, os, re, sys, time
+    prompt = sys.argv[sys.argv.index('--command') + 1]
+    plan_id = re.search(r'type\\(([^)]+)\\)', prompt).group(1)
+    summary = re.search(r'^3\\. Create (\\S+)$', prompt, re.MULTILINE).group(1)
+    def event(kind):
+        with open(os.environ['GSD_TEST_EVENTS'], 'a') as f:
+            f.write(f'{kind} {plan_id}\\n')
+    event('start')
+    print(f'working on {plan_id}')
+    time.sleep(json.loads(os.environ.get('GSD_TEST_DELAYS', '{}')).get(plan_id, 0.05))
+    failed = plan_id in os.environ.get('GSD_TEST_FAIL', '').split(',')
+    if not failed:
+        with open(summary, 'w') as f:
+            f.write('# Summary\\n')
+    event('end')
+    sys.exit(1 if failed else 0)
+""")
+
+
+class ExecuteTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory(prefix="gsd-execute-")
+        self.base = Path(self._tmp.name).resolve()
+        self.root = self.base / "project"
+        (self.root / PHASE_DIR).mkdir(parents=True)
+        self.worker = self.base / "fake_kimi.py"
+        self.worker.write_text(WORKER)
+        self.events = self.base / "events.log"
+        agent = self.base / "agent.yaml"
+        agent.write_text("version: 1\n")
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        self.addCleanup(os.chdir, cwd)
+        for patcher in (mock.patch.object(gsd_execute, "RUNS_DIR", str(self.base / "runs")),
+                        mock.patch.dict(os.environ, {"GSD_EXECUTOR_AGENT": str(agent),
+                                                     "GSD_TEST_EVENTS": str(self.events)})):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        os.environ.pop("JIM_DRY_RUN", None)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def plan(self, number: int, wave: int = 1, depends_on: list[str] | None = None,
+             autonomous: bool = True, done: bool = False) -> None:
+        plan_id = f"04-{number:02}"
+        lines = ["---", "phase: 04-api", f"plan: {number:02}", f"wave: {wave}"]
+        if depends_on is not None:
+            lines.append(f"depends_on: [{', '.join(json.dumps(d) for d in depends_on)}]")
+        if not autonomous:
+            lines.append("autonomous: false")
+        lines += ["---", "", f"# Plan {plan_id}", "", "## Task 1: build it", ""]
+        (self.root / PHASE_DIR / f"{plan_id}-PLAN.md").write_text("\n".join(lines))
+        if done:
+            (self.root / PHASE_DIR / f"{plan_id}-SUMMARY.md").write_text("# Summary\n")
+
+    def graph(self) -> tuple[dict[str, gsd_execute.PlanNode], list[str]]:
+        with gsd_index.open_index(str(self.root)) as index:
+            plans = index.plans("4")
+            all_plans = {plan["plan_id"]: plan["done"] for plan in index.plans()}
+        return gsd_execute.build_graph(plans, all_plans)
+
+    def execute(self, *args: str, **env: str) -> tuple[int, str]:
+        out = io.StringIO()
+        build = lambda argv: [sys.executable, str(self.worker), *argv]  # noqa: E731
+        with mock.patch.dict(os.environ, env), contextlib.redirect_stdout(out):
+            returncode = gsd_execute.main(["4", *args], build_command=build)
+        return returncode, out.getvalue()
+
+    def timeline(self) -> list[str]:
+        return self.events.read_text().splitlines() if self.events.exists() else []
+
+    def summary(self, number: int) -> bool:
+        return (self.root / PHASE_DIR / f"04-{number:02}-SUMMARY.md").exists()
+
+
+class BuildGraphTest(ExecuteTestCase):
+
+    def test_waves_without_depends_on(self) -> None:
+        self.plan(1, wave=1)
+        self.plan(2, wave=1)
+        self.plan(3, wave=2)
+        self.plan(4, wave=4)
+        nodes, problems = self.graph()
+        self.assertEqual(problems, [])
+        self.assertEqual(nodes["04-01"].depends_on, set())
+        self.assertEqual(nodes["04-03"].depends_on, {"04-01", "04-02"})
+        # The nearest lower wave, even with a gap in the numbering
+        self.assertEqual(nodes["04-04"].depends_on, {"04-03"})
+        self.assertEqual(nodes["04-01"].dependents, {"04-03"})
+
+    def test_depends_on_across_waves(self) -> None:
+        self.plan(1, wave=1)
+        self.plan(2, wave=2)
+        self.plan(3, wave=3, depends_on=["01", "04-02-PLAN.md"])
+        self.plan(4, wave=3, depends_on=["04-01"])
+        nodes, problems = self.graph()
+        self.assertEqual(problems, [])
+        self.assertEqual(nodes["04-03"].depends_on, {"04-01", "04-02"})
+        self.assertEqual(nodes["04-04"].depends_on, {"04-01"})
+
+    def test_completed_plans_are_left_out(self) -> None:
+        self.plan(1, wave=1, done=True)
+        self.plan(2, wave=2, depends_on=["01"])
+        self.plan(3, wave=2)
+        nodes, problems = self.graph()
+        self.assertEqual(problems, [])
+        self.assertEqual(sorted(nodes), ["04-02", "04-03"])
+        self.assertEqual(nodes["04-02"].depends_on, set())
+        self.assertEqual(nodes["04-03"].depends_on, set())
+
+    def test_unknown_dependency(self) -> None:
+        self.plan(1, wave=1, depends_on=["99"])
+        self.plan(2, wave=2)
+        nodes, problems = self.graph()
+        self.assertEqual(nodes["04-01"].state, gsd_execute.SKIPPED)
+        self.assertEqual(problems, ["04-01: depends on 99, which is not complete"])
+        self.assertEqual(nodes["04-02"].depends_on, {"04-01"})
+
+    def test_cycle(self) -> None:
+        self.plan(1, wave=1, depends_on=["03"])
+        self.plan(2, wave=1)
+        self.plan(3, wave=2, depends_on=["01"])
+        nodes, problems = self.graph()
+        self.assertEqual(problems, ["dependency cycle between 04-01, 04-03"])
+        self.assertEqual(nodes["04-02"].depends_on, set())
+
+
+class SchedulerTest(ExecuteTestCase):
+
+    def test_plans_start_when_their_inputs_finish(self) -> None:
+        self.plan(1, wave=1)
+        self.plan(2, wave=1)
+        self.plan(3, wave=2)
+        self.plan(4, wave=3, depends_on=["01"])
+        returncode, out = self.execute("--jobs", "3",
+                                       GSD_TEST_DELAYS=json.dumps({"04-01": 0.3, "04-02": 1.2}))
+        self.assertEqual(returncode, 0, out)
+        self.assertTrue(all(self.summary(n) for n in (1, 2, 3, 4)))
+        events = self.timeline()
+        at = events.index
+        # 04-01 and 04-02 run together; 04-04 does not wait for wave 2
+        self.assertLess(at("start 04-02"), at("end 04-01"))
+        self.assertLess(at("end 04-01"), at("start 04-04"))
+        self.assertLess(at("start 04-04"), at("end 04-02"))
+        # 04-03 waits for the whole of wave 1
+        self.assertLess(at("end 04-02"), at("start 04-03"))
+        self.assertIn("done", out)
+        logs = list((self.base / "runs").glob("04-api-*/04-01.log"))
+        self.assertEqual(len(logs), 1)
+        self.assertEqual(logs[0].read_text(), "working on 04-01\n")
+
+    def test_jobs_limit(self) -> None:
+        for number in (1, 2, 3):
+            self.plan(number, wave=1)
+        returncode, out = self.execute("--jobs", "1")
+        self.assertEqual(returncode, 0, out)
+        self.assertEqual(self.timeline(), ["start 04-01", "end 04-01", "start 04-02",
+                                           "end 04-02", "start 04-03", "end 04-03"])
+
+    def test_failure_skips_dependents(self) -> None:
+        self.plan(1, wave=1)
+        self.plan(2, wave=1)
+        self.plan(3, wave=2, depends_on=["01"])
+        self.plan(4, wave=2, depends_on=["02"])
+        returncode, out = self.execute(GSD_TEST_FAIL="04-01")
+        self.assertEqual(returncode, 1)
+        self.assertNotIn("start 04-03", self.timeline())
+        self.assertIn("start 04-04", self.timeline())
+        self.assertIn("04-03  skipped: 04-01 did not complete", out)
+        self.assertEqual([self.summary(n) for n in (1, 2, 3, 4)], [False, True, False, True])
+
+    def test_checkpoint_plans_are_left_for_the_skill(self) -> None:
+        self.plan(1, wave=1, autonomous=False)
+        self.plan(2, wave=2)
+        returncode, out = self.execute()
+        self.assertEqual(returncode, 1)
+        self.assertEqual(self.timeline(), [])
+        self.assertIn("04-01  left for /skill:gsd-execute-phase", out)
+        self.assertIn("04-02  skipped: 04-01 did not complete", out)
+
+    def test_unknown_dependency_is_skipped(self) -> None:
+        self.plan(1, wave=1, depends_on=["07-01"])
+        self.plan(2, wave=1)
+        returncode, out = self.execute()
+        self.assertEqual(returncode, 1)
+        self.assertEqual(self.timeline(), ["start 04-02", "end 04-02"])
+        self.assertIn("⚠️  04-01: depends on 07-01, which is not complete", out)
+
+    def test_cycle_runs_nothing(self) -> None:
+        self.plan(1, wave=1, depends_on=["02"])
+        self.plan(2, wave=1, depends_on=["01"])
+        returncode, out = self.execute()
+        self.assertEqual(returncode, 2)
+        self.assertEqual(self.timeline(), [])
+        self.assertIn("dependency cycle between 04-01, 04-02", out)
+
+    def test_dry_run(self) -> None:
+        self.plan(1, wave=1)
+        self.plan(2, wave=2)
+        returncode, out = self.execute("--dry-run")
+        self.assertEqual(returncode, 0)
+        self.assertEqual(self.timeline(), [])
+        self.assertIn("wave 2  04-02 after 04-01", out)
+
+    def test_nothing_pending(self) -> None:
+        self.plan(1, wave=1, done=True)
+        returncode, out = self.execute()
+        self.assertEqual(returncode, 0)
+        self.assertIn("no pending plans", out)
+
+
+if __name__ == "__main__":
+    unittest.main()
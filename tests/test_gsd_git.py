@@ -0,0 +1,189 @@
+"""gsd_git reads branch and dirty state from real git repositories."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "patches"))
+
+import gsd_git  # noqa: E402
+
+FILES = {
+    "README.md": "# Demo\n",
+    "src/app/main.py": "print('main')\n",
+    "src/app/util.py": "VALUE = 1\n",
+    "src/app/utils/helpers.py": "def helper():\n    pass\n",
+    "src/lib.py": "LIB = True\n",
+}
+
+
+@unittest.skipIf(shutil.which("git") is None, "git is not installed")
+class GitIndexTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory(prefix="gsd-git-")
+        self.base = Path(self._tmp.name)
+        self.env = dict(os.environ, HOME=self._tmp.name, GIT_CONFIG_NOSYSTEM="1",
+                        GIT_AUTHOR_NAME="gsd", GIT_AUTHOR_EMAIL="gsd@example.com",
+                        GIT_COMMITTER_NAME="gsd", GIT_COMMITTER_EMAIL="gsd@example.com")
+        self.env.pop("GIT_DIR", None)
+        self.env.pop("GIT_INDEX_FILE", None)
+        self.repo = self.base / "repo"
+        self.repo.mkdir()
+        self.git("init", "-q", "-b", "main")
+        for name, text in FILES.items():
+            path = self.repo / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text)
+        self.age(self.repo)
+        self.git("add", ".")
+        self.git("commit", "-q", "-m", "initial")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def git(self, *args: str, cwd: Path | None = None) -> str:
+        return subprocess.run(["git", *args], cwd=cwd or self.repo, env=self.env,
+                              check=True, capture_output=True, text=True).stdout.strip()
+
+    def age(self, root: Path, seconds: int = 120) -> None:
+        """Back-date the worktree so git never stores racily-clean entries.
+
+        Whole seconds apart from earlier calls: git may compare mtimes at
+        second granularity and then keep the old nanoseconds in the index.
+        """
+        past = int(time.time()) - seconds
+        for name in FILES:
+            os.utime(root / name, (past, past))
+
+    def entries(self, root: Path | None = None) -> list[gsd_git.IndexEntry]:
+        root = root or self.repo
+        git_dir = self.git("rev-parse", "--absolute-git-dir", cwd=root)
+        with open(os.path.join(git_dir, "index"), "rb") as f:
+            entries = gsd_git.parse_index(f.read())
+        self.assertIsNotNone(entries)
+        return entries
+
+    def changed(self, root: Path | None = None) -> list[str]:
+        root = root or self.repo
+        root_bytes = os.fsencode(root)
+        return [entry[0].decode() for entry in self.entries(root)
+                if gsd_git.entry_changed(root_bytes, entry)]
+
+    def status(self, work_dir: Path | None = None) -> gsd_git.GitStatus:
+        watcher = gsd_git.GitWatcher(str(work_dir or self.repo), interval=1, max_files=1000)
+        return watcher.refresh()
+
+    # -- parse_index / entry_changed -------------------------------------------
+
+    def test_index_versions(self) -> None:
+        for version in ("2", "3", "4"):
+            with self.subTest(version=version):
+                self.git("update-index", "--index-version", version)
+                entries = self.entries()
+                self.assertEqual([e[0].decode() for e in entries], sorted(FILES))
+                self.assertEqual([e[3] for e in entries],
+                                 [len(FILES[name]) for name in sorted(FILES)])
+                self.assertEqual(self.changed(), [])
+
+    def test_v4_prefix_compression(self) -> None:
+        # Deep paths sharing long prefixes exercise the stripped-length varint
+        names = [f"deep/{'nested/' * 20}file{i:03}.txt" for i in range(150)]
+        for name in names:
+            path = self.repo / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(name)
+        self.git("add", ".")
+        self.git("update-index", "--index-version", "4")
+        parsed = [e[0].decode() for e in self.entries()]
+        self.assertEqual(parsed, self.git("ls-files").splitlines())
+        self.assertTrue(set(names) <= set(parsed))
+
+    def test_entry_changed(self) -> None:
+        self.git("update-index", "--index-version", "4")
+        (self.repo / "src/app/util.py").write_text("VALUE = 22\n")
+        self.assertEqual(self.changed(), ["src/app/util.py"])
+        (self.repo / "src/lib.py").unlink()
+        self.assertEqual(self.changed(), ["src/app/util.py", "src/lib.py"])
+        self.git("checkout", "--", ".")
+        self.age(self.repo, 60)
+        self.git("update-index", "--refresh")
+        self.assertEqual(self.changed(), [])
+        os.chmod(self.repo / "README.md", 0o755)
+        self.assertEqual(self.changed(), ["README.md"])
+
+    def test_skip_worktree_entries_are_ignored(self) -> None:
+        self.git("update-index", "--skip-worktree", "src/lib.py")
+        (self.repo / "src/lib.py").unlink()
+        self.assertNotIn("src/lib.py", [e[0].decode() for e in self.entries()])
+        self.assertFalse(self.status().dirty)
+
+    # -- GitWatcher ------------------------------------------------------------
+
+    def test_branch_and_dirty(self) -> None:
+        head = self.git("rev-parse", "HEAD")
+        status = self.status(self.repo / "src" / "app")
+        self.assertEqual(status, gsd_git.GitStatus(str(self.repo), "main", head, False))
+        self.assertEqual(status.label, "main")
+        (self.repo / "README.md").write_text("# Changed\n")
+        self.assertTrue(self.status().dirty)
+
+    def test_packed_refs(self) -> None:
+        head = self.git("rev-parse", "HEAD")
+        self.git("pack-refs", "--all")
+        self.assertFalse((self.repo / ".git/refs/heads/main").exists())
+        self.assertEqual(self.status().commit, head)
+
+    def test_detached_head(self) -> None:
+        head = self.git("rev-parse", "HEAD")
+        self.git("checkout", "-q", "--detach")
+        status = self.status()
+        self.assertIsNone(status.branch)
+        self.assertEqual(status.commit, head)
+        self.assertEqual(status.label, f"@{head[:7]}")
+        self.assertFalse(status.dirty)
+
+    def test_unborn_branch(self) -> None:
+        empty = self.base / "empty"
+        empty.mkdir()
+        self.git("init", "-q", "-b", "trunk", cwd=empty)
+        status = self.status(empty)
+        # No index file yet, so the dirty state is unknown
+        self.assertEqual((status.branch, status.commit, status.dirty), ("trunk", None, None))
+        self.assertEqual(status.label, "trunk")
+
+    def test_linked_worktree(self) -> None:
+        worktree = self.base / "feature-wt"
+        self.git("worktree", "add", "-q", "-b", "feature", str(worktree))
+        self.assertTrue((worktree / ".git").is_file())
+        self.age(worktree, 60)
+        self.git("update-index", "--refresh", cwd=worktree)
+        self.git("update-index", "--index-version", "4", cwd=worktree)
+
+        status = self.status(worktree / "src")
+        self.assertEqual(status.root, str(worktree))
+        self.assertEqual(status.branch, "feature")
+        self.assertEqual(status.commit, self.git("rev-parse", "HEAD"))
+        self.assertFalse(status.dirty)
+        # The worktree has its own index; the main checkout stays clean
+        (worktree / "src/lib.py").write_text("LIB = False\n")
+        self.assertEqual(self.changed(worktree), ["src/lib.py"])
+        self.assertTrue(self.status(worktree).dirty)
+        self.assertFalse(self.status().dirty)
+
+    def test_not_a_repository(self) -> None:
+        outside = self.base / "plain"
+        outside.mkdir()
+        self.assertEqual(self.status(outside), gsd_git.EMPTY_STATUS)
+
+
+if __name__ == "__main__":
+    unittest.main()
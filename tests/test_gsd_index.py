@@ -0,0 +1,257 @@
+"""gsd_index: the frontmatter parser and incremental index updates."""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "patches"))
+
+import gsd_index  # noqa: E402
+
+PLAN = """\
+---
+phase: 01-setup
+plan: 01
+type: execute
+wave: {wave}
+depends_on: []
+files_modified: [src/app.py, "src/a, b.py"]
+autonomous: {autonomous}
+must_haves:
+  truths:
+    - "App starts"
+    - Config is read  # trailing comment
+  artifacts:
+    - path: src/app.py
+      provides: entry point
+  key_links: []
+---
+
+# {title}
+
+## Task 1: scaffold
+- [x] create app
+- [ ] wire config
+
+## Task 2: test
+- [ ] add tests
+"""
+
+
+class FrontmatterTest(unittest.TestCase):
+
+    def parse(self, text: str) -> dict:
+        return gsd_index.parse_frontmatter(textwrap.dedent(text))
+
+    def test_scalars(self) -> None:
+        front = self.parse("""\
+            ---
+            wave: 2
+            autonomous: false
+            gap_closure: yes
+            title: "Quoted: value"
+            single: 'it''s'
+            empty:
+            nothing: ~
+            phase: 02.1-fix   # comment
+            tag: a#b
+            ---
+            """)
+        self.assertEqual(front, {
+            'wave': 2, 'autonomous': False, 'gap_closure': True,
+            'title': 'Quoted: value', 'single': "it's", 'empty': None,
+            'nothing': None, 'phase': '02.1-fix', 'tag': 'a#b'})
+
+    def test_lists(self) -> None:
+        front = self.parse("""\
+            ---
+            flow: [01, "02, 03", 'x']
+            nested_flow: [[1, 2], 3]
+            block:
+              - first
+              - "second # not a comment"
+            unindented:
+            - a
+            - b
+            ---
+            """)
+        self.assertEqual(front['flow'], [1, '02, 03', 'x'])
+        self.assertEqual(front['nested_flow'], [[1, 2], 3])
+        self.assertEqual(front['block'], ['first', 'second # not a comment'])
+        self.assertEqual(front['unindented'], ['a', 'b'])
+
+    def test_nested_mappings_and_lists_of_mappings(self) -> None:
+        front = self.parse("""\
+            ---
+            must_haves:
+              truths:
+                - works
+              artifacts:
+                - path: src/a.py
+                  provides: thing
+                  min_lines: 10
+                - path: src/b.py
+              key_links:
+                - from: a
+                  to: b
+            after: 1
+            ---
+            """)
+        self.assertEqual(front, {
+            'must_haves': {
+                'truths': ['works'],
+                'artifacts': [{'path': 'src/a.py', 'provides': 'thing', 'min_lines': 10},
+                              {'path': 'src/b.py'}],
+                'key_links': [{'from': 'a', 'to': 'b'}],
+            },
+            'after': 1,
+        })
+
+    def test_tabs_and_blank_lines(self) -> None:
+        front = self.parse("---\nouter:\n\tinner: 1\n\n\tother: two\n---\n")
+        self.assertEqual(front, {'outer': {'inner': 1, 'other': 'two'}})
+
+    def test_no_frontmatter(self) -> None:
+        self.assertEqual(self.parse("# Title\n"), {})
+        self.assertEqual(self.parse("---\nwave: 1\n"), {})
+
+
+class IndexUpdateTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory(prefix="gsd-index-")
+        self.planning = Path(self._tmp.name) / ".planning"
+        self.tick = 1_700_000_000 * 10**9
+        self.write("ROADMAP.md", "# Roadmap\n- [x] Phase 1\n- [ ] Phase 2\n")
+        self.write("STATE.md", "Current Phase: 1\n")
+        self.write("phases/01-setup/01-01-PLAN.md", self.plan_text("Setup app"))
+        self.write("phases/01-setup/01-02-PLAN.md", self.plan_text("Config", wave=2))
+        self.write("phases/02.1-hotfix/02.1-01-PLAN.md", self.plan_text("Fix", autonomous="false"))
+        self.write("phases/01-setup/notes/01-99-PLAN.md", self.plan_text("Too deep"))
+        self.index = gsd_index.PlanningIndex(str(self.planning))
+
+    def tearDown(self) -> None:
+        self.index.close()
+        self._tmp.cleanup()
+
+    def plan_text(self, title: str, wave: int = 1, autonomous: str = "true") -> str:
+        return PLAN.format(title=title, wave=wave, autonomous=autonomous)
+
+    def write(self, rel: str, text: str) -> None:
+        """Write a file with a strictly increasing mtime, whatever the clock."""
+        path = self.planning / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+        self.touch(rel)
+
+    def touch(self, rel: str) -> None:
+        self.tick += 10**9
+        os.utime(self.planning / rel, ns=(self.tick, self.tick))
+
+    def rows(self, sql: str) -> list[dict]:
+        return self.index.query(sql)
+
+    def update(self) -> tuple[int, int, int, int]:
+        result = self.index.update()
+        return result.scanned, result.parsed, result.rehashed, result.removed
+
+    def test_initial_index(self) -> None:
+        self.assertEqual(self.update(), (6, 6, 0, 0))
+        self.assertEqual(self.rows("SELECT dir, number, ordinal, name FROM phases ORDER BY ordinal"), [
+            {'dir': 'phases/01-setup', 'number': '01', 'ordinal': 1.0, 'name': 'setup'},
+            {'dir': 'phases/02.1-hotfix', 'number': '02.1', 'ordinal': 2.1, 'name': 'hotfix'},
+        ])
+        plans = self.index.plans()
+        # Files nested below a phase directory are indexed but are not plans
+        self.assertEqual([p['plan_id'] for p in plans], ['01-01', '01-02', '02.1-01'])
+        first = plans[0]
+        self.assertEqual((first['title'], first['type'], first['wave'], first['task_count'],
+                          first['checkbox_total'], first['checkbox_done'], first['done']),
+                         ('Setup app', 'execute', 1, 2, 3, 1, False))
+        self.assertEqual(plans[2]['autonomous'], False)
+        self.assertEqual(self.rows("SELECT files_modified FROM plans WHERE plan_id = '01-01'"),
+                         [{'files_modified': '["src/app.py", "src/a, b.py"]'}])
+        self.assertEqual(self.index.must_haves('phases/01-setup/01-01-PLAN.md'), {
+            'truths': ['App starts', 'Config is read'],
+            'artifacts': [{'path': 'src/app.py', 'provides': 'entry point'}],
+            'key_links': [],
+        })
+        self.assertEqual(self.index.checkboxes('ROADMAP.md'), (2, 1))
+
+    def test_unchanged_tree_is_not_reparsed(self) -> None:
+        self.update()
+        self.assertEqual(self.update(), (6, 0, 0, 0))
+        # Touched without a content change: rehashed, rows kept
+        self.touch("phases/01-setup/01-01-PLAN.md")
+        self.assertEqual(self.update(), (6, 0, 1, 0))
+        self.assertEqual(len(self.index.plans()), 3)
+
+    def test_changed_file(self) -> None:
+        self.update()
+        self.write("phases/01-setup/01-02-PLAN.md", self.plan_text("Config v2", wave=3))
+        self.write("ROADMAP.md", "# Roadmap\n- [x] Phase 1\n- [x] Phase 2\n")
+        self.assertEqual(self.update(), (6, 2, 0, 0))
+        plan = self.rows("SELECT title, wave FROM plans WHERE plan_id = '01-02'")
+        self.assertEqual(plan, [{'title': 'Config v2', 'wave': 3}])
+        self.assertEqual(self.index.checkboxes('ROADMAP.md'), (2, 2))
+        # must_haves are replaced, not duplicated
+        self.assertEqual(self.rows("SELECT COUNT(*) AS n FROM must_haves "
+                                   "WHERE plan_path = 'phases/01-setup/01-02-PLAN.md'"),
+                         [{'n': 3}])
+
+    def test_added_and_deleted_files(self) -> None:
+        self.update()
+        self.write("phases/01-setup/01-01-SUMMARY.md", "# Done\n")
+        self.write("phases/03-ship/03-01-PLAN.md", self.plan_text("Ship"))
+        (self.planning / "phases/01-setup/01-02-PLAN.md").unlink()
+        self.assertEqual(self.update(), (7, 2, 0, 1))
+        self.assertEqual([(p['plan_id'], p['phase'], p['done']) for p in self.index.plans()],
+                         [('01-01', '01', True), ('02.1-01', '02.1', False), ('03-01', '03', False)])
+        self.assertEqual(self.rows("SELECT COUNT(*) AS n FROM must_haves "
+                                   "WHERE plan_path = 'phases/01-setup/01-02-PLAN.md'"),
+                         [{'n': 0}])
+        self.assertEqual([p['phase'] for p in self.index.phases()], ['01', '02.1', '03'])
+
+        # Deleting the summary makes the plan pending again
+        (self.planning / "phases/01-setup/01-01-SUMMARY.md").unlink()
+        self.assertEqual(self.update(), (6, 0, 0, 1))
+        self.assertEqual([p['plan_id'] for p in self.index.plans('1', pending=True)], ['01-01'])
+
+    def test_plan_status_view(self) -> None:
+        self.write("phases/02.1-hotfix/02.1-01-SUMMARY.md", "# Done\n")
+        self.update()
+        rows = self.rows("SELECT plan_id, phase, phase_ordinal, wave, done FROM plan_status "
+                         "ORDER BY phase_ordinal, plan_id")
+        self.assertEqual(rows, [
+            {'plan_id': '01-01', 'phase': '01', 'phase_ordinal': 1.0, 'wave': 1, 'done': 0},
+            {'plan_id': '01-02', 'phase': '01', 'phase_ordinal': 1.0, 'wave': 2, 'done': 0},
+            {'plan_id': '02.1-01', 'phase': '02.1', 'phase_ordinal': 2.1, 'wave': 1, 'done': 1},
+        ])
+        self.assertEqual(self.index.phases(), [
+            {'dir': 'phases/01-setup', 'phase': '01', 'name': 'setup',
+             'plans': 2, 'done': 0, 'waves': 2},
+            {'dir': 'phases/02.1-hotfix', 'phase': '02.1', 'name': 'hotfix',
+             'plans': 1, 'done': 1, 'waves': 1},
+        ])
+        self.assertEqual(list(self.index.pending_by_wave('1')), [1, 2])
+        self.assertEqual(self.index.find_phase('2.1'), 'phases/02.1-hotfix')
+        self.assertEqual(self.index.find_phase('1'), 'phases/01-setup')
+        self.assertIsNone(self.index.find_phase('9'))
+
+    def test_schema_change_rebuilds(self) -> None:
+        self.update()
+        self.index.db.execute('PRAGMA user_version = 0')
+        self.index.close()
+        self.index = gsd_index.PlanningIndex(str(self.planning))
+        self.assertEqual(self.rows("SELECT COUNT(*) AS n FROM files"), [{'n': 0}])
+        self.assertEqual(self.update(), (6, 6, 0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+"""Header scanning and numeric settings in gsd_runtime."""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "patches"))
+
+import gsd_events  # noqa: E402
+import gsd_runtime  # noqa: E402
+
+
+class ScanChunksTest(unittest.TestCase):
+    """The chunked fallback used when a file cannot be memory-mapped."""
+
+    def setUp(self) -> None:
+        patcher = mock.patch.object(gsd_runtime, "SCAN_CHUNK_SIZE", 16)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def scan(self, data: bytes, pattern, limit: int = 1024) -> bytes | None:
+        return gsd_runtime._scan_chunks(io.BytesIO(data), pattern, limit)
+
+    def test_header_straddling_chunk_boundary(self) -> None:
+        # "Current Phase: 12" is split across the first two 16-byte chunks
+        data = b"# Plan\n\nCurrent Phase: 12\nrest of the file\n"
+        self.assertEqual(self.scan(data, gsd_runtime.PHASE_PATTERN), b"12")
+
+    def test_value_straddling_chunk_boundary(self) -> None:
+        # The first chunk ends inside the digits; the match must not stop there
+        data = b"Current Phase: 12345\n"
+        self.assertEqual(self.scan(data, gsd_runtime.PHASE_PATTERN), b"12345")
+
+    def test_match_at_eof_without_newline(self) -> None:
+        data = b"intro line here\n" * 3 + b"# Final Title"
+        self.assertEqual(self.scan(data, gsd_runtime.TITLE_PATTERN), b"Final Title")
+        self.assertEqual(self.scan(b"Current Phase: 7", gsd_runtime.PHASE_PATTERN), b"7")
+
+    def test_no_match(self) -> None:
+        self.assertIsNone(self.scan(b"nothing to see\n" * 10, gsd_runtime.PHASE_PATTERN))
+
+    def test_limit_stops_the_scan(self) -> None:
+        data = b"x" * 15 + b"\n" + b"Current Phase: 4\n"
+        self.assertIsNone(self.scan(data, gsd_runtime.PHASE_PATTERN, limit=16))
+        self.assertEqual(self.scan(data, gsd_runtime.PHASE_PATTERN, limit=64), b"4")
+
+    def test_match_cut_by_limit_is_returned(self) -> None:
+        # A value running into the cap is reported as far as it was read
+        data = b"Current Phase: 123456\n"
+        self.assertEqual(self.scan(data, gsd_runtime.PHASE_PATTERN, limit=18), b"123")
+
+
+class ScanFileTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory(prefix="gsd-runtime-")
+        self.path = os.path.join(self._tmp.name, "ROADMAP.md")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def write(self, data: bytes) -> None:
+        with open(self.path, "wb") as f:
+            f.write(data)
+
+    def test_truncation_keeps_header_and_checkboxes_before_cap(self) -> None:
+        log = b"- [x] done task\n" * 4 + b"- [ ] open task\n" * 2
+        padding = b"- [x] old task\n" * 64
+        self.write(b"## Current Milestone: MVP\n" + log + padding
+                   + b"Current Phase: 9\n" + log)
+        limit = 26 + len(log) + len(padding)
+        for no_mmap in (False, True):
+            with self.subTest(no_mmap=no_mmap), contextlib.ExitStack() as stack:
+                stack.enter_context(mock.patch.object(gsd_runtime, "MAX_SCAN_BYTES", limit))
+                stack.enter_context(mock.patch.object(gsd_runtime, "SCAN_CHUNK_SIZE", 64))
+                if no_mmap:
+                    stack.enter_context(
+                        mock.patch.object(gsd_runtime.mmap, "mmap", side_effect=OSError))
+                self.assertEqual(gsd_runtime.parse_milestone(self.path), "MVP")
+                self.assertIsNone(gsd_runtime.parse_phase(self.path))
+                # Checkbox counts cover the whole file, not just the scanned head
+                self.assertEqual(gsd_runtime.parse_checkboxes(self.path), (76, 72))
+                with open(self.path, "rb") as f:
+                    head = f.read(limit)
+                self.assertEqual(gsd_runtime.count_checkboxes(head), (70, 68))
+
+    def test_chunked_fallback_matches_mmap(self) -> None:
+        self.write(b"intro\n" * 5000 + b"# Late Title")
+        with mock.patch.object(gsd_runtime, "MAX_SCAN_BYTES", 1 << 20):
+            mapped = gsd_runtime.parse_title(self.path)
+            with mock.patch.object(gsd_runtime.mmap, "mmap", side_effect=ValueError):
+                chunked = gsd_runtime.parse_title(self.path)
+        self.assertEqual(mapped, "Late Title")
+        self.assertEqual(chunked, "Late Title")
+
+
+class EnvNumberTest(unittest.TestCase):
+
+    def env(self, value: str):
+        return mock.patch.dict(os.environ, {"GSD_TEST_NUMBER": value})
+
+    def test_invalid_values_give_default(self) -> None:
+        self.assertNotIn("GSD_TEST_NUMBER", os.environ)
+        self.assertEqual(gsd_runtime.env_number("GSD_TEST_NUMBER", 2.5), 2.5)
+        for value in ("", "fast", "-1", "0"):
+            with self.subTest(value=value), self.env(value):
+                self.assertEqual(gsd_runtime.env_number("GSD_TEST_NUMBER", 2.5), 2.5)
+
+    def test_valid_values(self) -> None:
+        with self.env("0.25"):
+            self.assertEqual(gsd_runtime.env_number("GSD_TEST_NUMBER", 2.5), 0.25)
+        with self.env("7"):
+            self.assertEqual(gsd_runtime.env_number("GSD_TEST_NUMBER", 3, int), 7)
+        with self.env("7.5"):
+            self.assertEqual(gsd_runtime.env_number("GSD_TEST_NUMBER", 3, int), 3)
+
+    def test_allow_zero(self) -> None:
+        with self.env("0"):
+            self.assertEqual(gsd_runtime.env_number("GSD_TEST_NUMBER", 2.5, allow_zero=True), 0)
+        with self.env("-0.5"):
+            self.assertEqual(gsd_runtime.env_number("GSD_TEST_NUMBER", 2.5, allow_zero=True), 2.5)
+
+    def test_status_throttle(self) -> None:
+        watcher = mock.Mock()
+        for value, expected in (("0", 0.0), ("1.5", 1.5), ("soon", 0.5), ("-2", 0.5)):
+            with self.subTest(value=value), \
+                    mock.patch.dict(os.environ, {"GSD_STATUS_THROTTLE": value}):
+                publisher = gsd_events.StatusPublisher(watcher, lambda payload: True)
+                self.assertEqual(publisher.throttle, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
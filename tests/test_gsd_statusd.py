@@ -0,0 +1,207 @@
+"""gsd-statusd wire format and the RemoteWatcher fallback to local watching."""
+
+from __future__ import annotations
+
+import os
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "patches"))
+
+import gsd_statusd  # noqa: E402
+import gsd_watcher  # noqa: E402
+from gsd_runtime import EMPTY_CONTEXT, GSDContext  # noqa: E402
+
+DAEMON_CONTEXT = GSDContext(enabled=True, root="/srv/project", phase="3",
+                            project="From the daemon", milestone=None,
+                            todos_total=7, todos_done=2)
+
+
+def wait_for(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+class FramingTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.left, self.right = socket.socketpair()
+        self.right.settimeout(5)
+        self.addCleanup(self.left.close)
+        self.addCleanup(self.right.close)
+
+    def test_header_layout(self) -> None:
+        gsd_statusd.send_frame(self.left, gsd_statusd.MSG_CONTEXT, b"abc")
+        raw = self.right.recv(64)
+        self.assertEqual(raw, struct.pack("!BI", gsd_statusd.MSG_CONTEXT, 3) + b"abc")
+
+    def test_round_trip(self) -> None:
+        gsd_statusd.send_frame(self.left, gsd_statusd.MSG_HELLO, bytes([1]))
+        gsd_statusd.send_frame(self.left, gsd_statusd.MSG_STATS)
+        gsd_statusd.send_frame(self.left, gsd_statusd.MSG_SUBSCRIBE,
+                               gsd_statusd.encode_strings("/work", None))
+        self.assertEqual(gsd_statusd.recv_frame(self.right), (gsd_statusd.MSG_HELLO, b"\x01"))
+        self.assertEqual(gsd_statusd.recv_frame(self.right), (gsd_statusd.MSG_STATS, b""))
+        msg, payload = gsd_statusd.recv_frame(self.right)
+        self.assertEqual(msg, gsd_statusd.MSG_SUBSCRIBE)
+        self.assertEqual(gsd_statusd.decode_strings(payload, 2), ["/work", None])
+
+    def test_frame_split_across_sends(self) -> None:
+        payload = os.urandom(3000)
+        data = struct.pack("!BI", gsd_statusd.MSG_CONTEXT, len(payload)) + payload
+
+        def trickle() -> None:
+            for i in range(0, len(data), 700):
+                self.left.sendall(data[i:i + 700])
+                time.sleep(0.01)
+
+        sender = threading.Thread(target=trickle)
+        sender.start()
+        self.assertEqual(gsd_statusd.recv_frame(self.right), (gsd_statusd.MSG_CONTEXT, payload))
+        sender.join()
+
+    def test_short_read(self) -> None:
+        # Header cut short, then a payload cut short: both are a closed peer
+        self.left.sendall(struct.pack("!BI", gsd_statusd.MSG_CONTEXT, 10)[:3])
+        self.left.shutdown(socket.SHUT_WR)
+        with self.assertRaises(EOFError):
+            gsd_statusd.recv_frame(self.right)
+
+        left, right = socket.socketpair()
+        with left, right:
+            left.sendall(struct.pack("!BI", gsd_statusd.MSG_CONTEXT, 10) + b"four")
+            left.shutdown(socket.SHUT_WR)
+            with self.assertRaises(EOFError):
+                gsd_statusd.recv_frame(right)
+
+    def test_oversized_frame(self) -> None:
+        self.left.sendall(struct.pack("!BI", gsd_statusd.MSG_CONTEXT, gsd_statusd.MAX_FRAME + 1))
+        with self.assertRaises(ValueError):
+            gsd_statusd.recv_frame(self.right)
+
+    def test_strings(self) -> None:
+        values = ["", None, "ascii", "ünïcødé 🚀", None]
+        data = gsd_statusd.encode_strings(*values)
+        self.assertEqual(gsd_statusd.decode_strings(data, len(values)), values)
+        # Over-long strings are cut below the None marker
+        long = gsd_statusd.encode_strings("x" * 70000)
+        self.assertEqual(struct.unpack_from("!H", long)[0], 0xFFFE)
+        self.assertEqual(gsd_statusd.decode_strings(long, 1), ["x" * 0xFFFE])
+
+    def test_context(self) -> None:
+        data = gsd_statusd.encode_context(DAEMON_CONTEXT)
+        self.assertEqual(gsd_statusd.decode_context(data), DAEMON_CONTEXT)
+        disabled = gsd_statusd.encode_context(EMPTY_CONTEXT)
+        self.assertIs(gsd_statusd.decode_context(disabled), EMPTY_CONTEXT)
+
+    def test_truncated_context(self) -> None:
+        data = gsd_statusd.encode_context(DAEMON_CONTEXT)
+        with self.assertRaises(struct.error):
+            gsd_statusd.decode_context(data[:gsd_statusd._CONTEXT_HEAD.size + 3])
+
+
+class FakeDaemon:
+    """Accepts one client, sends one context, and hangs up on request."""
+
+    def __init__(self, path: str, hello: bytes = bytes([gsd_statusd.PROTOCOL_VERSION])) -> None:
+        self.hello = hello
+        self.subscribed: list[str | None] = []
+        self.hang_up = threading.Event()
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(path)
+        self.server.listen(1)
+        self.server.settimeout(5)
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self) -> None:
+        conn, _ = self.server.accept()
+        with conn:
+            gsd_statusd.send_frame(conn, gsd_statusd.MSG_HELLO, self.hello)
+            try:
+                msg, payload = gsd_statusd.recv_frame(conn)
+            except (EOFError, OSError):
+                return
+            if msg == gsd_statusd.MSG_SUBSCRIBE:
+                self.subscribed = gsd_statusd.decode_strings(payload, 2)
+            gsd_statusd.send_frame(conn, gsd_statusd.MSG_CONTEXT,
+                                   gsd_statusd.encode_context(DAEMON_CONTEXT))
+            self.hang_up.wait(5)
+
+    def close(self) -> None:
+        self.hang_up.set()
+        self.thread.join(5)
+        self.server.close()
+
+
+class RemoteWatcherTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory(prefix="gsd-statusd-")
+        # Registered first so it runs after the watchers and daemon stop
+        self.addCleanup(self._tmp.cleanup)
+        base = Path(self._tmp.name)
+        self.socket_path = str(base / "statusd.sock")
+        self.project = base / "project"
+        (self.project / ".planning").mkdir(parents=True)
+        (self.project / ".planning" / "PROJECT.md").write_text("# Local Project\n")
+        (self.project / ".planning" / "STATE.md").write_text("Current Phase: 5\n")
+        patcher = mock.patch.dict(os.environ, {"GSD_STATUSD_SOCKET": self.socket_path,
+                                               "GSD_WATCH_MODE": "poll",
+                                               "GSD_POLL_INTERVAL": "0.05"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def watcher(self) -> gsd_watcher.RemoteWatcher:
+        watcher = gsd_watcher.RemoteWatcher(str(self.project)).start()
+        self.addCleanup(watcher.stop)
+        return watcher
+
+    def test_daemon_disconnect_falls_back_to_local(self) -> None:
+        daemon = FakeDaemon(self.socket_path)
+        self.addCleanup(daemon.close)
+        self.assertTrue(gsd_statusd.available())
+        watcher = self.watcher()
+        self.assertTrue(wait_for(lambda: watcher.snapshot == DAEMON_CONTEXT))
+        self.assertTrue(watcher.remote)
+        self.assertEqual(daemon.subscribed, [str(self.project), None])
+        # While remote, refresh() reports the daemon's snapshot
+        self.assertEqual(watcher.refresh(), DAEMON_CONTEXT)
+
+        daemon.hang_up.set()
+        self.assertTrue(wait_for(lambda: watcher.snapshot.project == "Local Project"))
+        self.assertFalse(watcher.remote)
+        self.assertEqual(watcher.snapshot.phase, "5")
+        # Local polling keeps following the project
+        (self.project / ".planning" / "STATE.md").write_text("Current Phase: 6\n")
+        self.assertTrue(wait_for(lambda: watcher.snapshot.phase == "6"))
+
+    def test_unreachable_daemon_watches_locally(self) -> None:
+        Path(self.socket_path).write_text("stale")  # exists, but nobody listens
+        watcher = self.watcher()
+        self.assertTrue(watcher.wait_ready(5))
+        self.assertEqual(watcher.snapshot.project, "Local Project")
+        self.assertFalse(watcher.remote)
+
+    def test_protocol_mismatch_watches_locally(self) -> None:
+        daemon = FakeDaemon(self.socket_path, hello=bytes([gsd_statusd.PROTOCOL_VERSION + 1]))
+        self.addCleanup(daemon.close)
+        watcher = self.watcher()
+        self.assertTrue(wait_for(lambda: watcher.snapshot.project == "Local Project"))
+        self.assertFalse(watcher.remote)
+
+
+if __name__ == "__main__":
+    unittest.main()
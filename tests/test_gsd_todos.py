@@ -0,0 +1,186 @@
+"""gsd_todos: log replay, the base check, compaction and read_counts."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "patches"))
+
+import gsd_todos  # noqa: E402
+
+
+class TodoStoreTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory(prefix="gsd-todos-")
+        self.base = Path(self._tmp.name)
+        self.cache = self.base / "cache"
+        patcher = mock.patch.object(gsd_todos, "CACHE_DIR", str(self.cache))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.path = self.base / ".kimi-todos.json"
+        self.log = self.base / ".kimi-todos.jsonl"
+        self.write_json([{"title": "one", "done": True}, {"title": "two", "done": False}])
+        self.store = gsd_todos.TodoStore(self.path)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def write_json(self, todos: list) -> str:
+        data = json.dumps(todos).encode()
+        self.path.write_bytes(data)
+        return hashlib.sha256(data).hexdigest()
+
+    def log_lines(self) -> list[dict]:
+        return [json.loads(line) for line in self.log.read_text().splitlines()]
+
+    def titles(self) -> list[str]:
+        return [todo["title"] for todo in self.store.load()]
+
+    # -- log replay ------------------------------------------------------------
+
+    def test_events_replay_over_the_json(self) -> None:
+        digest = hashlib.sha256(self.path.read_bytes()).hexdigest()
+        json_before = self.path.read_bytes()
+        self.assertEqual(self.store.add("three"), 2)
+        self.store.set_done(1)
+        self.store.remove(0)
+        self.store.add("four", done=True, priority="high")
+        self.assertEqual(self.store.load(), [
+            {"title": "two", "done": True},
+            {"title": "three", "done": False},
+            {"title": "four", "done": True, "priority": "high"},
+        ])
+        # X.json is untouched until compaction; the log starts with its base
+        self.assertEqual(self.path.read_bytes(), json_before)
+        lines = self.log_lines()
+        self.assertEqual(lines[0], {"op": "base", "sha256": digest})
+        self.assertEqual([line["op"] for line in lines[1:]], ["add", "update", "remove", "add"])
+        self.assertEqual(gsd_todos.read_counts(str(self.path)), (3, 2))
+
+    def test_replace_and_out_of_range_events(self) -> None:
+        self.store.replace([{"title": "only", "done": False}])
+        self.store.set_done(5)
+        self.store.remove(-1)
+        self.assertEqual(self.titles(), ["only"])
+
+    def test_torn_final_line_is_ignored(self) -> None:
+        self.store.add("three")
+        with open(self.log, "a") as f:
+            f.write('{"op": "add", "todo": {"tit')
+        self.assertEqual(self.titles(), ["one", "two", "three"])
+        with open(self.log, "a") as f:
+            f.write('\n{"op": "remove", "index": 0}\n')
+        with self.assertRaises(ValueError):
+            self.store.load()
+
+    def test_log_without_base_still_applies(self) -> None:
+        self.log.write_text('{"op":"add","todo":{"title":"legacy","done":true}}\n')
+        self.assertEqual(self.titles(), ["one", "two", "legacy"])
+        self.assertEqual(gsd_todos.read_counts(str(self.path)), (3, 2))
+
+    # -- base check ------------------------------------------------------------
+
+    def test_touch_keeps_the_log(self) -> None:
+        self.store.add("three")
+        stat = self.path.stat()
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5 * 10**9))
+        self.assertEqual(self.titles(), ["one", "two", "three"])
+
+    def test_rewritten_json_orphans_the_log(self) -> None:
+        self.store.add("three")
+        log_before = self.log.read_bytes()
+        digest = self.write_json([{"title": "fresh", "done": False}])
+        # The log no longer applies, and readers leave it alone
+        self.assertEqual(self.titles(), ["fresh"])
+        self.assertEqual(gsd_todos.read_counts(str(self.path)), (1, 0))
+        self.assertEqual(self.log.read_bytes(), log_before)
+
+        self.store.add("next")
+        orphaned = Path(str(self.log) + gsd_todos.ORPHAN_SUFFIX)
+        self.assertEqual(orphaned.read_bytes(), log_before)
+        self.assertEqual(self.log_lines()[0], {"op": "base", "sha256": digest})
+        self.assertEqual(self.titles(), ["fresh", "next"])
+
+    # -- compaction ------------------------------------------------------------
+
+    def test_compaction_at_log_limit(self) -> None:
+        title = "x" * 1000
+        added = 0
+        while self.log.exists() or added == 0:
+            size = self.log.stat().st_size if self.log.exists() else 0
+            self.assertLessEqual(size, gsd_todos.COMPACT_LOG_BYTES)
+            self.store.add(f"{added} {title}")
+            added += 1
+        # The append that crossed COMPACT_LOG_BYTES folded the log into X.json
+        self.assertGreater(added, gsd_todos.COMPACT_LOG_BYTES // 1100)
+        todos = json.loads(self.path.read_text())
+        self.assertEqual(len(todos), 2 + added)
+        self.assertEqual(todos[-1]["title"], f"{added - 1} {title}")
+        summary = gsd_todos.read_summary(str(self.path))
+        self.assertEqual(summary[:2], (2 + added, 1))
+        self.assertEqual(summary[3], 0)
+        # A later write starts a fresh log based on the compacted JSON
+        self.store.set_done(2)
+        digest = hashlib.sha256(self.path.read_bytes()).hexdigest()
+        self.assertEqual(self.log_lines()[0], {"op": "base", "sha256": digest})
+        self.assertEqual(gsd_todos.read_counts(str(self.path)), (2 + added, 2))
+
+    def test_explicit_compact(self) -> None:
+        self.store.add("three", done=True)
+        self.store.compact()
+        self.assertFalse(self.log.exists())
+        self.assertEqual([t["title"] for t in json.loads(self.path.read_text())],
+                         ["one", "two", "three"])
+        self.assertEqual(gsd_todos.read_counts(str(self.path)), (3, 2))
+
+    # -- read_counts -----------------------------------------------------------
+
+    def test_read_counts_uses_a_matching_summary(self) -> None:
+        self.store.add("three")
+        recorded = gsd_todos.read_summary(str(self.path))
+        self.assertEqual(recorded[:2], (3, 1))
+        # Counts come from the summary alone while its signatures match
+        gsd_todos.write_summary(str(self.path), 40, 20, recorded[2], recorded[3])
+        with mock.patch.object(gsd_todos, "_materialize") as materialize:
+            self.assertEqual(gsd_todos.read_counts(str(self.path)), (40, 20))
+        materialize.assert_not_called()
+
+    def test_read_counts_falls_back_without_writing(self) -> None:
+        self.assertEqual(gsd_todos.read_counts(str(self.path)), (2, 1))
+        self.assertFalse(self.cache.exists())
+        self.assertFalse(self.log.exists())
+        self.assertEqual(gsd_todos.read_counts(str(self.base / "missing.json")), (0, 0))
+
+    def test_direct_json_rewrite_makes_the_summary_stale(self) -> None:
+        self.store.add("three")
+        self.store.compact()
+        self.write_json([{"title": "a", "done": True}] * 5)
+        # Stale summary: recounted in memory on every read, summary untouched
+        summary = gsd_todos.read_summary(str(self.path))
+        self.assertEqual(gsd_todos.read_counts(str(self.path)), (5, 5))
+        self.assertEqual(gsd_todos.read_summary(str(self.path)), summary)
+        self.assertEqual(self.store.refresh_summary(), (5, 5))
+        with mock.patch.object(gsd_todos, "_materialize") as materialize:
+            self.assertEqual(gsd_todos.read_counts(str(self.path)), (5, 5))
+        materialize.assert_not_called()
+
+    def test_summary_of_another_version_is_ignored(self) -> None:
+        self.store.add("three")
+        with open(gsd_todos.summary_path(str(self.path)), "r+b") as f:
+            f.seek(4)
+            f.write((gsd_todos.SUMMARY_VERSION + 1).to_bytes(2, "little"))
+        self.assertIsNone(gsd_todos.read_summary(str(self.path)))
+        self.assertEqual(gsd_todos.read_counts(str(self.path)), (3, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+"""jim remembers a failed apply instead of retrying it on every launch."""
+
+from __future__ import annotations
+
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_module(name: str, path: Path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+patcher = load_module("kimi_cli_patcher", REPO_ROOT / "patches" / "kimi_cli_patcher.py")
+bench = load_module("gsd_bench", REPO_ROOT / "benchmarks" / "gsd_bench.py")
+jim = load_module("jim_wrapper", REPO_ROOT / "patches" / "jim-wrapper.py")
+
+
+class EnsurePatchedTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory(prefix="gsd-jim-")
+        self.addCleanup(self._tmp.cleanup)
+        base = Path(self._tmp.name)
+        self.tool_dir = base / "kimi-cli"
+        version = f"python{sys.version_info[0]}.{sys.version_info[1]}"
+        self.root = bench.make_fake_kimi(self.tool_dir / "lib" / version / "site-packages")
+        # Other test modules load their own copy of the patcher; jim imports by name
+        mock.patch.dict(sys.modules, {"kimi_cli_patcher": patcher}).start()
+        mock.patch.object(patcher, "INSTALL_STATE_FILE", base / "gsd-install.json").start()
+        # Rediscovery after a kimi-cli change looks here
+        mock.patch.dict(os.environ, {"UV_TOOL_DIR": str(base)}).start()
+        self.addCleanup(mock.patch.stopall)
+        patcher.write_install_state(self.root, self.tool_dir)
+        # A kimi-cli whose prompt module the patches do not recognize
+        self.prompt = self.root / "ui" / "shell" / "prompt.py"
+        self.prompt_source = self.prompt.read_text()
+        self.prompt.write_text("# rewritten by a kimi-cli release GSD does not know\n")
+        self.applies = mock.patch.object(patcher, "apply_all_patches",
+                                         wraps=patcher.apply_all_patches).start()
+
+    def launch(self) -> tuple[bool, str]:
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            patched = jim.ensure_patched()
+        return patched, out.getvalue()
+
+    def test_failed_apply_is_not_retried(self) -> None:
+        patched, out = self.launch()
+        self.assertFalse(patched)
+        self.assertIn("Patching failed", out)
+        self.assertEqual(self.applies.call_count, 1)
+        self.assertEqual(patcher.load_install_state()["apply_failed"], patcher.PATCH_VERSION)
+
+        for _ in range(3):
+            patched, out = self.launch()
+            self.assertFalse(patched)
+            self.assertIn("run 'jim --patch' to retry", out)
+        self.assertEqual(self.applies.call_count, 1)
+
+    def test_patch_version_change_retries(self) -> None:
+        self.launch()
+        with mock.patch.object(patcher, "PATCH_VERSION", "99.0.0"):
+            self.launch()
+            self.assertEqual(self.applies.call_count, 2)
+            self.launch()
+        self.assertEqual(self.applies.call_count, 2)
+
+    def test_kimi_upgrade_retries(self) -> None:
+        self.launch()
+        site_packages = self.root.parent
+        (site_packages / "kimi_cli-9.9.9.dist-info").mkdir()
+        # Within one filesystem timestamp tick of the apply the mtime may not move
+        mtime = site_packages.stat().st_mtime_ns + 10**9
+        os.utime(site_packages, ns=(mtime, mtime))
+        self.launch()
+        self.assertEqual(self.applies.call_count, 2)
+
+    def test_forced_apply_clears_the_failure(self) -> None:
+        self.launch()
+        self.prompt.write_text(self.prompt_source)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(jim.run_patcher("apply"), 0)
+        self.assertNotIn("apply_failed", patcher.load_install_state())
+        self.assertEqual(self.launch(), (True, ""))
+        self.assertEqual(self.applies.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""Bytecode written by apply is rolled back and restored with the sources."""
+
+from __future__ import annotations
+
+import contextlib
+import importlib.util
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_module(name: str, path: Path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+patcher = load_module("kimi_cli_patcher", REPO_ROOT / "patches" / "kimi_cli_patcher.py")
+bench = load_module("gsd_bench", REPO_ROOT / "benchmarks" / "gsd_bench.py")
+
+
+class PatcherBytecodeTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory(prefix="gsd-bytecode-")
+        version = f"python{sys.version_info[0]}.{sys.version_info[1]}"
+        self.root = bench.make_fake_kimi(
+            Path(self._tmp.name) / "lib" / version / "site-packages")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def pycs(self) -> list[Path]:
+        return sorted(self.root.rglob("*.pyc"))
+
+    def apply(self) -> bool:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return patcher.apply_all_patches(self.root)
+
+    def test_apply_writes_and_restore_removes_bytecode(self) -> None:
+        self.assertTrue(self.apply())
+        self.assertTrue(self.pycs())
+        with contextlib.redirect_stdout(io.StringIO()):
+            patcher.restore_all_patches(self.root)
+        self.assertEqual(self.pycs(), [])
+
+    def test_rollback_removes_bytecode(self) -> None:
+        def fail(*args, **kwargs):
+            raise OSError("disk full")
+
+        write_manifest = patcher.write_manifest
+        patcher.write_manifest = fail
+        try:
+            self.assertFalse(self.apply())
+        finally:
+            patcher.write_manifest = write_manifest
+        self.assertEqual(self.pycs(), [])
+
+    def test_compileall_bytecode_is_journaled(self) -> None:
+        other = (sys.version_info[0], sys.version_info[1] + 1)
+        root = bench.make_fake_kimi(Path(self._tmp.name) / "other" / "lib"
+                                    / f"python{other[0]}.{other[1]}" / "site-packages")
+        bin_dir = root.parents[3] / "bin"
+        bin_dir.mkdir(parents=True)
+        python = bin_dir / f"python{other[0]}.{other[1]}"
+        # Stands in for kimi's interpreter: writes the .pyc it would write
+        python.write_text("#!/bin/sh\n"
+                          "for f in \"$@\"; do case \"$f\" in *.py) d=$(dirname \"$f\")/__pycache__; "
+                          "mkdir -p \"$d\"; b=$(basename \"$f\" .py); "
+                          f": > \"$d/$b.cpython-{other[0]}{other[1]}.pyc\";; esac; done\n")
+        python.chmod(0o755)
+        source = root / "__init__.py"
+        txn = patcher.PatchTransaction()
+        with contextlib.redirect_stdout(io.StringIO()):
+            patcher.write_bytecode(root, {source: None}, txn)
+            self.assertTrue(patcher.pyc_path(source, other).exists())
+            txn.rollback()
+        self.assertFalse(patcher.pyc_path(source, other).exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
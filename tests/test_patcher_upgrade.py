@@ -0,0 +1,117 @@
+"""Upgrading a tree patched by an older patcher (python3 -m unittest discover tests)."""
+
+from __future__ import annotations
+
+import contextlib
+import importlib.util
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+LEGACY_LINE = "LEGACY_GSD_HOOK = True  # injected by an older patcher\n"
+
+
+def load_module(name: str, path: Path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+patcher = load_module("kimi_cli_patcher", REPO_ROOT / "patches" / "kimi_cli_patcher.py")
+bench = load_module("gsd_bench", REPO_ROOT / "benchmarks" / "gsd_bench.py")
+
+
+class PatcherUpgradeTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory(prefix="gsd-upgrade-")
+        self.root = bench.make_fake_kimi(Path(self._tmp.name) / "site-packages")
+        self.patches = {p.name: p for p in patcher.get_patches(self.root)}
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def apply(self) -> bool:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return patcher.apply_all_patches(self.root)
+
+    def patch_legacy(self, edit=lambda name, text: text + LEGACY_LINE) -> None:
+        """Patch like an older patcher: markers present, different code."""
+        self.assertTrue(self.apply())
+        for name, patch in self.patches.items():
+            patch.target.write_text(edit(name, patch.target.read_text()))
+
+    def assert_current(self) -> None:
+        """Every target is exactly the current patch of its backup."""
+        self.assertTrue(patcher.is_patched(self.root))
+        for name, patch in self.patches.items():
+            expected = patch.patch_func(patch.backup.read_text())
+            self.assertEqual(patch.target.read_text(), expected, name)
+
+    def test_baseline_tree_without_manifest_is_rebuilt(self) -> None:
+        self.patch_legacy()
+        patcher.manifest_path(self.root).unlink()
+        self.assertFalse(patcher.is_patched(self.root))
+        self.assertTrue(self.apply())
+        self.assert_current()
+
+    def test_older_patch_version_is_rebuilt(self) -> None:
+        self.patch_legacy()
+        current = patcher.PATCH_VERSION
+        patcher.PATCH_VERSION = "1.0.0"
+        try:
+            patcher.write_manifest(self.root, list(self.patches.values()))
+        finally:
+            patcher.PATCH_VERSION = current
+        self.assertFalse(patcher.is_patched(self.root))
+        self.assertTrue(self.apply())
+        self.assert_current()
+
+    def test_kimi_upgrade_over_baseline_tree_keeps_new_files(self) -> None:
+        self.patch_legacy()
+        patcher.manifest_path(self.root).unlink()
+        prompt = self.patches["prompt.py"]
+        upgraded = prompt.backup.read_text() + "\nKIMI_UPGRADED = True\n"
+        prompt.target.write_text(upgraded)
+        self.assertTrue(self.apply())
+        self.assertEqual(prompt.backup.read_text(), upgraded)
+        self.assert_current()
+
+    def test_status_snapshot_and_wire_fields_are_upgraded(self) -> None:
+        # The baseline StatusSnapshot had no gsd_generation and its
+        # GSDStatusEvent no delta fields, yet both markers were present
+        def baseline(name: str, text: str) -> str:
+            if name == "soul/__init__.py":
+                start = text.index("    gsd_generation: int")
+                text = text[:start] + text[text.index('"""', text.index('"""', start) + 3) + 4:]
+            elif name == "wire/types.py":
+                for field in ("    full: bool = True\n", "    seq: int = 0\n",
+                              "    changed: list[str] = []\n"):
+                    text = text.replace(field, "")
+            return text
+
+        self.patch_legacy(baseline)
+        patcher.manifest_path(self.root).unlink()
+        self.assertNotIn("gsd_generation", self.patches["soul/__init__.py"].target.read_text())
+        self.assertTrue(self.apply())
+        self.assert_current()
+        self.assertIn("gsd_generation: int", self.patches["soul/__init__.py"].target.read_text())
+        self.assertIn("seq: int = 0", self.patches["wire/types.py"].target.read_text())
+
+    def test_legacy_target_without_backup_fails_unchanged(self) -> None:
+        self.patch_legacy()
+        patcher.manifest_path(self.root).unlink()
+        prompt = self.patches["prompt.py"]
+        prompt.backup.unlink()
+        before = prompt.target.read_text()
+        self.assertFalse(self.apply())
+        self.assertEqual(prompt.target.read_text(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()